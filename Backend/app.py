@@ -3,7 +3,7 @@ from authlib.integrations.flask_client import OAuth
 from authlib.integrations.base_client.errors import MismatchingStateError
 from flask_sqlalchemy import SQLAlchemy
 from flask_session import Session
-import redis
+from app.utils.redis_utils import redis_client  # Shared pooled client, configured with REDIS_* variables
 import os
 import random
 import string
@@ -24,7 +24,7 @@ app.secret_key = os.getenv("FLASK_SECRET_KEY", "your-secret-key")
 app.config['SESSION_TYPE'] = 'redis'
 app.config['SESSION_PERMANENT'] = False
 app.config['SESSION_USE_SIGNER'] = True
-app.config['SESSION_REDIS'] = redis.StrictRedis(host='localhost', port=6379, db=0)
+app.config['SESSION_REDIS'] = redis_client
 Session(app)
 
 # Configure SQLAlchemy for PostgreSQL
@@ -45,9 +45,6 @@ YOUTUBE_SEARCH_URL = "https://www.googleapis.com/youtube/v3/search"
 # Initialize OAuth
 oauth = OAuth(app)
 
-# Initialize Redis connection (you may need to adjust the host and port depending on your setup)
-redis_client = redis.StrictRedis(host='localhost', port=6379, db=0)
-
 def run_migrations():
     with app.app_context():
         upgrade()
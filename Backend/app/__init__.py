@@ -27,6 +27,8 @@ def create_app():
 
     # Load configurations
     app.config.from_object('config.Config')
+    from app.utils.session_tokens import check_session_mode
+    check_session_mode(app.config)
 
     # Initialize extensions
     db.init_app(app)
@@ -50,7 +52,8 @@ def create_app():
         access_token_url="https://accounts.google.com/o/oauth2/token",
         api_base_url="https://www.googleapis.com/oauth2/v1",
         jwks_uri="https://www.googleapis.com/oauth2/v3/certs",
-        client_kwargs={"scope": "openid profile email"},
+        # default_timeout bounds the token exchange, which Authlib sends with its own session
+        client_kwargs={"scope": "openid profile email", "default_timeout": float(os.getenv("HTTP_READ_TIMEOUT", 10))},
     )
 
     # Register blueprints
@@ -75,4 +78,8 @@ def create_app():
     from app.routes.users import user_bp  # Import the recipe blueprint
     app.register_blueprint(user_bp, url_prefix="/api")
 
+    # Register CLI commands
+    from app.commands import recipes_cli
+    app.cli.add_command(recipes_cli)
+
     return app
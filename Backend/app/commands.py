@@ -0,0 +1,141 @@
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from app.extensions import db
+from app.models.models import Recipe, Like, Comment, Favorite, Rating
+from app.models.user import User
+from app.utils.catalog_import import iter_catalog, import_catalog
+from app.utils.recipe_catalog import compile_catalog, compiled_catalog_path
+from app.routes.based_recipes import JSON_FILE_PATH
+from app.utils.ingredients import index_recipe_ingredients
+from app.utils.recipe_cache import recipe_cache_stats
+from app.utils.like_buffer import flush_likes, run_like_flusher, check_buffered_likes
+from app.utils.job_queue import run_job_workers
+
+# `flask recipes ...` maintenance commands
+recipes_cli = AppGroup("recipes", help="Recipe maintenance commands.")
+
+
+def reconcile_recipe_counters():
+    """
+    Rebuild the denormalized counters on every recipe from the likes, comments, favorites and
+    ratings tables. Only rows whose counters drifted are written. Returns the number of rows fixed.
+    """
+    counts = {
+        Recipe.likes_count: db.select(db.func.count(Like.id))
+        .where(Like.recipe_id == Recipe.id).scalar_subquery(),
+        Recipe.comments_count: db.select(db.func.count(Comment.id))
+        .where(Comment.recipe_id == Recipe.id).scalar_subquery(),
+        Recipe.favorites_count: db.select(db.func.count(Favorite.id))
+        .where(Favorite.recipe_id == Recipe.id).scalar_subquery(),
+        Recipe.rating_sum: db.select(db.func.coalesce(db.func.sum(Rating.score), 0))
+        .where(Rating.recipe_id == Recipe.id).scalar_subquery(),
+        Recipe.rating_count: db.select(db.func.count(Rating.id))
+        .where(Rating.recipe_id == Recipe.id).scalar_subquery(),
+    }
+    stmt = (
+        db.update(Recipe)
+        .values(counts)
+        .where(db.tuple_(*counts.keys()) != db.tuple_(*counts.values()))
+        .execution_options(synchronize_session=False)
+    )
+    result = db.session.execute(stmt)
+    db.session.commit()
+    return result.rowcount
+
+
+@recipes_cli.command("reconcile-counters")
+def reconcile_counters_command():
+    """Rebuild recipe like/comment/favorite/rating counters from the source tables."""
+    fixed = reconcile_recipe_counters()
+    click.echo(f"Reconciled counters: {fixed} recipe(s) updated.")
+
+
+@recipes_cli.command("reindex-ingredients")
+@click.option("--batch-size", default=500, show_default=True, help="Recipes indexed per transaction.")
+def reindex_ingredients_command(batch_size):
+    """Rebuild the inverted ingredient index used for suggested recipes."""
+    recipe_ids = [row.id for row in db.session.query(Recipe.id).order_by(Recipe.id)]
+    for start in range(0, len(recipe_ids), batch_size):
+        batch = Recipe.query.options(db.load_only(Recipe.id, Recipe.ingredients)).filter(
+            Recipe.id.in_(recipe_ids[start:start + batch_size])
+        ).all()
+        for recipe in batch:
+            index_recipe_ingredients(recipe)
+        db.session.commit()
+    click.echo(f"Reindexed ingredients of {len(recipe_ids)} recipe(s).")
+
+
+@recipes_cli.command("cache-stats")
+def cache_stats_command():
+    """Show the hit rate of the recipe detail cache."""
+    stats = recipe_cache_stats()
+    click.echo(f"hits={stats['hits']} misses={stats['misses']} hit_rate={stats['hit_rate']:.2%}")
+
+
+@recipes_cli.command("flush-likes")
+@click.option("--interval", type=float, default=None, help="Seconds between flushes [default: LIKES_FLUSH_INTERVAL].")
+@click.option("--once", is_flag=True, help="Flush once and exit.")
+def flush_likes_command(interval, once):
+    """Write likes buffered in Redis (LIKES_WRITE_BEHIND) to the database."""
+    if once:
+        click.echo(f"Flushed likes of {flush_likes()} recipe(s).")
+        return
+    run_like_flusher(interval or current_app.config["LIKES_FLUSH_INTERVAL"])
+
+
+@recipes_cli.command("check-likes")
+@click.option("--repair", is_flag=True, help="Drop mismatching Redis liker sets so they reload from the database.")
+def check_likes_command(repair):
+    """Compare the Redis liker sets of write-behind likes with the likes table."""
+    mismatches = check_buffered_likes(repair=repair)
+    for recipe_id, (only_in_redis, only_in_db) in sorted(mismatches.items()):
+        click.echo(f"recipe {recipe_id}: only in redis {only_in_redis}, only in database {only_in_db}")
+    click.echo(f"{len(mismatches)} mismatching recipe(s){' repaired' if repair and mismatches else ''}.")
+
+
+@recipes_cli.command("gemini-worker")
+@click.option("--concurrency", default=4, show_default=True, help="Gemini jobs run at the same time.")
+def gemini_worker_command(concurrency):
+    """Run the queued Gemini jobs (POST /gemini/jobs) until interrupted."""
+    click.echo(f"Running Gemini jobs with {concurrency} worker thread(s).")
+    run_job_workers(concurrency)
+
+
+@recipes_cli.command("import")
+@click.argument("catalog", type=click.File("r", encoding="utf-8-sig"))
+@click.option("--owner-email", required=True, help="Email of the user the imported recipes are credited to.")
+@click.option("--format", "fmt", type=click.Choice(["auto", "json", "ndjson"]), default="auto", show_default=True,
+              help="Catalog format; auto picks ndjson for .ndjson/.jsonl files.")
+@click.option("--batch-size", default=1000, show_default=True, help="Recipes written per transaction.")
+def import_command(catalog, owner_email, fmt, batch_size):
+    """
+    Stream a JSON or NDJSON recipe catalog (e.g. thaifood_recipes.json) into the recipes table.
+    Re-importing the same catalog only adds recipes that are not there yet.
+    """
+    owner = User.query.filter_by(email=owner_email).first()
+    if not owner:
+        raise click.ClickException(f"No user with email {owner_email}")
+    if fmt == "auto":
+        fmt = "ndjson" if catalog.name.endswith((".ndjson", ".jsonl")) else "json"
+
+    def progress(read, created, elapsed):
+        rate = read / elapsed if elapsed else 0
+        click.echo(f"read {read} created {created} skipped {read - created} ({rate:,.0f} records/s)", err=True)
+
+    read, created = import_catalog(iter_catalog(catalog, fmt), owner.id, batch_size=batch_size, progress=progress)
+    click.echo(f"Imported {created} new recipe(s) from {read} record(s).")
+
+
+@recipes_cli.command("compile-catalog")
+@click.argument("source", required=False, type=click.Path(exists=True, dir_okay=False))
+@click.option("--output", type=click.Path(dir_okay=False), help="Defaults to SOURCE with an .rcat extension.")
+def compile_catalog_command(source, output):
+    """
+    Compile the /based recipes catalog into the memory-mapped format served by the based_recipes blueprint.
+    SOURCE defaults to the blueprint's thaifood_recipes.json.
+    """
+    source = source or JSON_FILE_PATH
+    output = output or compiled_catalog_path(source)
+    count = compile_catalog(source, output)
+    click.echo(f"Compiled {count} recipe(s) into {output}.")
@@ -1,21 +1,63 @@
 from datetime import datetime
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.hybrid import hybrid_property
 from app import db
 from app.models.user import User  # Import User model from user.py
 
 
+def to_lines(value):
+    """
+    Normalize ingredients or instructions as sent by clients (a list, or newline-separated text)
+    into the list of non-empty lines stored on `Recipe`.
+    """
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.split("\n")
+    return [str(line).strip() for line in value if str(line).strip()]
+
+
 class Recipe(db.Model):
     __tablename__ = 'recipes'
+    __table_args__ = (
+        db.Index('ix_recipes_created_at_id', 'created_at', 'id'),  # Keyset pagination for newest-first lists
+        db.Index('ix_recipes_likes_count_id', 'likes_count', 'id'),  # Keyset pagination for most-liked lists
+        db.UniqueConstraint('content_hash', name='uq_recipes_content_hash'),  # Idempotent catalog imports
+        # Trigram index for substring search; Thai has no word breaks, so full-text tokenizing does not apply
+        db.Index(
+            'ix_recipes_search_document_trgm', 'search_document',
+            postgresql_using='gin', postgresql_ops={'search_document': 'gin_trgm_ops'},
+        ),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
     cover_image = db.Column(db.String(500), nullable=True)
-    ingredients = db.Column(db.Text, nullable=False)  # Store as JSON string
-    instructions = db.Column(db.Text, nullable=False)  # Store as JSON string
-    category = db.Column(db.String(100), nullable=True)  # New field for category
+    ingredients = db.Column(JSONB, nullable=False)  # List of ingredient lines, see `to_lines`
+    instructions = db.Column(JSONB, nullable=False)  # List of instruction steps, see `to_lines`
+    category = db.Column(db.String(100), nullable=True, index=True)  # New field for category
     tags = db.Column(db.Text, nullable=True)  # Store tags as a JSON string or comma-separated values
     characteristics = db.Column(db.Text, nullable=True)  # New field for characteristics
     flavors = db.Column(db.Text, nullable=True)  # New field for flavors
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # SHA-256 of the imported content, so `flask recipes import` can be re-run safely; NULL for user recipes
+    content_hash = db.Column(db.String(64), nullable=True)
+
+    # Lower-cased text of every searchable field, maintained by Postgres on every write
+    search_document = db.Column(db.Text, db.Computed(
+        "lower(coalesce(name, '') || ' ' || coalesce(category, '') || ' ' || coalesce(tags, '') || ' ' || "
+        "coalesce(characteristics, '') || ' ' || coalesce(flavors, '') || ' ' || "
+        "coalesce(ingredients::text, '') || ' ' || coalesce(instructions::text, ''))",
+        persisted=True,
+    ))
+
+    # Denormalized engagement counters, kept in step with the likes/comments/favorites/ratings tables
+    # by the write routes (see `increment_counters`) and rebuilt by `flask recipes reconcile-counters`
+    likes_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    comments_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    favorites_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     # Relationships
     user = db.relationship('User', back_populates='recipes')
@@ -24,10 +66,32 @@ class Recipe(db.Model):
     comments = db.relationship('Comment', back_populates='recipe', lazy='dynamic', cascade="all, delete-orphan")
     favorites = db.relationship('Favorite', back_populates='recipe', lazy='dynamic', cascade="all, delete-orphan")
     related_videos = db.relationship('RelatedVideo', back_populates='recipe', lazy='dynamic', cascade="all, delete-orphan")
+    ingredient_index = db.relationship('RecipeIngredient', back_populates='recipe', lazy='dynamic', cascade="all, delete-orphan")
+    tag_index = db.relationship('RecipeTag', back_populates='recipe', lazy='dynamic', cascade="all, delete-orphan")
 
     def __repr__(self):
         return f"<Recipe {self.name}>"
 
+    @hybrid_property
+    def average_rating(self):
+        """Average rating score, or 0 when the recipe has not been rated."""
+        return self.rating_sum / self.rating_count if self.rating_count else 0
+
+    @average_rating.expression
+    def average_rating(cls):
+        return db.func.coalesce(
+            db.cast(cls.rating_sum, db.Float) / db.cast(db.func.nullif(cls.rating_count, 0), db.Float), 0
+        )
+
+    @classmethod
+    def increment_counters(cls, recipe_id, **deltas):
+        """
+        Atomically add `deltas` to the counter columns of a recipe, e.g. `likes_count=1`.
+        The UPDATE runs in the current transaction, so it commits or rolls back with the row it counts.
+        """
+        values = {getattr(cls, column): getattr(cls, column) + delta for column, delta in deltas.items()}
+        cls.query.filter_by(id=recipe_id).update(values, synchronize_session=False)
+
     def to_dict(self):
         """Convert the recipe instance to a dictionary for easy JSON serialization."""
         return {
@@ -45,11 +109,18 @@ class Recipe(db.Model):
         }
 
 
+# Keyset pagination for top-rated lists; must index the same expression `get_recipes` sorts by
+db.Index('ix_recipes_average_rating_id', Recipe.average_rating, Recipe.id)
+
+
 
 class Rating(db.Model):
     __tablename__ = 'ratings'
+    __table_args__ = (
+        db.UniqueConstraint('recipe_id', 'user_id', name='uq_ratings_recipe_id_user_id'),  # One per user per recipe
+    )
     id = db.Column(db.Integer, primary_key=True)
-    recipe_id = db.Column(db.Integer, db.ForeignKey('recipes.id'), nullable=False)
+    recipe_id = db.Column(db.Integer, db.ForeignKey('recipes.id'), nullable=False, index=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     score = db.Column(db.Integer, nullable=False)  # Range: 1-5
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -64,8 +135,11 @@ class Rating(db.Model):
 
 class Like(db.Model):
     __tablename__ = 'likes'
+    __table_args__ = (
+        db.UniqueConstraint('recipe_id', 'user_id', name='uq_likes_recipe_id_user_id'),  # One per user per recipe
+    )
     id = db.Column(db.Integer, primary_key=True)
-    recipe_id = db.Column(db.Integer, db.ForeignKey('recipes.id'), nullable=False)
+    recipe_id = db.Column(db.Integer, db.ForeignKey('recipes.id'), nullable=False, index=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
@@ -79,6 +153,10 @@ class Like(db.Model):
 
 class Comment(db.Model):
     __tablename__ = 'comments'
+    __table_args__ = (
+        # Newest-first keyset pagination of a recipe's comments
+        db.Index('ix_comments_recipe_id_created_at_id', 'recipe_id', 'created_at', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     recipe_id = db.Column(db.Integer, db.ForeignKey('recipes.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -95,6 +173,9 @@ class Comment(db.Model):
 
 class Favorite(db.Model):
     __tablename__ = 'favorites'
+    __table_args__ = (
+        db.UniqueConstraint('recipe_id', 'user_id', name='uq_favorites_recipe_id_user_id'),  # One per user per recipe
+    )
     id = db.Column(db.Integer, primary_key=True)
     recipe_id = db.Column(db.Integer, db.ForeignKey('recipes.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -119,3 +200,27 @@ class RelatedVideo(db.Model):
 
     def __repr__(self):
         return f"<RelatedVideo {self.title}>"
+
+
+class RecipeIngredient(db.Model):
+    """Inverted ingredient index: one row per (normalized ingredient name, recipe) pair."""
+    __tablename__ = 'recipe_ingredients'
+    ingredient = db.Column(db.String(200), primary_key=True)  # Posting lists are looked up by ingredient
+    recipe_id = db.Column(db.Integer, db.ForeignKey('recipes.id'), primary_key=True, index=True)
+
+    recipe = db.relationship('Recipe', back_populates='ingredient_index')
+
+    def __repr__(self):
+        return f"<RecipeIngredient {self.ingredient} in Recipe {self.recipe_id}>"
+
+
+class RecipeTag(db.Model):
+    """Normalized recipe tags: one row per (tag, recipe) pair, mirroring the `Recipe.tags` column."""
+    __tablename__ = 'recipe_tags'
+    tag = db.Column(db.String(100), primary_key=True)  # Filtering and facet counts go by tag
+    recipe_id = db.Column(db.Integer, db.ForeignKey('recipes.id'), primary_key=True, index=True)
+
+    recipe = db.relationship('Recipe', back_populates='tag_index')
+
+    def __repr__(self):
+        return f"<RecipeTag {self.tag} on Recipe {self.recipe_id}>"
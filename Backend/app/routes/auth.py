@@ -1,6 +1,9 @@
 from flask import Blueprint, redirect, url_for, session, current_app, jsonify, request
 from app.models.user import User
 from app.utils.redis_utils import store_session_in_redis, redis_client
+from app.utils.current_user import forget_session, get_current_user
+from app.utils.session_tokens import issue_session_token, revoke_session_token
+from app.utils.http_client import google_userinfo
 from app import db
 import os
 import json
@@ -34,7 +37,8 @@ def authorize():
             print("Error: Failed to retrieve access token")
             return "Error: Failed to retrieve access token", 400
 
-        response = google_client.get('https://www.googleapis.com/oauth2/v3/userinfo', token=token)
+        # Pooled, timeout-bounded and behind a circuit breaker, unlike a fresh OAuth session per call
+        response = google_userinfo.get('/v3/userinfo', headers={'Authorization': f"Bearer {token['access_token']}"})
         print(f"Google API response status: {response.status_code}")
 
         if response.status_code != 200:
@@ -58,17 +62,23 @@ def authorize():
         else:
             print("User already exists in the database.")
 
-        # Create session data and store it in Redis
-        session_data = {
-            'id': user.id,
-            'name': user.name,
-            'email': user.email,
-            'picture': user.picture
-        }
-        session_id = f"user:{user.id}"  # Use user ID as part of the Redis key
-
-        redis_client.set(session_id, json.dumps(session_data), ex=3600)  # Expire in 1 hour
-        print(f"Session stored in Redis: {session_id} -> {session_data}")
+        max_age = current_app.config['AUTH_SESSION_MAX_AGE']
+        if current_app.config['AUTH_SESSION_MODE'] == 'signed':
+            # The cookie carries the signed session itself; nothing is stored in Redis
+            session_id = issue_session_token(user)
+        else:
+            # Create session data and store it in Redis
+            session_data = {
+                'id': user.id,
+                'name': user.name,
+                'email': user.email,
+                'picture': user.picture
+            }
+            session_id = f"user:{user.id}"  # Use user ID as part of the Redis key
+
+            redis_client.set(session_id, json.dumps(session_data), ex=max_age)
+            forget_session(session_id)
+            print(f"Session stored in Redis: {session_id} -> {session_data}")
 
         # Set session cookie
         #response = redirect('https://thaifood-xi.vercel.app/dashboard')
@@ -76,7 +86,7 @@ def authorize():
         response.set_cookie(
             'session_id',
             value=session_id,
-            max_age=3600,
+            max_age=max_age,
             httponly=True,
             secure=False,  # Secure should be True in production with HTTPS, on dev mode use False to test on HTTP protocal
             samesite='None'
@@ -95,9 +105,12 @@ def logout():
     try:
         # Extract session_id from cookies
         session_id = request.cookies.get('session_id')
-        if session_id:
+        if session_id and current_app.config['AUTH_SESSION_MODE'] == 'signed':
+            revoke_session_token(session_id)
+        elif session_id:
             # Delete session data from Redis
             redis_client.delete(session_id)
+            forget_session(session_id)
 
         # Clear session cookie
         response = jsonify({"message": "Logged out successfully."})
@@ -116,16 +129,13 @@ def check_session():
         if not session_id:
             return jsonify({'valid': False, 'error': 'Missing session ID'}), 401
 
-        # Fetch the session data from Redis
-        session_data = redis_client.get(session_id)
-        if not session_data:
+        # Verified locally for signed sessions, read from Redis (or this worker's cache) otherwise
+        user = get_current_user()
+        if user is None:
             return jsonify({'valid': False, 'error': 'Invalid or expired session'}), 401
 
-        # Decode session data (assuming it was stored as JSON)
-        session_data = json.loads(session_data.decode('utf-8'))
-
         # Return the session data
-        return jsonify({'valid': True, 'user': session_data}), 200
+        return jsonify({'valid': True, 'user': user._asdict()}), 200
     except Exception as e:
         print(f"Error during session check: {e}")
         return jsonify({'valid': False, 'error': 'Server error'}), 500
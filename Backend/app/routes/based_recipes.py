@@ -1,6 +1,8 @@
 import os
-import json
-from flask import Blueprint, jsonify, request
+from itertools import chain
+from flask import Blueprint, jsonify, current_app, request
+from app.utils.pagination import parse_limit
+from app.utils.recipe_catalog import RecipeCatalog
 
 # Create a Blueprint instance
 based_recipes = Blueprint('based_recipes', __name__)
@@ -9,48 +11,98 @@ based_recipes = Blueprint('based_recipes', __name__)
 # Correct the file path to point to the same directory as based_recipes.py
 JSON_FILE_PATH = os.path.join(os.path.dirname(__file__), 'thaifood_recipes.json')
 
+# Parsed once per worker and reloaded only when the file changes
+catalog = RecipeCatalog(JSON_FILE_PATH)
 
-# Utility function to load recipes
-def load_recipes():
-    try:
-        print(f"Resolved JSON file path: {JSON_FILE_PATH}")
-        with open(JSON_FILE_PATH, 'r', encoding='utf-8-sig') as file:  # Use utf-8-sig
-            data = json.load(file)
-        return data
-    except FileNotFoundError:
-        print("File not found. Ensure thaifood_recipes.json is in the same directory as based_recipes.py.")
-        return None
-    except json.JSONDecodeError as e:
-        print(f"JSON Decode Error: {e}")
-        return None
-    except Exception as e:
-        print(f"An error occurred: {e}")
-        raise e
+
+# Streamed responses are flushed in chunks of about this many characters
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _stream_recipes(recipes, fmt, dumps):
+    """Yield `recipes` as a JSON array or as NDJSON, in chunks of about STREAM_CHUNK_SIZE characters."""
+    if fmt == "ndjson":
+        parts = (dumps(recipe) + "\n" for recipe in recipes)
+    else:
+        items = (("," if index else "") + dumps(recipe) for index, recipe in enumerate(recipes))
+        parts = chain(["["], items, ["]"])
+
+    chunk, size = [], 0
+    for part in parts:
+        chunk.append(part)
+        size += len(part)
+        if size >= STREAM_CHUNK_SIZE:
+            yield "".join(chunk)
+            chunk, size = [], 0
+    if chunk:
+        yield "".join(chunk)
 
 
 @based_recipes.route('/recipes', methods=['GET'])
 def get_all_recipes():
-    """Get all recipes."""
-    print(f"Resolved JSON file path: {JSON_FILE_PATH}")
+    """
+    Get all recipes.
 
+    - `offset` / `limit`: return one page as {"recipes", "offset", "limit", "total", "next_offset"}
+    - `stream=json|ndjson`: stream the (optionally paged) recipes as a JSON array or one recipe per line
+    Without any of these the whole catalog is returned as a JSON array, as before.
+    """
     try:
-        data = load_recipes()
-        if data:
-            return jsonify(data['recipes']), 200
-        else:
+        snapshot = catalog.snapshot()
+        if not snapshot:
             return jsonify({"error": "Recipes file not found"}), 404
+
+        stream = request.args.get("stream")
+        if stream and stream not in ("json", "ndjson"):
+            return jsonify({"error": "stream must be json or ndjson"}), 400
+        paginated = "offset" in request.args or "limit" in request.args
+        if not stream and not paginated:
+            if snapshot.recipes_json is not None:
+                return current_app.response_class(snapshot.recipes_json, status=200, mimetype="application/json")
+            # A compiled catalog is never materialized whole; stream the same array instead
+            stream = "json"
+
+        total = len(snapshot.recipes)
+        try:
+            offset = int(request.args.get("offset", 0))
+            if offset < 0:
+                raise ValueError
+        except ValueError:
+            return jsonify({"error": "offset must be a non-negative integer"}), 400
+        if stream and "limit" not in request.args:
+            limit = total  # A stream covers the rest of the catalog unless it is paged too
+        else:
+            try:
+                limit = parse_limit(request.args.get("limit"))
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+        end = min(offset + limit, total)
+
+        if stream:
+            # Index rather than iterate, so a compiled catalog only decodes the records it sends
+            recipes = (snapshot.recipes[index] for index in range(offset, end))
+            mimetype = "application/x-ndjson" if stream == "ndjson" else "application/json"
+            return current_app.response_class(
+                _stream_recipes(recipes, stream, current_app.json.dumps), status=200, mimetype=mimetype
+            )
+
+        return jsonify({
+            "recipes": list(snapshot.recipes[offset:end]),
+            "offset": offset,
+            "limit": limit,
+            "total": total,
+            "next_offset": end if end < total else None,
+        }), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @based_recipes.route('/recipes/<recipe_name>', methods=['GET'])
 def get_recipe_by_name(recipe_name):
-    """Get a single recipe by name."""
+    """Get a single recipe by name; case and extra whitespace are ignored if there is no exact match."""
     try:
-        data = load_recipes()
-        if data:
-            recipes = data['recipes']
-            # Find the recipe by name
-            recipe = next((r for r in recipes if r['recipeName'] == recipe_name), None)
+        snapshot = catalog.snapshot()
+        if snapshot:
+            recipe = snapshot.find(recipe_name)
             if recipe:
                 return jsonify(recipe), 200
             else:
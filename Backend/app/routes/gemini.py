@@ -1,11 +1,23 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
 from app.utils.decorators import validate_session
-import requests
-import os
+from app.utils.current_user import get_current_user
+from app.utils.gemini import stream_gemini, cached_answer, cache_answer, GeminiError
+from app.utils.gemini_tasks import (
+    generation_prompt, run_generate, run_parse, run_check, run_check_edit, GENERATE_TEMPLATE,
+)
+from app.utils.job_queue import submit_job, get_job, job_metrics, QueueFullError, DONE_CHANNEL
+from app.utils.redis_utils import redis_client
 import json
+import time
 
 gemini_bp = Blueprint('gemini', __name__)
 
+
+def _wants_fresh_answer():
+    """A request sent with `Cache-Control: no-cache` asks Gemini again instead of reusing a cached answer."""
+    return "no-cache" in request.headers.get("Cache-Control", "")
+
+
 @gemini_bp.route('/generate', methods=['POST', 'OPTIONS'])
 @validate_session
 def generate_content():
@@ -18,67 +30,92 @@ def generate_content():
         return response, 200
 
     try:
-        data = request.get_json()
-        prompt = data.get("contents", [{}])[0].get("parts", [{}])[0].get("text", "")
-        if not prompt:
-            return jsonify({"error": "Prompt is required"}), 400
-
-        full_prompt = f"""
-{prompt}
-
-กรุณาตอบในรูปแบบโครงสร้างข้อมูลต่อไปนี้:
-
-**ชื่อเมนู:** <ใส่ชื่อเมนูอาหาร>
-
-**หมวดหมู่:** <ประเภทหมวดหมู่ เช่น ผัด, ต้ม, ทอด, นึ่ง>
-
-**แท็ก:** <ใส่แท็กที่เกี่ยวข้อง เช่น อาหารภาคใต้, เมนูเส้น, เมนูไก่, ฯลฯ>
-
-**ส่วนผสม:**
-<รายการส่วนผสมทีละบรรทัด เช่น>
-- กุ้งสด 150 กรัม
-- ใบกะเพรา 1 ถ้วย
-- น้ำมันพืช 2 ช้อนโต๊ะ
-
-**วิธีทำ:**
-<ขั้นตอนการทำทีละบรรทัด เช่น>
-1. ตั้งกระทะ ใส่น้ำมันพืชและตั้งไฟจนร้อน
-2. ใส่กระเทียมและพริกขี้หนูลงไปผัดจนหอม
-3. ใส่กุ้งลงไปผัดจนสุก
+        body, status = run_generate(request.get_json(), fresh=_wants_fresh_answer())
+        return jsonify(body), status
+    except Exception as e:
+        return jsonify({"error": f"An error occurred: {str(e)}"}), 500
 
-**ลักษณะภายนอก:** <บรรยายลักษณะภายนอกของอาหาร เช่น สี ขนาด และลักษณะเด่นอื่น ๆ เหมาะสำหรับคนกลุ่มไหน รวมถึง พยายามวิเคราะห์ความต้องการของผู้ใช้ หากมีการระบุรายละเอียด ให้จดจำรายละเอียดทั้งหมดและนำมาเขียนตรงนี้ เช่น เหมาะสำหรับคนรักสุขภาพ อาหารนี้เป็นเมนูย่อยง่าย รวมถึงเก็บข้อมูลโภชนาการทุกอย่างเช่น ปริมาณคร่าวๆ ของ คาร์โบไฮเดรต โปรตีน วิตามิน แครอรี่ รวมถึงวิเคราะห์โภชนาการเองว่าเหมาะกับคนกลุ่มไหน เช่น เหมาะสำหรับผู้ป่าวโรคต่างๆ หรือมีอาการ ระบบย่อยอาหารที่ สูตรอาหารนี้อาจจะส่งผลดีหรือผลเสียได้>
 
-**รสชาติ:** <บรรยายรสชาติของอาหาร เช่น เผ็ด, เค็ม, มัน, หวาน, เปรี้ยว>
+def _sse(data, event=None):
+    """Format one server-sent event carrying `data` as JSON."""
+    lines = [f"event: {event}"] if event else []
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
 
-**คำอธิบายเมนู:** <บรรยายข้อมูลทั่วไปเกี่ยวกับเมนู เช่น เหมาะกับใคร เป็นเมนูจากภาคไหน และข้อมูลอื่น ๆ>
 
-โปรดตอบเป็นภาษาไทยทั้งหมดในรูปแบบโครงสร้างข้างต้น
-"""
+@gemini_bp.route('/generate/stream', methods=['POST', 'OPTIONS'])
+@validate_session
+def stream_generate_content():
+    """
+    Streaming variant of /generate. Answers with server-sent events: one `{"text": ...}` event per chunk
+    as Gemini writes it, then a `done` event with the whole `{"response": ...}`, or an `error` event if
+    the stream breaks off or has no text. A recently generated answer to the same prompt is sent as a
+    single chunk.
+    """
+    if request.method == 'OPTIONS':
+        response = jsonify({"message": "CORS preflight passed"})
+        response.headers.add("Access-Control-Allow-Origin", "https://b2b3-2001-44c8-6614-6788-34b2-e6c4-29ad-8a81.ngrok-free.app")
+        response.headers.add("Access-Control-Allow-Headers", "Content-Type, Authorization")
+        response.headers.add("Access-Control-Allow-Methods", "POST, OPTIONS")
+        response.headers.add("Access-Control-Allow-Credentials", "true")
+        return response, 200
 
-        payload = {
-            "model": os.getenv('FINE_TUNED_MODEL_ID'),
-            "contents": [{"parts": [{"text": full_prompt}]}]
-        }
+    try:
+        data = request.get_json()
+        prompt = data.get("contents", [{}])[0].get("parts", [{}])[0].get("text", "")
+        if not prompt:
+            return jsonify({"error": "Prompt is required"}), 400
 
-        headers = {"Content-Type": "application/json"}
-        response = requests.post(
-            f"https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent?key={os.getenv('API_KEY')}",
-            headers=headers,
-            json=payload
+        full_prompt = generation_prompt(prompt)
+        cached = None if _wants_fresh_answer() else cached_answer(full_prompt, GENERATE_TEMPLATE)
+        chunks = None
+        if cached is not None:
+            first = cached
+        else:
+            chunks = stream_gemini(full_prompt)
+            try:
+                # Wait for the first chunk here, so a refused request still gets a plain JSON error
+                first = next(chunks, None)
+            except GeminiError:
+                return jsonify({"error": "Gemini API error"}), 500
+
+        def events():
+            parts = []
+            try:
+                if first is not None:
+                    parts.append(first)
+                    yield _sse({"text": first})
+                for text in chunks or ():
+                    parts.append(text)
+                    yield _sse({"text": text})
+            except Exception as e:
+                current_app.logger.error(f"Gemini stream interrupted: {e}")
+                yield _sse({"error": "Gemini stream interrupted"}, event="error")
+                return
+            finally:
+                # Also runs when the client disconnects mid-stream: closing the upstream stops the generation
+                if chunks is not None:
+                    chunks.close()
+            content = "".join(parts)
+            if not content:
+                # Nothing to show, and nothing worth caching for the next request with this prompt
+                current_app.logger.warning("Gemini stream ended without any text")
+                yield _sse({"error": "Gemini returned an empty answer"}, event="error")
+                return
+            if cached is None:
+                cache_answer(full_prompt, GENERATE_TEMPLATE, content)
+            yield _sse({"response": content}, event="done")
+
+        return Response(
+            stream_with_context(events()),
+            mimetype="text/event-stream",
+            # Flush every event through proxies instead of buffering the response
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
         )
-
-        if response.status_code != 200:
-            return jsonify({"error": "Gemini API error"}), 500
-
-        content = response.json().get("candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("text", "")
-        return jsonify({"response": content})
     except Exception as e:
         return jsonify({"error": f"An error occurred: {str(e)}"}), 500
 
 
-import re
-import json
-
 @gemini_bp.route('/parse', methods=['POST', 'OPTIONS'])
 def parse_content():
     """
@@ -93,77 +130,8 @@ def parse_content():
         return response, 200
 
     try:
-        data = request.get_json()
-        print("Received payload for /gemini/parse:", data)
-
-        raw_response = data.get("response", "")
-        if not raw_response:
-            return jsonify({"error": "Response text is required"}), 400
-
-        # Reprocess the raw response
-        reprocess_prompt = f"""
-        กรุณาวิเคราะห์ข้อมูลต่อไปนี้และตอบกลับในรูปแบบ JSON:
-        {{
-            "menuName": "<ชื่อเมนู>",
-            "ingredients": ["<ส่วนผสม>", ...],
-            "instructions": ["<วิธีทำ>", ...],
-            "category": "<หมวดหมู่>",
-            "tags": ["<แท็ก>", ...],
-            "characteristics": "<ลักษณะภายนอก>",
-            "flavors": "<รสชาติ>"
-            "danger_check":
-                "status": "safe" or "not safe",
-                "reason": "string" (ถ้าไม่ปลอดภัย ให้ระบุเหตุผล เช่น 'มีการใช้ไข่ดิบโดยไม่ปรุงสุก' หรือ 'แนะนำให้ทอดจนสีดำ'),
-                "fix": "string" (ถ้าไม่ปลอดภัย ให้แนะนำวิธีแก้ไข เช่น 'ปรุงไข่ให้สุกก่อนบริโภค' หรือ 'ทอดจนสุกสีเหลืองทองแทน')
-
-        }}
-
-        ให้พิจารณาส่วนประกอบ ที่อาจจะผิดกฎหมาย หรือมีสารเสพติด เช่น กัญชา ใบกะท่อม และวัตถุดิบอื่นๆ ให้ครอบคลุมมากที่สุดเท่าที่เป็นไปได้ และให้เป็น status **ไม่ปลอดภัย เนื่องจากมีความละเอียดอ่อนด้านการคุมปริมาณ
-        
-        ข้อมูล:
-        {raw_response}
-        """
-        payload = {
-            "model": os.getenv('FINE_TUNED_MODEL_ID'),
-            "contents": [{"parts": [{"text": reprocess_prompt}]}]
-        }
-
-        headers = {"Content-Type": "application/json"}
-        response = requests.post(
-            f"https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent?key={os.getenv('API_KEY')}",
-            headers=headers,
-            json=payload
-        )
-
-        if response.status_code != 200:
-            print("Gemini API error:", response.text)
-            return jsonify({"error": "Gemini API error"}), 500
-
-        structured_response = response.json().get("candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("text", "")
-        print("Reprocessed structured response:", structured_response)
-
-        # Extract the JSON from the response
-        try:
-            match = re.search(r'\{.*\}', structured_response, re.DOTALL)
-            if match:
-                json_string = match.group(0)
-                parsed_data = json.loads(json_string)
-
-                # Ensure 'AI generate' is included in the tags
-                if "tags" in parsed_data:
-                    if "AI generate" not in parsed_data["tags"]:
-                        parsed_data["tags"].append("AI generate")
-                else:
-                    parsed_data["tags"] = ["AI generate"]
-
-                return jsonify(parsed_data)
-            else:
-                print("No valid JSON found in response")
-                return jsonify({"error": "No valid JSON found in response"}), 500
-        except json.JSONDecodeError as e:
-            print(f"Error parsing JSON response: {e}")
-            print(f"Received response: {structured_response}")
-            return jsonify({"error": "Failed to parse JSON response"}), 500
+        body, status = run_parse(request.get_json(), fresh=_wants_fresh_answer())
+        return jsonify(body), status
     except Exception as e:
         print(f"Error in /gemini/parse: {e}")
         return jsonify({"error": f"An error occurred: {str(e)}"}), 500
@@ -180,94 +148,8 @@ def check_recipe():
         return response, 200
 
     try:
-        # Get the recipe data from the request
-        recipe_data = request.get_json()
-        
-        # Extract individual fields from recipe_data
-        menu_name = recipe_data.get("name", "")
-        ingredients = recipe_data.get("ingredients", [])
-        instructions = recipe_data.get("instructions", [])
-        category = recipe_data.get("category", "")
-        tags = recipe_data.get("tags", [])
-        cover_image = recipe_data.get("cover_image", "")  # Not used in prompt, but extracted
-        characteristics = recipe_data.get("characteristics", [])
-        flavors = recipe_data.get("flavors", [])
-        videos = recipe_data.get("videos", [])
-
-        if not menu_name or not ingredients or not instructions:
-            return jsonify({"error": "All fields (name, ingredients, instructions) are required"}), 400
-
-        # Prepare the lists for ingredients, instructions, and other fields
-        ingredients_lines = [f"- {ingredient}" for ingredient in ingredients]
-        instructions_lines = [f"{idx+1}. {instruction}" for idx, instruction in enumerate(instructions)]
-        videos_lines = [video['url'] for video in videos] if videos else []
-        tags_lines = tags if tags else []
-        characteristics_lines = characteristics if characteristics else []
-        flavors_lines = flavors if flavors else []
-
-        # Construct the prompt as a list of lines to avoid backslashes
-        prompt_lines = [
-            "ตรวจสอบสูตรอาหารนี้ให้ดี โดยต้องแน่ใจว่าการทำอาหารในสูตรนี้ปลอดภัย และไม่มีคำแนะนำที่ผิดหรืออันตราย เช่น \"ทอดจนสีดำ\" หรือ \"กินดิบ\" หรือคำแนะนำที่ไม่เหมาะสม เช่น \"ใส่ระเบิด\" หรือคำที่ไม่เกี่ยวข้องกับการทำอาหาร",
-            f"ชื่อเมนู: {menu_name}",
-            "ส่วนผสม:",
-            *ingredients_lines,
-            "วิธีทำ:",
-            *instructions_lines,
-            f"หมวดหมู่: {category}",
-            f"แท็ก: {', '.join(tags_lines) if tags_lines else '-'}",
-            f"ลักษณะ: {', '.join(characteristics_lines) if characteristics_lines else '-'}",
-            f"รสชาติ: {', '.join(flavors_lines) if flavors_lines else '-'}",
-            f"วิดีโอ: {', '.join(videos_lines) if videos_lines else '-'}",
-            "",
-            "กรุณาตอบกลับโดยแจ้งเตือนหากพบการทำอาหารที่ผิดพลาดหรือมีอันตราย พร้อมคำแนะนำในการปรับปรุงสูตรนี้",
-            "",
-            "ตอบกลับโดยใช้ format นี้",
-            "",
-            "สูตรอาหาร: ปลอดภัย หรือ อันตราย",
-            "Not safe: (ถ้าไม่มีให้ตอบกลับ \"-\")",
-            "reason: (ให้ตอบกลับถ้าอาหารไม่ปลอดถัย โดยให้เหตุผลว่าทำไมสูตรนี้ถึงไม่ปลอดภัย เช่น การใช้คำแนะนำที่ไม่เหมาะสมหรือมีความเสี่ยง)"
-        ]
-
-        # Join the lines with os.linesep (no backslashes)
-        prompt = os.linesep.join(prompt_lines)
-
-        # Prepare the payload for the Gemini API
-        payload = {
-            "model": os.getenv('FINE_TUNED_MODEL_ID'),
-            "contents": [{"parts": [{"text": prompt}]}]
-        }
-
-        headers = {"Content-Type": "application/json"}
-        response = requests.post(
-            f"https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent?key={os.getenv('API_KEY')}",
-            headers=headers,
-            json=payload
-        )
-
-        if response.status_code != 200:
-            return jsonify({"error": "Gemini API error", "details": response.text}), 500
-
-        # Extract AI's response
-        ai_response = response.json().get("candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("text", "")
-
-        # Check if the AI response contains any unsafe keywords
-        unsafe_keywords = ["อันตราย", "ยาพิษ", "ไม่ควร", "ห้าม", "อันตรายถึงชีวิต"]
-        is_safe = not any(keyword in ai_response for keyword in unsafe_keywords)
-
-        # Extract reason if unsafe
-        reason = ""
-        if not is_safe:
-            # If the AI response contains a reason, we return it
-            reason = ai_response.strip() if ai_response else "No specific reason provided."
-
-        # Return a simplified response with status, suggestions, and reason if unsafe
-        return jsonify({
-            "status": "Safe" if is_safe else "Not safe",
-            "suggestions": "Please revise the recipe as it contains unsafe instructions." if not is_safe else "Recipe seems safe!",
-            "reason": reason,  # Include reason if unsafe
-            "ai_response": ai_response
-        })
-
+        body, status = run_check(request.get_json(), fresh=_wants_fresh_answer())
+        return jsonify(body), status
     except Exception as e:
         return jsonify({"error": f"An error occurred: {str(e)}"}), 500
 
@@ -283,80 +165,116 @@ def check_and_edit_recipe():
         return response, 200
 
     try:
-        # Get the recipe data from the request
-        recipe_data = request.get_json()
-
-        # Extract fields from recipe_data
-        recipe_id = recipe_data.get("id", "")
-        ingredients = recipe_data.get("ingredients", [])
-        instructions = recipe_data.get("instructions", [])
-        tags = recipe_data.get("tags", [])
-
-        if not recipe_id or not ingredients or not instructions:
-            return jsonify({"error": "ID, ingredients, and instructions are required"}), 400
-
-        # Prepare the lists for ingredients and instructions
-        ingredients_lines = [f"- {ingredient}" for ingredient in ingredients]
-        instructions_lines = [f"{idx+1}. {instruction}" for idx, instruction in enumerate(instructions)]
-        tags_lines = tags if tags else []
-
-        # Construct the prompt as a list of lines to avoid backslashes
-        prompt_lines = [
-            "ตรวจสอบสูตรอาหารนี้ให้ดี โดยต้องแน่ใจว่าการทำอาหารในสูตรนี้ปลอดภัย และไม่มีคำแนะนำที่ผิดหรืออันตราย เช่น \"ทอดจนสีดำ\" หรือ \"กินดิบ\" หรือคำแนะนำที่ไม่เหมาะสม เช่น \"ใส่ระเบิด\" หรือคำที่ไม่เกี่ยวข้องกับการทำอาหาร",
-            f"ID: {recipe_id}",
-            "ส่วนผสม:",
-            *ingredients_lines,
-            "วิธีทำ:",
-            *instructions_lines,
-            "",
-            "กรุณาตอบกลับโดยแจ้งเตือนหากพบการทำอาหารที่ผิดพลาดหรือมีอันตราย พร้อมคำแนะนำในการปรับปรุงสูตรนี้",
-            "",
-            "ตอบกลับโดยใช้ format นี้",
-            "",
-            "สูตรอาหาร: ปลอดภัย หรือ อันตราย",
-            "Not safe: (ถ้าไม่มีให้ตอบกลับ \"-\")",
-            "reason: (ให้ตอบกลับถ้าอาหารไม่ปลอดถัย โดยให้เหตุผลว่าทำไมสูตรนี้ถึงไม่ปลอดภัย เช่น การใช้คำแนะนำที่ไม่เหมาะสมหรือมีความเสี่ยง)"
-        ]
-
-        # Join the lines with os.linesep (no backslashes)
-        prompt = os.linesep.join(prompt_lines)
-
-        # Prepare the payload for the Gemini API
-        payload = {
-            "model": os.getenv('FINE_TUNED_MODEL_ID'),
-            "contents": [{"parts": [{"text": prompt}]}]
-        }
-
-        headers = {"Content-Type": "application/json"}
-        response = requests.post(
-            f"https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent?key={os.getenv('API_KEY')}",
-            headers=headers,
-            json=payload
-        )
+        body, status = run_check_edit(request.get_json(), fresh=_wants_fresh_answer())
+        return jsonify(body), status
+    except Exception as e:
+        return jsonify({"error": f"An error occurred: {str(e)}"}), 500
+
 
-        if response.status_code != 200:
-            return jsonify({"error": "Gemini API error", "details": response.text}), 500
+# Asynchronous variants of the routes above. A job is submitted with `{"kind": "generate" | "parse" |
+# "check" | "check-edit", "data": <the body the synchronous route takes>}` and run by the workers of
+# `flask recipes gemini-worker`; the web worker answers at once and never waits on Gemini.
+JOB_EVENTS_TIMEOUT = 120
+JOB_EVENTS_KEEPALIVE = 15
 
-        # Extract AI's response
-        ai_response = response.json().get("candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("text", "")
 
-        # Check if the AI response contains any unsafe keywords
-        unsafe_keywords = ["อันตราย", "ยาพิษ", "ไม่ควร", "ห้าม", "อันตรายถึงชีวิต"]
-        is_safe = not any(keyword in ai_response for keyword in unsafe_keywords)
+def _owned_job(job_id):
+    """The job `job_id` if the current user submitted it, else None."""
+    job = get_job(job_id)
+    if job is None or job["user_id"] != get_current_user().id:
+        return None
+    return job
 
-        reason = ""
-        if not is_safe:
-            # If the AI response contains a reason, we return it
-            reason = ai_response.strip() if ai_response else "No specific reason provided."
 
-        # Return a simplified response with status and suggestion
-        return jsonify({
-            "status": "Safe" if is_safe else "Not safe",
-            "suggestions": "Please revise the recipe as it contains unsafe instructions." if not is_safe else "Recipe seems safe!",
-            "ai_response": ai_response,
-            "recipe_id": recipe_id,
-            "reason": reason,  # Include reason if unsafe
-        })
+@gemini_bp.route('/jobs', methods=['POST'])
+@validate_session
+def submit_gemini_job():
+    """Queue a Gemini job. Answers 202 with its id; the result is collected from /jobs/<job_id>."""
+    try:
+        body = request.get_json(silent=True)
+        if not isinstance(body, dict):
+            return jsonify({"error": "Expected a JSON object body"}), 400
+        data = body.get("data") or {}
+        if not isinstance(data, dict):
+            return jsonify({"error": "`data` must be a JSON object"}), 400
+        job_id = submit_job(body.get("kind"), data, get_current_user().id, fresh=_wants_fresh_answer())
+        return jsonify({"job_id": job_id, "status": "queued"}), 202
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except QueueFullError:
+        return jsonify({"error": "Too many pending jobs, retry later"}), 503
+    except Exception as e:
+        current_app.logger.error(f"Error in /gemini/jobs: {e}")
+        return jsonify({"error": f"An error occurred: {str(e)}"}), 500
+
 
+@gemini_bp.route('/jobs/metrics', methods=['GET'])
+@validate_session
+def gemini_job_metrics():
+    """Queue depth, running jobs and wait/run times of the Gemini job queue."""
+    try:
+        return jsonify(job_metrics()), 200
     except Exception as e:
-        return jsonify({"error": f"An error occurred: {str(e)}"}), 500
\ No newline at end of file
+        return jsonify({"error": f"An error occurred: {str(e)}"}), 500
+
+
+@gemini_bp.route('/jobs/<job_id>', methods=['GET'])
+@validate_session
+def get_gemini_job(job_id):
+    """
+    Poll a job. `status` is queued, running, done or failed; a done job carries the `result` and
+    `status_code` the synchronous route would have answered with.
+    """
+    try:
+        job = _owned_job(job_id)
+        if job is None:
+            return jsonify({"error": "Job not found"}), 404
+        return jsonify(job), 200
+    except Exception as e:
+        return jsonify({"error": f"An error occurred: {str(e)}"}), 500
+
+
+@gemini_bp.route('/jobs/<job_id>/events', methods=['GET'])
+@validate_session
+def gemini_job_events(job_id):
+    """
+    Wait for a job without polling: server-sent events ending with a `done` event carrying the job as
+    /jobs/<job_id> returns it, or a `timeout` event after JOB_EVENTS_TIMEOUT seconds.
+    """
+    try:
+        if _owned_job(job_id) is None:
+            return jsonify({"error": "Job not found"}), 404
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(DONE_CHANNEL.format(job_id=job_id))
+
+        def events():
+            try:
+                last_sent = time.monotonic()
+                deadline = last_sent + JOB_EVENTS_TIMEOUT
+                # Checked after subscribing, so a job finishing in between is not missed
+                job = get_job(job_id)
+                while job is not None and job["status"] not in ("done", "failed"):
+                    now = time.monotonic()
+                    if now >= deadline:
+                        yield _sse({"job_id": job_id}, event="timeout")
+                        return
+                    if now - last_sent >= JOB_EVENTS_KEEPALIVE:
+                        yield ": keepalive\n\n"  # Keeps proxies from closing an idle connection
+                        last_sent = now
+                    # None on a timeout or the subscription confirmation
+                    if pubsub.get_message(timeout=min(deadline - now, 1.0)) is not None:
+                        job = get_job(job_id)
+                if job is None:
+                    yield _sse({"error": "Job expired"}, event="error")
+                else:
+                    yield _sse(job, event="done")
+            finally:
+                pubsub.close()
+
+        return Response(
+            events(),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+    except Exception as e:
+        return jsonify({"error": f"An error occurred: {str(e)}"}), 500
@@ -1,10 +1,17 @@
 from flask import Blueprint, request, jsonify, current_app
 from datetime import datetime
 import traceback
-import json
-from app.models.models import Recipe, Like, Rating, Comment, Favorite, db, RelatedVideo
+from app.models.models import Recipe, Like, Rating, Comment, Favorite, db, RelatedVideo, RecipeIngredient, RecipeTag, to_lines
 from app.models.user import User  # Adjust the path if needed
-import random
+from app.utils.pagination import encode_cursor, decode_cursor, parse_limit
+from app.utils.recipe_loader import load_recipe_summaries
+from app.utils.ingredients import index_recipe_ingredients
+from app.utils.tags import split_tags, index_recipe_tags
+from app.utils.recipe_cache import get_recipe_detail, invalidate_recipe_details
+from app.utils.engagement import toggle_recipe_engagement, upsert_recipe_rating
+from app.utils.like_buffer import toggle_buffered_like, buffered_like_state, buffered_like_count
+from app.utils.current_user import get_current_user
+import heapq
 
 recipe_bp = Blueprint("recipe_bp", __name__)
 
@@ -15,21 +22,10 @@ def submit_recipe():
         current_app.logger.info("Incoming request to /submit")
         current_app.logger.info(f"Request JSON: {request.json}")
 
-        # Fetch user data from the session
-        session_id = request.cookies.get("session_id")
-        if not session_id:
-            current_app.logger.error("Missing session_id cookie")
-            return jsonify({"error": "Invalid or missing session_id cookie"}), 401
-
-        session_data = json.loads(current_app.extensions["redis_client"].get(session_id))
-        user_email = session_data.get("email")
-        if not user_email:
-            return jsonify({"error": "User not authenticated"}), 401
-
-        # Find user in the database
-        user = User.query.filter_by(email=user_email).first()
-        if not user:
-            return jsonify({"error": "User not found"}), 404
+        # The session user, resolved without touching the database
+        user = get_current_user()
+        if user is None:
+            return jsonify({"error": "Invalid or missing session"}), 401
 
         # Get recipe details from the request
         data = request.json
@@ -38,9 +34,9 @@ def submit_recipe():
         if missing_fields:
             return jsonify({"error": "Missing required fields", "fields": missing_fields}), 400
 
-        # Convert ingredients and instructions to plain text
-        ingredients = "\n".join(data["ingredients"]) if isinstance(data["ingredients"], list) else data["ingredients"]
-        instructions = "\n".join(data["instructions"]) if isinstance(data["instructions"], list) else data["instructions"]
+        # Store ingredients and instructions as lists of lines
+        ingredients = to_lines(data["ingredients"])
+        instructions = to_lines(data["instructions"])
 
         # Sanitize and handle category, tags, characteristics, and flavors
         category = data.get("category", "").strip()  # Use default empty string if not provided
@@ -56,8 +52,8 @@ def submit_recipe():
         recipe = Recipe(
             name=data["name"],
             cover_image=data.get("cover_image", ""),
-            ingredients=ingredients,  # Store as plain text
-            instructions=instructions,  # Store as plain text
+            ingredients=ingredients,  # Stored as a JSONB array
+            instructions=instructions,  # Stored as a JSONB array
             category=category,  # Store the category
             tags=tags,  # Store the tags as a string
             characteristics=characteristics,  # Store characteristics
@@ -67,6 +63,8 @@ def submit_recipe():
         )
         db.session.add(recipe)
         db.session.flush()  # Flush to get the recipe ID
+        index_recipe_ingredients(recipe)
+        index_recipe_tags(recipe)
 
         # Add related videos
         for video in data["videos"]:
@@ -90,58 +88,71 @@ def submit_recipe():
 
 
 
-@recipe_bp.route("/<recipe_id>/like", methods=["POST"])
+@recipe_bp.route("/<int:recipe_id>/like", methods=["POST"])
 def toggle_like_recipe(recipe_id):
+    """
+    Like or unlike a recipe. With LIKES_WRITE_BEHIND the toggle is recorded in Redis and written
+    to Postgres by `flask recipes flush-likes`; see app/utils/like_buffer.py.
+    """
     try:
         current_app.logger.info(f"Incoming request to /{recipe_id}/like")
 
-        session_id = request.cookies.get("session_id")
-        if not session_id:
-            return jsonify({"error": "Invalid or missing session_id cookie"}), 401
-
-        session_data = json.loads(current_app.extensions["redis_client"].get(session_id))
-        user_email = session_data.get("email")
-        if not user_email:
-            return jsonify({"error": "User not authenticated"}), 401
-
-        # Fetch the user from the database using the email
-        user = User.query.filter_by(email=user_email).first()
-        if not user:
-            return jsonify({"error": "User not found"}), 404
-
-        # Check if the recipe exists
-        recipe = Recipe.query.get(recipe_id)
-        if not recipe:
-            return jsonify({"error": "Recipe not found"}), 404
+        # The session user, resolved without touching the database
+        user = get_current_user()
+        if user is None:
+            return jsonify({"error": "Invalid or missing session"}), 401
+
+        if current_app.config["LIKES_WRITE_BEHIND"]:
+            result = toggle_buffered_like(recipe_id, user.id)
+            if result is None:
+                return jsonify({"error": "Recipe not found"}), 404
+            liked, likes_count = result
+            # Cached details are rebuilt with the buffered count, which is ahead of Postgres until the flush
+            invalidate_recipe_details(recipe_id)
+        else:
+            # Like or unlike and get the new like count back in one statement
+            result = toggle_recipe_engagement(Like, Recipe.likes_count, recipe_id, user.id)
+            if result is None:
+                return jsonify({"error": "Recipe not found"}), 404
+            liked, likes_count = result
+            db.session.commit()
+            invalidate_recipe_details(recipe_id)
 
-        # Check if the user already liked the recipe
-        existing_like = Like.query.filter_by(recipe_id=recipe_id, user_id=user.id).first()
+        if liked:
+            return jsonify({"message": "Recipe liked successfully", "likes": likes_count}), 200
+        return jsonify({"message": "Recipe unliked successfully", "likes": likes_count}), 200
+    except Exception as e:
+        current_app.logger.error(f"Error in /{recipe_id}/like: {e}")
+        current_app.logger.error(traceback.format_exc())
+        return jsonify({"error": "Internal server error"}), 500
 
-        if existing_like:
-            # If the like exists, remove it (unlike)
-            db.session.delete(existing_like)
-            db.session.commit()
 
-            # Query the updated like count
-            likes_count = Like.query.filter_by(recipe_id=recipe_id).count()
+@recipe_bp.route("/<int:recipe_id>/like", methods=["GET"])
+def get_like_state(recipe_id):
+    """
+    Tell whether the current user likes a recipe, along with its like count.
+    """
+    try:
+        # The session user, resolved without touching the database
+        user = get_current_user()
+        if user is None:
+            return jsonify({"error": "Invalid or missing session"}), 401
 
-            return jsonify({"message": "Recipe unliked successfully", "likes": likes_count}), 200
+        if current_app.config["LIKES_WRITE_BEHIND"]:
+            state = buffered_like_state(recipe_id, user.id)
         else:
-            # If the like does not exist, add it
-            like = Like(
-                recipe_id=recipe_id,
-                user_id=user.id,  # Use the user's numeric ID
-                created_at=datetime.utcnow(),
-            )
-            db.session.add(like)
-            db.session.commit()
-
-            # Query the updated like count
-            likes_count = Like.query.filter_by(recipe_id=recipe_id).count()
+            row = db.session.query(
+                Recipe.likes_count,
+                db.exists().where(Like.recipe_id == Recipe.id, Like.user_id == user.id),
+            ).filter(Recipe.id == recipe_id).first()
+            state = (row[1], row[0]) if row else None
+        if state is None:
+            return jsonify({"error": "Recipe not found"}), 404
 
-            return jsonify({"message": "Recipe liked successfully", "likes": likes_count}), 200
+        liked, likes_count = state
+        return jsonify({"liked_by_user": liked, "likes": likes_count}), 200
     except Exception as e:
-        current_app.logger.error(f"Error in /{recipe_id}/like: {e}")
+        current_app.logger.error(f"Error in /{recipe_id}/like (GET): {e}")
         current_app.logger.error(traceback.format_exc())
         return jsonify({"error": "Internal server error"}), 500
 
@@ -154,19 +165,10 @@ def comment_recipe(recipe_id):
         current_app.logger.info(f"Incoming request to /{recipe_id}/comment")
         data = request.json
 
-        session_id = request.cookies.get("session_id")
-        if not session_id:
-            return jsonify({"error": "Invalid or missing session_id cookie"}), 401
-
-        session_data = json.loads(current_app.extensions["redis_client"].get(session_id))
-        user_email = session_data.get("email")
-        if not user_email:
-            return jsonify({"error": "User not authenticated"}), 401
-
-        # Fetch the user from the database using the email
-        user = User.query.filter_by(email=user_email).first()
-        if not user:
-            return jsonify({"error": "User not found"}), 404
+        # The session user, resolved without touching the database
+        user = get_current_user()
+        if user is None:
+            return jsonify({"error": "Invalid or missing session"}), 401
 
         comment_text = data.get("comment")
         if not comment_text:
@@ -185,7 +187,9 @@ def comment_recipe(recipe_id):
             created_at=datetime.utcnow(),
         )
         db.session.add(comment)
+        Recipe.increment_counters(recipe.id, comments_count=1)
         db.session.commit()
+        invalidate_recipe_details(recipe.id)
 
         return jsonify({"message": "Comment added successfully"}), 201
     except Exception as e:
@@ -195,134 +199,314 @@ def comment_recipe(recipe_id):
 
 
 
+# Fields that can be requested from GET /recipes via `?fields=`
+RECIPE_LIST_FIELDS = (
+    "id", "name", "cover_image", "ingredients", "instructions", "category",
+    "tags", "created_by", "created_at", "creator_name",
+)
+
+# Sort orders supported by GET /recipes via `?sort=`
+RECIPE_LIST_SORTS = ("newest", "most_liked", "top_rated")
+
+
+def _recipe_sort_column(sort):
+    """
+    Return the column GET /recipes orders by for `sort`. Each one is backed by an index on (column, id).
+    """
+    if sort == "most_liked":
+        return Recipe.likes_count
+    if sort == "top_rated":
+        return Recipe.average_rating
+    return Recipe.created_at
+
+
+def _recipe_sort_value(value, sort):
+    """Convert a cursor sort value back into something comparable with the sort column."""
+    if sort == "newest":
+        return datetime.fromisoformat(value)
+    return float(value)
+
+
 @recipe_bp.route("/recipes", methods=["GET"])
 def get_recipes():
     """
-    Fetch all recipes or filter by tag and/or category.
+    Fetch recipes, optionally filtered by tag and/or category.
+
+    Passing any of `limit`, `cursor`, `sort` or `fields` switches to a paginated response:
+    - `limit`: page size (default 20, max 100)
+    - `cursor`: the `next_cursor` returned by the previous page
+    - `sort`: newest (default), most_liked or top_rated
+    - `fields`: comma-separated subset of RECIPE_LIST_FIELDS to return
     """
     try:
-        def decode_or_split(data):
-            if not data:  # If data is None or empty
-                return []  # Return an empty list for None or empty values
-            try:
-                # Attempt to decode as JSON
-                return json.loads(data)
-            except json.JSONDecodeError:
-                # If not JSON, treat it as plain text and split by commas
-                return [tag.strip() for tag in data.split(",") if tag.strip()]
-
         # Get optional query parameters
         tag = request.args.get("tag")
         category = request.args.get("category")
+        paginated = any(arg in request.args for arg in ("limit", "cursor", "sort", "fields"))
+
+        sort = request.args.get("sort", "newest")
+        if sort not in RECIPE_LIST_SORTS:
+            return jsonify({"error": "Invalid sort", "allowed": list(RECIPE_LIST_SORTS)}), 400
+
+        fields = RECIPE_LIST_FIELDS
+        if request.args.get("fields"):
+            fields = tuple(field.strip() for field in request.args["fields"].split(",") if field.strip())
+            unknown_fields = [field for field in fields if field not in RECIPE_LIST_FIELDS]
+            if unknown_fields:
+                return jsonify({"error": "Unknown fields", "fields": unknown_fields}), 400
+
+        try:
+            limit = parse_limit(request.args.get("limit"))
+            cursor = decode_cursor(request.args["cursor"]) if request.args.get("cursor") else None
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
         # Build query based on filters
         query = Recipe.query
         if category:
             query = query.filter(Recipe.category.ilike(f"%{category}%"))  # Case-insensitive match
         if tag:
-            query = query.filter(Recipe.tags.contains(tag))  # Assuming `tags` is a JSON or text column
+            # Exact tag match through the indexed recipe_tags table
+            query = query.filter(Recipe.id.in_(db.select(RecipeTag.recipe_id).where(RecipeTag.tag == tag)))
+
+        # Only load the columns the requested fields need, and the creator in the same query
+        columns = {Recipe.id, Recipe.created_at}
+        for field in fields:
+            columns.add(getattr(Recipe, "created_by" if field == "creator_name" else field))
+        query = query.options(db.load_only(*columns))
+        if "creator_name" in fields:
+            query = query.options(db.joinedload(Recipe.user).load_only(User.name))
+
+        serializers = {
+            "id": lambda recipe: recipe.id,
+            "name": lambda recipe: recipe.name,
+            "cover_image": lambda recipe: recipe.cover_image,
+            "ingredients": lambda recipe: recipe.ingredients,
+            "instructions": lambda recipe: recipe.instructions,
+            "category": lambda recipe: recipe.category or "Uncategorized",  # Default to 'Uncategorized' if None
+            "tags": lambda recipe: split_tags(recipe.tags) or ["No Tags"],  # Default to ['No Tags'] if None
+            "created_by": lambda recipe: recipe.created_by,
+            "created_at": lambda recipe: recipe.created_at,
+            "creator_name": lambda recipe: recipe.user.name if recipe.user else "Anonymous",  # Fetch creator's name
+        }
 
-        # Fetch filtered recipes
-        recipes = query.all()
+        if not paginated:
+            # Legacy response: every matching recipe plus the tag and category sets
+            recipes = query.all()
+            response = [{field: serializers[field](recipe) for field in fields} for recipe in recipes]
+            return jsonify({
+                "recipes": response,
+                "tags": list(set(tag for recipe in recipes for tag in split_tags(recipe.tags))),
+                "categories": list(set(recipe.category or "Uncategorized" for recipe in recipes)),
+            }), 200
+
+        # Keyset pagination on (sort value, id), newest/highest first
+        sort_column = _recipe_sort_column(sort)
+        query = query.add_columns(sort_column.label("sort_value"))
+        if cursor:
+            try:
+                cursor_value, cursor_id = _recipe_sort_value(cursor[0], sort), int(cursor[1])
+            except (IndexError, TypeError, ValueError):
+                return jsonify({"error": "Invalid cursor"}), 400
+            query = query.filter(db.tuple_(sort_column, Recipe.id) < db.tuple_(cursor_value, cursor_id))
+
+        rows = query.order_by(sort_column.desc(), Recipe.id.desc()).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        next_cursor = None
+        if has_more:
+            last_recipe, last_value = rows[-1]
+            if sort == "newest":
+                last_value = last_value.isoformat()
+            next_cursor = encode_cursor(last_value, last_recipe.id)
+
+        return jsonify({
+            "recipes": [{field: serializers[field](recipe) for field in fields} for recipe, _ in rows],
+            "next_cursor": next_cursor,
+            "has_more": has_more,
+        }), 200
+    except Exception as e:
+        current_app.logger.error(f"Error in /recipes: {e}")
+        current_app.logger.error(traceback.format_exc())
+        return jsonify({"error": "Internal server error"}), 500
 
-        response = [
-            {
-                "id": recipe.id,
-                "name": recipe.name,
-                "cover_image": recipe.cover_image,
-                "ingredients": decode_or_split(recipe.ingredients),  # Decode or split
-                "instructions": decode_or_split(recipe.instructions),  # Decode or split
-                "category": recipe.category or "Uncategorized",  # Default to 'Uncategorized' if None
-                "tags": decode_or_split(recipe.tags) or ["No Tags"],  # Default to ['No Tags'] if None
-                "created_by": recipe.created_by,
-                "created_at": recipe.created_at,
-                "creator_name": recipe.user.name if recipe.user else "Anonymous",  # Fetch creator's name
-            }
-            for recipe in recipes
-        ]
 
-        return jsonify({"recipes": response, "tags": list(set(tag for recipe in recipes for tag in decode_or_split(recipe.tags))), "categories": list(set(recipe.category or "Uncategorized" for recipe in recipes))}), 200
+@recipe_bp.route("/recipes/facets", methods=["GET"])
+def get_recipe_facets():
+    """
+    Count recipes per tag and per category for the browse page filters, most used first.
+    """
+    try:
+        tag_counts = db.select(
+            db.literal("tag").label("facet"),
+            RecipeTag.tag.label("value"),
+            db.func.count().label("count"),
+        ).group_by(RecipeTag.tag)
+
+        category = db.func.coalesce(db.func.nullif(Recipe.category, ""), "Uncategorized")
+        category_counts = db.select(
+            db.literal("category").label("facet"),
+            category.label("value"),
+            db.func.count().label("count"),
+        ).group_by(category)
+
+        # Both facets in a single round trip
+        facets = {"tags": [], "categories": []}
+        rows = db.session.execute(db.union_all(tag_counts, category_counts).order_by(db.text("count DESC, value")))
+        for row in rows:
+            facets["tags" if row.facet == "tag" else "categories"].append({"name": row.value, "count": row.count})
+
+        return jsonify(facets), 200
     except Exception as e:
-        current_app.logger.error(f"Error in /recipes: {e}")
+        current_app.logger.error(f"Error in /recipes/facets: {e}")
         current_app.logger.error(traceback.format_exc())
         return jsonify({"error": "Internal server error"}), 500
 
 
+# Sub-resources of GET /recipes/<id> that can be requested via `?include=`
+RECIPE_DETAIL_INCLUDES = ("videos", "comments", "rating")
+
+
 @recipe_bp.route("/recipes/<int:recipe_id>", methods=["GET"])
 def get_recipe_by_id(recipe_id):
     """
     Fetch a specific recipe by its ID along with related videos, likes, comments, ratings, tags, and category.
+
+    `include` is a comma-separated subset of RECIPE_DETAIL_INCLUDES; only those sub-resources are returned
+    (e.g. `?include=rating`, or `?include=` for none). Without it every sub-resource is included.
+    Responses are served from the Redis recipe cache; see app/utils/recipe_cache.py.
     """
     try:
-        def decode_or_split(data):
-            try:
-                # Attempt to decode as JSON
-                return json.loads(data)
-            except json.JSONDecodeError:
-                # If not JSON, treat it as plain text and split by newline
-                return data.split("\n")
-
-        # Fetch the recipe from the database
-        recipe = Recipe.query.get(recipe_id)
-        if not recipe:
+        includes = RECIPE_DETAIL_INCLUDES
+        if "include" in request.args:
+            requested = {name.strip() for name in request.args["include"].split(",") if name.strip()}
+            unknown = sorted(requested - set(RECIPE_DETAIL_INCLUDES))
+            if unknown:
+                return jsonify({"error": "Unknown include", "include": unknown, "allowed": list(RECIPE_DETAIL_INCLUDES)}), 400
+            includes = tuple(name for name in RECIPE_DETAIL_INCLUDES if name in requested)
+
+        body = get_recipe_detail(
+            recipe_id,
+            lambda: _build_recipe_detail(recipe_id, includes),
+            variant="include=" + ",".join(includes),
+        )
+        if body is None:
             return jsonify({"error": "Recipe not found"}), 404
 
-        # Fetch related videos
-        related_videos = [
+        return current_app.response_class(body, status=200, mimetype="application/json")
+    except Exception as e:
+        current_app.logger.error(f"Error in /recipes/{recipe_id}: {e}")
+        current_app.logger.error(traceback.format_exc())
+        return jsonify({"error": "Internal server error"}), 500
+
+
+def _serialize_comment(comment):
+    return {
+        "id": comment.id,
+        "user": {
+            "name": comment.user.name,
+            "profile_picture": comment.user.picture,  # Updated to use `picture`
+        },
+        "content": comment.content,
+        "created_at": comment.created_at,
+    }
+
+
+def _build_recipe_detail(recipe_id, includes=RECIPE_DETAIL_INCLUDES):
+    """
+    Serialize the detail of a recipe with the sub-resources in `includes` to JSON,
+    or return None if it does not exist.
+    """
+    # Fetch the recipe and its creator's name in one query
+    recipe = Recipe.query.options(db.joinedload(Recipe.user).load_only(User.name)).filter_by(id=recipe_id).first()
+    if not recipe:
+        return None
+
+    # Prepare the response
+    response = {
+        "id": recipe.id,
+        "name": recipe.name,
+        "cover_image": recipe.cover_image,
+        "ingredients": recipe.ingredients,
+        "instructions": recipe.instructions,
+        "created_by": recipe.created_by,
+        "created_by_name": recipe.user.name if recipe.user else "Anonymous",  # Assuming a relationship exists
+        "created_at": recipe.created_at,
+        "category": recipe.category or "Uncategorized",  # Add category field
+        "tags": split_tags(recipe.tags),  # Add tags field
+        "likes": recipe.likes_count,  # Likes count is denormalized on the recipe
+    }
+    if current_app.config["LIKES_WRITE_BEHIND"]:
+        # Buffered likes are not in likes_count until `flush-likes` has run
+        buffered_likes = buffered_like_count(recipe_id)
+        if buffered_likes is not None:
+            response["likes"] = buffered_likes
+
+    if "videos" in includes:
+        response["related_videos"] = [
             {"title": video.title, "url": video.url}
             for video in recipe.related_videos
         ]
 
-        # Fetch likes count
-        likes_count = recipe.likes.count()
+    if "comments" in includes:
+        # Commenters are joined in the same query; use GET /recipes/<id>/comments to page through them
+        comments = recipe.comments.options(db.joinedload(Comment.user)).order_by(Comment.created_at, Comment.id)
+        response["comments"] = [_serialize_comment(comment) for comment in comments]
 
-        # Fetch comments with user details
-        comments = [
-            {
-                "id": comment.id,
-                "user": {
-                    "name": comment.user.name,
-                    "profile_picture": comment.user.picture,  # Updated to use `picture`
-                },
-                "content": comment.content,
-                "created_at": comment.created_at,
-            }
-            for comment in recipe.comments
-        ]
+    if "rating" in includes:
+        # Average rating from the denormalized rating sum and count
+        response["average_rating"] = round(recipe.average_rating, 2)
+        response["rating_count"] = recipe.rating_count
 
-        # Fetch ratings
-        ratings = [rating.score for rating in recipe.ratings]
-        average_rating = sum(ratings) / len(ratings) if ratings else 0
+    return current_app.json.dumps(response)
 
-        # Decode or split tags
-        tags = decode_or_split(recipe.tags) if recipe.tags else []
 
-        # Prepare the response
-        response = {
-            "id": recipe.id,
-            "name": recipe.name,
-            "cover_image": recipe.cover_image,
-            "ingredients": decode_or_split(recipe.ingredients),  # Decode or split
-            "instructions": decode_or_split(recipe.instructions),  # Decode or split
-            "created_by": recipe.created_by,
-            "created_by_name": recipe.user.name if recipe.user else "Anonymous",  # Assuming a relationship exists
-            "created_at": recipe.created_at,
-            "category": recipe.category or "Uncategorized",  # Add category field
-            "tags": tags,  # Add tags field
-            "related_videos": related_videos,
-            "likes": likes_count,
-            "comments": comments,
-            "average_rating": round(average_rating, 2),
-        }
+@recipe_bp.route("/recipes/<int:recipe_id>/comments", methods=["GET"])
+def get_recipe_comments(recipe_id):
+    """
+    Fetch the comments of a recipe, newest first, one page at a time.
+    - `limit`: page size (default 20, max 100)
+    - `cursor`: the `next_cursor` returned by the previous page
+    """
+    try:
+        try:
+            limit = parse_limit(request.args.get("limit"))
+            cursor = decode_cursor(request.args["cursor"]) if request.args.get("cursor") else None
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
-        return jsonify(response), 200
+        if not db.session.query(Recipe.query.filter_by(id=recipe_id).exists()).scalar():
+            return jsonify({"error": "Recipe not found"}), 404
+
+        # Keyset pagination on (created_at, id), served by ix_comments_recipe_id_created_at_id
+        query = Comment.query.options(db.joinedload(Comment.user)).filter(Comment.recipe_id == recipe_id)
+        if cursor:
+            try:
+                cursor_created_at, cursor_id = datetime.fromisoformat(cursor[0]), int(cursor[1])
+            except (IndexError, TypeError, ValueError):
+                return jsonify({"error": "Invalid cursor"}), 400
+            query = query.filter(db.tuple_(Comment.created_at, Comment.id) < db.tuple_(cursor_created_at, cursor_id))
+
+        comments = query.order_by(Comment.created_at.desc(), Comment.id.desc()).limit(limit + 1).all()
+        has_more = len(comments) > limit
+        comments = comments[:limit]
+
+        next_cursor = None
+        if has_more:
+            next_cursor = encode_cursor(comments[-1].created_at.isoformat(), comments[-1].id)
+
+        return jsonify({
+            "comments": [_serialize_comment(comment) for comment in comments],
+            "next_cursor": next_cursor,
+            "has_more": has_more,
+        }), 200
     except Exception as e:
-        current_app.logger.error(f"Error in /recipes/{recipe_id}: {e}")
+        current_app.logger.error(f"Error in /recipes/{recipe_id}/comments: {e}")
         current_app.logger.error(traceback.format_exc())
         return jsonify({"error": "Internal server error"}), 500
 
 
-
 @recipe_bp.route("/recipes/<int:recipe_id>/related_videos", methods=["GET"])
 def get_related_videos(recipe_id):
     """
@@ -347,91 +531,110 @@ def get_related_videos(recipe_id):
         return jsonify({"error": "Internal server error"}), 500
 
 
+# Number of suggestions returned by GET /recipes/<id>/suggested_recipes
+SUGGESTED_RECIPES_LIMIT = 5
+
+
 @recipe_bp.route("/recipes/<int:recipe_id>/suggested_recipes", methods=["GET"])
 def get_suggested_recipes(recipe_id):
     """
-    Fetch suggested recipes based on the current recipe's attributes (e.g., ingredients, category, popularity),
+    Fetch suggested recipes based on the current recipe's ingredients and popularity,
     with a fallback to random recipes if no similar recipes are found.
+
+    Candidates come from the inverted ingredient index, so only recipes sharing at least
+    one ingredient with the current recipe are read.
     """
     try:
-        # Fetch the current recipe
-        current_recipe = Recipe.query.get(recipe_id)
-        if not current_recipe:
+        # Check the current recipe exists
+        if not db.session.query(Recipe.id).filter_by(id=recipe_id).first():
             return jsonify({"error": "Recipe not found"}), 404
 
-        # Decode the ingredients for matching
-        current_ingredients = set(current_recipe.ingredients.split("\n"))
-        current_cuisine = getattr(current_recipe, "cuisine", None)
-        current_taste_profile = getattr(current_recipe, "taste_profile", None)
-
-        # Find other recipes
-        other_recipes = Recipe.query.filter(Recipe.id != recipe_id).all()
-
-        # Calculate similarity and filter suggestions
-        suggestions = []
-        for recipe in other_recipes:
-            recipe_ingredients = set(recipe.ingredients.split("\n"))
-            ingredient_overlap = len(current_ingredients.intersection(recipe_ingredients))
-
-            # Check cuisine match
-            cuisine_match = 1 if current_cuisine and recipe.cuisine == current_cuisine else 0
-
-            # Check taste profile match
-            taste_profile_match = 1 if current_taste_profile and recipe.taste_profile == current_taste_profile else 0
-
-            # Calculate popularity score
-            likes_count = recipe.likes.count()  # Count likes
-            ratings_sum = sum(rating.score for rating in recipe.ratings)  # Sum of rating scores
-            ratings_count = recipe.ratings.count()  # Count of ratings
-            popularity_score = likes_count + (ratings_sum / ratings_count if ratings_count > 0 else 0)
-
-            # Only suggest recipes with some overlap or matching attributes
-            if ingredient_overlap > 0 or cuisine_match or taste_profile_match:
-                suggestions.append({
-                    "id": recipe.id,
-                    "name": recipe.name,
-                    "cover_image": recipe.cover_image,
-                    "creator_name": recipe.user.name if recipe.user else "Anonymous",
-                    "ingredient_overlap": ingredient_overlap,
-                    "cuisine_match": cuisine_match,
-                    "taste_profile_match": taste_profile_match,
-                    "popularity_score": popularity_score,
-                    "total_score": ingredient_overlap + cuisine_match * 2 + taste_profile_match * 2 + popularity_score,
-                })
-
-        # Sort suggestions by total score
-        sorted_suggestions = sorted(suggestions, key=lambda x: x["total_score"], reverse=True)
+        # Count shared ingredients per candidate straight from the posting lists
+        current_ingredients = db.select(RecipeIngredient.ingredient).where(RecipeIngredient.recipe_id == recipe_id)
+        overlaps = db.session.query(
+            RecipeIngredient.recipe_id,
+            db.func.count().label("ingredient_overlap"),
+        ).filter(
+            RecipeIngredient.ingredient.in_(current_ingredients),
+            RecipeIngredient.recipe_id != recipe_id,
+        ).group_by(RecipeIngredient.recipe_id).subquery()
+
+        candidates = db.session.query(
+            Recipe.id,
+            Recipe.name,
+            Recipe.cover_image,
+            Recipe.likes_count,
+            Recipe.average_rating.label("average_rating"),
+            overlaps.c.ingredient_overlap,
+        ).join(overlaps, overlaps.c.recipe_id == Recipe.id).order_by(Recipe.id)
+
+        def score(candidate):
+            # Recipes have no cuisine or taste profile yet, so those matches are always 0
+            popularity_score = candidate.likes_count + candidate.average_rating
+            return {
+                "id": candidate.id,
+                "name": candidate.name,
+                "cover_image": candidate.cover_image,
+                "ingredient_overlap": candidate.ingredient_overlap,
+                "cuisine_match": 0,
+                "taste_profile_match": 0,
+                "popularity_score": popularity_score,
+                "total_score": candidate.ingredient_overlap + popularity_score,
+            }
+
+        # Keep only the best few in a bounded heap instead of sorting every candidate
+        top_suggestions = heapq.nlargest(
+            SUGGESTED_RECIPES_LIMIT, (score(candidate) for candidate in candidates), key=lambda x: x["total_score"]
+        )
+
+        summaries = load_recipe_summaries(suggestion["id"] for suggestion in top_suggestions)
 
         # Fallback: Random recipes if no suggestions are found
-        if not sorted_suggestions:
-            random_recipes = random.sample(other_recipes, min(len(other_recipes), 5))  # Randomly select up to 5 recipes
-            sorted_suggestions = [
+        if not top_suggestions:
+            random_ids = [
+                row.id for row in db.session.query(Recipe.id)
+                .filter(Recipe.id != recipe_id)
+                .order_by(db.func.random())
+                .limit(SUGGESTED_RECIPES_LIMIT)
+            ]
+            summaries = load_recipe_summaries(random_ids)
+            top_suggestions = [
                 {
-                    "id": recipe.id,
-                    "name": recipe.name,
-                    "cover_image": recipe.cover_image,
-                    "creator_name": recipe.user.name if recipe.user else "Anonymous",
+                    "id": summary["id"],
+                    "name": summary["name"],
+                    "cover_image": summary["cover_image"],
                     "ingredient_overlap": 0,
                     "cuisine_match": 0,
                     "taste_profile_match": 0,
                     "popularity_score": 0,
                     "total_score": 0,
                 }
-                for recipe in random_recipes
+                for summary in summaries.values()
             ]
 
-        # Return top 5 suggestions or random fallback
-        return jsonify({"suggested_recipes": sorted_suggestions[:5]}), 200
+        # Creator names come from the summaries, loaded in one query
+        for suggestion in top_suggestions:
+            suggestion["creator_name"] = summaries[suggestion["id"]]["creator_name"]
+
+        return jsonify({"suggested_recipes": top_suggestions}), 200
     except Exception as e:
         current_app.logger.error(f"Error in /recipes/{recipe_id}/suggested_recipes: {e}")
         current_app.logger.error(traceback.format_exc())
         return jsonify({"error": "Internal server error"}), 500
 
 
+def _escape_like(value):
+    """Escape LIKE wildcards so user input is matched literally."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
 @recipe_bp.route("/recipes/search", methods=["GET"])
 def search_recipes():
     """
-    Search for recipes across multiple fields using a query.
+    Search for recipes by name, category, tags, characteristics, flavors, ingredients and instructions.
+
+    Matches are found through the trigram index on `Recipe.search_document` and ranked by relevance,
+    with name matches first. Passing `limit` and/or `cursor` returns a paginated response.
     """
     try:
         # Retrieve the search query from the request
@@ -440,98 +643,63 @@ def search_recipes():
         if not query:
             return jsonify({"error": "Search query is required"}), 400
 
-        # Prepare regex-like pattern for ilike (case-insensitive partial matching)
-        search_pattern = f"%{query}%"
-
-        # Subqueries for counting likes, comments, favorites, and calculating average rating
-        likes_subquery = db.session.query(
-            db.func.count(Like.id).label("likes_count")
-        ).filter(Like.recipe_id == Recipe.id).correlate(Recipe).as_scalar()
-
-        comments_subquery = db.session.query(
-            db.func.count(Comment.id).label("comments_count")
-        ).filter(Comment.recipe_id == Recipe.id).correlate(Recipe).as_scalar()
-
-        favorites_subquery = db.session.query(
-            db.func.count(Favorite.id).label("favorites_count")
-        ).filter(Favorite.recipe_id == Recipe.id).correlate(Recipe).as_scalar()
-
-        ratings_subquery = db.session.query(
-            db.func.avg(Rating.score).label("avg_rating")
-        ).filter(Rating.recipe_id == Recipe.id).correlate(Recipe).as_scalar()
-
-        # Build the base query with filters for all searchable fields
-        recipes_query = Recipe.query.filter(
-            db.or_(
-                # String fields with ilike for partial matching
-                Recipe.name.ilike(search_pattern),
-                Recipe.category.ilike(search_pattern),
-                Recipe.characteristics.ilike(search_pattern),
-                Recipe.flavors.ilike(search_pattern),
-                Recipe.cover_image.ilike(search_pattern),
-
-                # JSON fields (cast to text for searching)
-                Recipe.ingredients.ilike(search_pattern),  # Already Text, no JSON extraction needed
-                Recipe.instructions.ilike(search_pattern),  # Already Text
-                Recipe.tags.ilike(search_pattern),  # Already Text
-
-                # Numeric fields (cast subquery results to string)
-                Recipe.id.cast(db.String).ilike(search_pattern),
-                db.func.cast(likes_subquery, db.String).ilike(search_pattern),
-                db.func.cast(comments_subquery, db.String).ilike(search_pattern),
-                db.func.cast(favorites_subquery, db.String).ilike(search_pattern),
-                db.func.cast(db.func.coalesce(ratings_subquery, 0), db.String).ilike(search_pattern),
-            )
+        paginated = any(arg in request.args for arg in ("limit", "cursor"))
+        try:
+            limit = parse_limit(request.args.get("limit"))
+            cursor = decode_cursor(request.args["cursor"]) if request.args.get("cursor") else None
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        # Substring match on the search document; pg_trgm's GIN index serves ILIKE '%...%'
+        search_pattern = f"%{_escape_like(query)}%"
+        rank = (
+            db.case((Recipe.name.ilike(search_pattern), 1.0), else_=0.0)
+            + db.func.word_similarity(query, Recipe.search_document)
+        )
+        recipes_query = db.session.query(Recipe, rank.label("rank")).filter(
+            Recipe.search_document.ilike(search_pattern)
         )
 
-        # Execute the query
-        recipes = recipes_query.all()
+        if cursor:
+            try:
+                cursor_rank, cursor_id = float(cursor[0]), int(cursor[1])
+            except (IndexError, TypeError, ValueError):
+                return jsonify({"error": "Invalid cursor"}), 400
+            recipes_query = recipes_query.filter(db.tuple_(rank, Recipe.id) < db.tuple_(cursor_rank, cursor_id))
 
-        if not recipes:
-            return jsonify([]), 200  # Return an empty list if no recipes are found
+        # Execute the query, most relevant first
+        recipes_query = recipes_query.order_by(rank.desc(), Recipe.id.desc())
+        rows = recipes_query.limit(limit + 1).all() if paginated else recipes_query.all()
 
-        # Helper function to safely parse JSON or return default
-        def safe_json_load(data, default):
-            if not data or not isinstance(data, str):
-                return default
-            try:
-                return json.loads(data)
-            except json.JSONDecodeError:
-                return default
+        has_more = paginated and len(rows) > limit
+        if paginated:
+            rows = rows[:limit]
 
         # Format the response
         response = []
-        for recipe in recipes:
-            # Resolve dynamic relationships
-            resolved_likes = recipe.likes.count()
-            resolved_comments = recipe.comments.count()
-            resolved_ratings = recipe.ratings.all()
-            resolved_favorites = recipe.favorites.count()
-
-            # Calculate average rating
-            average_rating = (
-                sum(rating.score for rating in resolved_ratings) / len(resolved_ratings)
-                if resolved_ratings else 0
-            )
-
+        for recipe, _ in rows:
             # Append the recipe details
             response.append({
                 "id": recipe.id,
                 "name": recipe.name,
                 "cover_image": recipe.cover_image,
-                "ingredients": safe_json_load(recipe.ingredients, []),
-                "instructions": safe_json_load(recipe.instructions, []),
+                "ingredients": recipe.ingredients,
+                "instructions": recipe.instructions,
                 "category": recipe.category,
-                "tags": safe_json_load(recipe.tags, []),
+                "tags": split_tags(recipe.tags),
                 "characteristics": recipe.characteristics,
                 "flavors": recipe.flavors,
-                "likes": resolved_likes,
-                "comments": resolved_comments,
-                "average_rating": average_rating,
-                "favorites": resolved_favorites,
+                "likes": recipe.likes_count,
+                "comments": recipe.comments_count,
+                "average_rating": recipe.average_rating,
+                "favorites": recipe.favorites_count,
             })
 
-        return jsonify(response), 200
+        if not paginated:
+            return jsonify(response), 200
+
+        next_cursor = encode_cursor(rows[-1].rank, rows[-1][0].id) if has_more else None
+        return jsonify({"recipes": response, "next_cursor": next_cursor, "has_more": has_more}), 200
 
     except Exception as e:
         current_app.logger.error(f"Error in search_recipes: {e}")
@@ -574,21 +742,10 @@ def edit_recipe():
         current_app.logger.info("Incoming request to /edit")
         current_app.logger.info(f"Request JSON: {request.json}")
 
-        # Fetch user data from the session
-        session_id = request.cookies.get("session_id")
-        if not session_id:
-            current_app.logger.error("Missing session_id cookie")
-            return jsonify({"error": "Invalid or missing session_id cookie"}), 401
-
-        session_data = json.loads(current_app.extensions["redis_client"].get(session_id))
-        user_email = session_data.get("email")
-        if not user_email:
-            return jsonify({"error": "User not authenticated"}), 401
-
-        # Find user in the database
-        user = User.query.filter_by(email=user_email).first()
-        if not user:
-            return jsonify({"error": "User not found"}), 404
+        # The session user, resolved without touching the database
+        user = get_current_user()
+        if user is None:
+            return jsonify({"error": "Invalid or missing session"}), 401
 
         # Get recipe details from the request
         data = request.json
@@ -608,10 +765,10 @@ def edit_recipe():
         # Update recipe details from the request
         name = data.get("name", recipe.name)  # Use existing name if not provided
         cover_image = data.get("cover_image", recipe.cover_image)  # Default to existing if not provided
-        ingredients = "\n".join(data["ingredients"]) if isinstance(data["ingredients"], list) else data["ingredients"]
-        instructions = "\n".join(data["instructions"]) if isinstance(data["instructions"], list) else data["instructions"]
+        ingredients = to_lines(data.get("ingredients", recipe.ingredients))
+        instructions = to_lines(data.get("instructions", recipe.instructions))
         category = data.get("category", recipe.category)  # Use existing category if not provided
-        tags = data.get("tags", recipe.tags.split(","))  # Default to existing tags if not provided
+        tags = data.get("tags", split_tags(recipe.tags))  # Default to existing tags if not provided
         if isinstance(tags, list):
             tags = ",".join([tag.strip() for tag in tags])  # Ensure it's a comma-separated string
         characteristics = data.get("characteristics", recipe.characteristics)
@@ -627,6 +784,8 @@ def edit_recipe():
         recipe.characteristics = characteristics
         recipe.flavors = flavors
         recipe.updated_at = datetime.utcnow()
+        index_recipe_ingredients(recipe)
+        index_recipe_tags(recipe)
 
         db.session.commit()
 
@@ -645,6 +804,8 @@ def edit_recipe():
 
             db.session.commit()
 
+        invalidate_recipe_details(recipe.id)
+
         current_app.logger.info(f"Recipe successfully updated: {recipe}")
         return jsonify({"message": "Recipe updated successfully", "recipe_id": recipe.id}), 200
 
@@ -660,36 +821,21 @@ def rate_recipe(recipe_id):
         current_app.logger.info(f"Incoming request to /{recipe_id}/rate")
         data = request.json
 
-        session_id = request.cookies.get("session_id")
-        if not session_id:
-            return jsonify({"error": "Invalid or missing session_id cookie"}), 401
-
-        session_data = json.loads(current_app.extensions["redis_client"].get(session_id))
-        user_email = session_data.get("email")
-        if not user_email:
-            return jsonify({"error": "User not authenticated"}), 401
-
-        user = User.query.filter_by(email=user_email).first()
-        if not user:
-            return jsonify({"error": "User not found"}), 404
+        # The session user, resolved without touching the database
+        user = get_current_user()
+        if user is None:
+            return jsonify({"error": "Invalid or missing session"}), 401
 
         score = data.get("score")
         if not isinstance(score, int) or score < 1 or score > 5:
             return jsonify({"error": "Invalid rating. Score must be between 1 and 5."}), 400
 
-        recipe = Recipe.query.get(recipe_id)
-        if not recipe:
+        # Create or update the rating and its counters in one statement
+        if upsert_recipe_rating(recipe_id, user.id, score) is None:
             return jsonify({"error": "Recipe not found"}), 404
 
-        # Check if the user already rated this recipe
-        existing_rating = Rating.query.filter_by(recipe_id=recipe_id, user_id=user.id).first()
-        if existing_rating:
-            existing_rating.score = score  # Update the rating if it exists
-        else:
-            new_rating = Rating(recipe_id=recipe_id, user_id=user.id, score=score, created_at=datetime.utcnow())
-            db.session.add(new_rating)
-
         db.session.commit()
+        invalidate_recipe_details(recipe_id)
         return jsonify({"message": "Rating submitted successfully"}), 201
     except Exception as e:
         current_app.logger.error(f"Error in /{recipe_id}/rate: {e}")
@@ -734,31 +880,16 @@ def toggle_favorite():
         if not recipe_id or not isinstance(recipe_id, int):
             return jsonify({"error": "Recipe ID is required and must be an integer"}), 400
 
-        # Verify recipe exists
-        recipe = Recipe.query.get(recipe_id)
-        if not recipe:
+        # Add or remove the favorite and get the new favorite count back in one statement
+        result = toggle_recipe_engagement(Favorite, Recipe.favorites_count, recipe_id, user.id)
+        if result is None:
             return jsonify({"error": "Recipe not found"}), 404
+        added, favorites_count = result
+        db.session.commit()
 
-        # Check if the recipe is already favorited by the user
-        existing_favorite = Favorite.query.filter_by(
-            user_id=user.id, recipe_id=recipe_id
-        ).first()
-
-        if existing_favorite:
-            # Remove from favorites
-            db.session.delete(existing_favorite)
-            db.session.commit()
-            return jsonify({"message": f"Recipe {recipe_id} removed from favorites"}), 200
-        else:
-            # Add to favorites
-            new_favorite = Favorite(
-                user_id=user.id,
-                recipe_id=recipe_id,
-                created_at=datetime.utcnow(),
-            )
-            db.session.add(new_favorite)
-            db.session.commit()
-            return jsonify({"message": f"Recipe {recipe_id} added to favorites"}), 201
+        if added:
+            return jsonify({"message": f"Recipe {recipe_id} added to favorites", "favorites": favorites_count}), 201
+        return jsonify({"message": f"Recipe {recipe_id} removed from favorites", "favorites": favorites_count}), 200
 
     except Exception as e:
         current_app.logger.error(f"Error in toggle_favorite: {e}")
@@ -773,22 +904,21 @@ def get_user_favorites(user_id):
             current_app.logger.error(f"User not found for ID: {user_id}")
             return jsonify({"error": "User not found"}), 404
 
-        favorites = Favorite.query.filter_by(user_id=user_id).all()
-        if not favorites:
+        recipe_ids = [recipe_id for recipe_id, in db.session.query(Favorite.recipe_id).filter_by(user_id=user_id)]
+        if not recipe_ids:
             return jsonify([]), 200
 
-        recipe_ids = [fav.recipe_id for fav in favorites]
-        recipes = Recipe.query.filter(Recipe.id.in_(recipe_ids)).all()
-
+        summaries = load_recipe_summaries(recipe_ids)
         favorite_recipes = [
             {
-                "id": recipe.id,
-                "name": recipe.name,
-                "cover_image": recipe.cover_image,
-                "likes": recipe.likes.count() if recipe.likes else 0,  # Use count() for likes
-                "comments": recipe.comments.count() if recipe.comments else 0
+                "id": summary["id"],
+                "name": summary["name"],
+                "cover_image": summary["cover_image"],
+                "likes": summary["likes"],
+                "comments": summary["comments"],
             }
-            for recipe in recipes
+            for summary in (summaries.get(recipe_id) for recipe_id in recipe_ids)
+            if summary
         ]
 
         current_app.logger.info(f"Returning favorite recipes: {favorite_recipes}")
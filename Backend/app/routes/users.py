@@ -1,5 +1,9 @@
 from flask import Blueprint, jsonify, current_app, request
-from app.models.models import User, Recipe, db
+from app.models.models import User, Recipe, Comment, db
+from app.utils.recipe_loader import load_recipe_summaries
+from app.utils.recipe_cache import invalidate_recipe_details
+from app.utils.current_user import forget_session, get_current_user
+from app.utils.session_tokens import issue_session_token, revoke_session_token
 import traceback
 import json
 
@@ -31,23 +35,21 @@ def get_user_recipes(user_id):
         if not user:
             return jsonify({"error": "User not found"}), 404
 
-        # Fetch the user's recipes
-        user_recipes = user.recipes.all()  # Load all recipes related to the user
+        # Fetch the user's recipe ids, then their summaries in a single query
+        recipe_ids = [recipe.id for recipe in user.recipes.with_entities(Recipe.id)]
+        summaries = load_recipe_summaries(recipe_ids)
 
         # Build the response
         response = []
-        for recipe in user_recipes:
-            # Count likes and comments explicitly
-            likes_count = recipe.likes.count()  # Count likes
-            comments_count = recipe.comments.count()  # Count comments
-
+        for recipe_id in recipe_ids:
+            summary = summaries[recipe_id]
             response.append({
-                "id": recipe.id,
-                "name": recipe.name,
-                "cover_image": recipe.cover_image,
-                "likes": likes_count,
-                "comments": comments_count,
-                "created_at": recipe.created_at,
+                "id": summary["id"],
+                "name": summary["name"],
+                "cover_image": summary["cover_image"],
+                "likes": summary["likes"],
+                "comments": summary["comments"],
+                "created_at": summary["created_at"],
             })
 
         return jsonify(response), 200
@@ -71,15 +73,35 @@ def update_user(user_id):
 
         db.session.commit()
 
-        # Update session in Redis
-        session_key = f"user:{user.id}"
+        # The user's name and picture appear in the cached detail of their recipes and of recipes they commented on
+        recipe_ids = db.session.query(Recipe.id).filter(Recipe.created_by == user.id).union(
+            db.session.query(Comment.recipe_id).filter(Comment.user_id == user.id)
+        )
+        invalidate_recipe_details(*(recipe_id for recipe_id, in recipe_ids))
+
         session_data = {
             "id": user.id,
             "name": user.name,
             "email": user.email,
             "picture": user.picture,
         }
-        redis_client.set(session_key, json.dumps(session_data), ex=3600)  # Set expiry time as needed
+        max_age = current_app.config["AUTH_SESSION_MAX_AGE"]
+        if current_app.config["AUTH_SESSION_MODE"] == "signed":
+            # A signed session carries the old name and picture, so replace the caller's token
+            response = jsonify(session_data)
+            current_user = get_current_user()
+            if current_user is not None and current_user.id == user.id:
+                revoke_session_token(request.cookies["session_id"])
+                response.set_cookie(
+                    "session_id", issue_session_token(user), max_age=max_age, httponly=True, secure=False,
+                    samesite="None",
+                )
+            return response, 200
+
+        # Update session in Redis
+        session_key = f"user:{user.id}"
+        redis_client.set(session_key, json.dumps(session_data), ex=max_age)
+        forget_session(session_key)
 
         return jsonify(session_data), 200
     except Exception as e:
@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
 from app.utils.decorators import validate_session
+from app.utils import http_client
 import requests
 import os
 
@@ -21,7 +22,10 @@ def youtube_search():
         "key": os.getenv('YOUTUBE_API_KEY'),
     }
 
-    response = requests.get("https://www.googleapis.com/youtube/v3/search", params=params)
+    try:
+        response = http_client.youtube.get("/v3/search", params=params)
+    except requests.RequestException:  # Unreachable, timed out, or its circuit is open
+        return jsonify({"error": "YouTube is unavailable"}), 503
     if response.status_code != 200:
         return jsonify({"error": "Failed to fetch YouTube data"}), 500
 
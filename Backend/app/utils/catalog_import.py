@@ -0,0 +1,227 @@
+import csv
+import hashlib
+import io
+import json
+import time
+from datetime import datetime
+from app.extensions import db
+from app.models.models import to_lines
+from app.utils.ingredients import ingredient_names
+from app.utils.tags import split_tags, indexed_tags
+
+CHUNK_SIZE = 1 << 20
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+
+
+class _Reader:
+    """Incrementally decode JSON values from a text stream, keeping only the unread tail in memory."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        chunk = self.stream.read(CHUNK_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it, or "" at the end of the stream."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} in catalog, found {self.peek()!r}")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # The value may continue in the next chunk
+                if self.eof or not self._fill():
+                    raise
+                continue
+            if (
+                not isinstance(value, (dict, list, str))
+                and (end == len(self.buffer) or self.buffer[end] not in _WHITESPACE + ",]}")
+                and not self.eof and self._fill()
+            ):
+                # A number or literal may have been cut at the chunk boundary; decode again with more input
+                continue
+            self.pos = end
+            return value
+
+    def array(self):
+        """Yield the elements of the array starting at the current position one at a time."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.expect("]")
+            return
+
+
+def iter_catalog(stream, fmt="json"):
+    """
+    Yield recipe records from a catalog without loading it whole.
+
+    `fmt` is "ndjson" (one JSON object per line) or "json": either a top-level array of records or an
+    object whose "recipes" key holds that array, like thaifood_recipes.json.
+    """
+    if fmt == "ndjson":
+        for line in stream:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+        return
+
+    reader = _Reader(stream)
+    if reader.peek() == "[":
+        yield from reader.array()
+        return
+
+    reader.expect("{")
+    while reader.peek() != "}":
+        key = reader.value()
+        reader.expect(":")
+        if key == "recipes":
+            yield from reader.array()
+        else:
+            reader.value()  # Metadata such as "source"
+        if reader.peek() == ",":
+            reader.pos += 1
+
+
+def catalog_row(record, owner_id):
+    """
+    Map a catalog record (`recipeName`, `imageURL`, `ingredients`, `instructions`, optionally
+    `category` and `tags`) onto Recipe columns. Returns None for records without a name.
+    """
+    name = (record.get("recipeName") or record.get("name") or "").strip()
+    if not name:
+        return None
+    row = {
+        "name": name[:200],
+        "cover_image": (record.get("imageURL") or record.get("cover_image") or None),
+        "ingredients": to_lines(record.get("ingredients")),
+        "instructions": to_lines(record.get("instructions")),
+        "category": record.get("category") or None,
+        "tags": ",".join(split_tags(record.get("tags"))) or None,
+        "created_by": owner_id,
+    }
+    if row["cover_image"]:
+        row["cover_image"] = row["cover_image"][:500]
+    # Identical content hashes to the same value, so re-running an import inserts nothing twice
+    content = json.dumps(
+        [row["name"], row["cover_image"], row["ingredients"], row["instructions"], row["category"], row["tags"]],
+        ensure_ascii=False, separators=(",", ":"),
+    )
+    row["content_hash"] = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    return row
+
+
+# Columns staged by COPY for every imported recipe
+_RECIPE_COLUMNS = (
+    "name", "cover_image", "ingredients", "instructions", "category", "tags", "created_by", "created_at", "content_hash",
+)
+
+
+def _copy_rows(cursor, table, columns, rows):
+    """COPY `rows` (tuples matching `columns`, None for NULL) into `table` in one round trip."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(rows)
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def _insert_batch(rows):
+    """
+    Insert a batch of recipes and their ingredient/tag index rows. Returns the number of new recipes.
+
+    The batch is COPYed into a temporary table and moved into recipes with a single
+    INSERT ... ON CONFLICT (content_hash) DO NOTHING, so already imported recipes are skipped.
+    """
+    created_at = datetime.utcnow().isoformat()
+    cursor = db.session.connection().connection.cursor()
+    cursor.execute(
+        "CREATE TEMPORARY TABLE recipe_import (name text, cover_image text, ingredients jsonb, instructions jsonb, "
+        "category text, tags text, created_by integer, created_at timestamp, content_hash text) ON COMMIT DROP"
+    )
+    _copy_rows(cursor, "recipe_import", _RECIPE_COLUMNS, (
+        (
+            row["name"], row["cover_image"],
+            json.dumps(row["ingredients"], ensure_ascii=False), json.dumps(row["instructions"], ensure_ascii=False),
+            row["category"], row["tags"], row["created_by"], created_at, row["content_hash"],
+        )
+        for row in rows
+    ))
+    columns = ", ".join(_RECIPE_COLUMNS)
+    cursor.execute(
+        f"INSERT INTO recipes ({columns}) SELECT {columns} FROM recipe_import "
+        "ON CONFLICT (content_hash) DO NOTHING RETURNING id, ingredients, tags"
+    )
+    created = cursor.fetchall()
+
+    # New recipes have no index rows yet, so these go straight in
+    _copy_rows(cursor, "recipe_ingredients", ("recipe_id", "ingredient"), (
+        (recipe_id, name)
+        for recipe_id, ingredients, _ in created
+        for name in ingredient_names(ingredients)
+    ))
+    _copy_rows(cursor, "recipe_tags", ("recipe_id", "tag"), (
+        (recipe_id, tag)
+        for recipe_id, _, tags in created
+        for tag in indexed_tags(tags)
+    ))
+    db.session.commit()
+    return len(created)
+
+
+def import_catalog(records, owner_id, batch_size=1000, progress=None):
+    """
+    Upsert catalog records as recipes owned by `owner_id`, committing every `batch_size` records.
+    Records already imported (same content hash) and records within a batch that repeat are skipped.
+
+    `progress(read, created, elapsed)` is called after every batch. Returns `(read, created)`.
+    """
+    started = time.monotonic()
+    read = created = 0
+    batch = {}
+    for record in records:
+        read += 1
+        row = catalog_row(record, owner_id)
+        if row:
+            batch.setdefault(row["content_hash"], row)
+        if len(batch) >= batch_size:
+            created += _insert_batch(list(batch.values()))
+            batch = {}
+            if progress:
+                progress(read, created, time.monotonic() - started)
+    if batch:
+        created += _insert_batch(list(batch.values()))
+    if progress:
+        progress(read, created, time.monotonic() - started)
+    return read, created
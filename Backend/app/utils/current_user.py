@@ -0,0 +1,101 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from flask import current_app, g, request
+from app.utils.redis_utils import get_json
+from app.utils.session_tokens import read_session_token
+
+# The user stored in the session by /auth/authorize, taken as is: the id was written by the server at
+# login, so routes can use it without looking the user up again
+SessionUser = namedtuple("SessionUser", ["id", "name", "email", "picture"])
+
+
+class _SessionCache:
+    """
+    Small per-worker LRU of decoded sessions, each kept for at most `ttl` seconds.
+
+    A logout or profile update is seen by other workers once their entry expires, so the TTL should
+    stay short; the worker that handled it drops its own entry straight away (see `forget_session`).
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if expires_at <= time.monotonic():
+                del self._entries[session_id]
+                return None
+            self._entries.move_to_end(session_id)
+            return user
+
+    def put(self, session_id, user, ttl, size):
+        with self._lock:
+            self._entries[session_id] = (time.monotonic() + ttl, user)
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > size:
+                self._entries.popitem(last=False)
+
+    def discard(self, session_id):
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+
+_sessions = _SessionCache()
+
+
+def _load_session_user(session_id):
+    """
+    Decode a session: verify the signed token with AUTH_SESSION_MODE=signed, otherwise read it from
+    Redis. Returns None if it is missing, expired, revoked or has no user id.
+    """
+    try:
+        if current_app.config["AUTH_SESSION_MODE"] == "signed":
+            data = read_session_token(session_id)
+        else:
+            data = get_json(session_id)
+        if not data:
+            return None
+        user_id = int(data["id"])
+    except (ValueError, TypeError, KeyError):
+        current_app.logger.warning(f"Ignoring malformed session {session_id}")
+        return None
+    return SessionUser(user_id, data.get("name"), data.get("email"), data.get("picture"))
+
+
+def get_current_user():
+    """
+    Return the `SessionUser` of the request's session cookie, or None if there is no valid session.
+
+    Resolved at most once per request, and usually without any network round trip: signed sessions
+    are verified locally, and Redis sessions are kept for AUTH_SESSION_CACHE_TTL seconds, so only a
+    cache miss costs one Redis GET. No SQL is run.
+    """
+    if "current_user" in g:
+        return g.current_user
+
+    user = None
+    session_id = request.cookies.get("session_id")
+    if session_id and current_app.config["AUTH_SESSION_MODE"] == "signed":
+        user = _load_session_user(session_id)
+    elif session_id:
+        user = _sessions.get(session_id)
+        if user is None:
+            user = _load_session_user(session_id)
+            ttl = current_app.config["AUTH_SESSION_CACHE_TTL"]
+            if user is not None and ttl > 0:
+                _sessions.put(session_id, user, ttl, current_app.config["AUTH_SESSION_CACHE_SIZE"])
+    g.current_user = user
+    return user
+
+
+def forget_session(session_id):
+    """Drop a session from this worker's cache, e.g. after logout or after its payload changed."""
+    _sessions.discard(session_id)
+    g.pop("current_user", None)
+
@@ -1,6 +1,6 @@
 from functools import wraps
 from flask import request, jsonify
-from app.extensions import redis_client
+from app.utils.current_user import get_current_user
 
 def validate_session(f):
     @wraps(f)
@@ -9,18 +9,11 @@ def validate_session(f):
             return jsonify({"message": "CORS preflight passed"}), 200
 
         try:
-            session_id = request.cookies.get('session_id')
-            print(f"Session ID from cookies: {session_id}")
-
-            if not session_id:
-                print("Error: Session ID missing in cookies")
+            if not request.cookies.get('session_id'):
                 return jsonify({"error": "Session ID is missing"}), 401
 
-            session_data = redis_client.get(session_id)
-            print(f"Session data from Redis: {session_data}")
-
-            if not session_data:
-                print("Error: Session not found in Redis or expired")
+            # Cached per request and briefly per worker; the view can call get_current_user() again for free
+            if get_current_user() is None:
                 return jsonify({"error": "Invalid or expired session"}), 401
 
         except Exception as e:
@@ -29,4 +22,3 @@ def validate_session(f):
 
         return f(*args, **kwargs)
     return decorated_function
-
@@ -0,0 +1,162 @@
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import insert
+from app.extensions import db
+from app.models.models import Recipe, Rating, Like
+from app.models.user import User
+
+
+def toggle_recipe_engagement(model, counter, recipe_id, user_id):
+    """
+    Like/unlike (or favorite/unfavorite) a recipe in a single statement.
+
+    `model` is Like or Favorite and `counter` the matching Recipe counter column. The user's row is
+    deleted if it exists and inserted otherwise, and `counter` is moved by the same amount, all in one
+    round trip. When the same user toggles twice at once (a double click), the second statement's
+    insert waits for the first to commit and then conflicts on the (recipe_id, user_id) constraint,
+    while its snapshot, taken before that commit, has no row to delete; it then changes nothing and is
+    run once more, which deletes the row, so the second toggle undoes the first.
+
+    Returns `(added, count)`, or None if the recipe does not exist. Runs in the current transaction
+    (READ COMMITTED); the caller commits.
+    """
+    for _ in range(2):
+        row = _toggle_once(model, counter, recipe_id, user_id)
+        if row is None:
+            return None
+        if row.added or row.removed:
+            break
+    return not row.removed, row.count
+
+
+def _toggle_once(model, counter, recipe_id, user_id):
+    deleted = (
+        db.delete(model)
+        .where(model.recipe_id == recipe_id, model.user_id == user_id)
+        .returning(model.id)
+        .cte("deleted")
+    )
+    inserted = (
+        insert(model)
+        .from_select(
+            ["recipe_id", "user_id", "created_at"],
+            db.select(Recipe.id, db.literal(user_id), db.literal(datetime.utcnow()))
+            .where(Recipe.id == recipe_id, ~db.exists(deleted.select())),
+        )
+        .on_conflict_do_nothing(index_elements=["recipe_id", "user_id"])
+        .returning(model.id)
+        .cte("inserted")
+    )
+    added = db.select(db.func.count()).select_from(inserted).scalar_subquery()
+    removed = db.select(db.func.count()).select_from(deleted).scalar_subquery()
+    counted = (
+        db.update(Recipe)
+        .where(Recipe.id == recipe_id)
+        .values({counter: counter + added - removed})
+        .returning(counter.label("count"))
+        .cte("counted")
+    )
+    return db.session.execute(db.select(counted.c["count"], added.label("added"), removed.label("removed"))).first()
+
+
+def upsert_recipe_rating(recipe_id, user_id, score):
+    """
+    Create or update the user's rating of a recipe and move the rating counters in a single statement.
+
+    The previous score is read under a row lock, so the rating_sum delta is exact even when the same
+    user rates concurrently. When two first ratings by the same user race, the second statement's insert
+    waits for the first to commit and then conflicts, while its snapshot, taken before that commit, does
+    not see the new row to update; it then changes nothing and is run once more, which sees the row.
+    Returns `(rating_sum, rating_count)`, or None if the recipe does not exist. Runs in the current
+    transaction (READ COMMITTED); the caller commits.
+    """
+    for _ in range(2):
+        row = _upsert_rating_once(recipe_id, user_id, score)
+        if row is None:
+            return None
+        if row.changed:
+            break
+    return row.rating_sum, row.rating_count
+
+
+def _upsert_rating_once(recipe_id, user_id, score):
+    inserted = (
+        insert(Rating)
+        .from_select(
+            ["recipe_id", "user_id", "score", "created_at"],
+            db.select(Recipe.id, db.literal(user_id), db.literal(score), db.literal(datetime.utcnow()))
+            .where(Recipe.id == recipe_id),
+        )
+        .on_conflict_do_nothing(index_elements=["recipe_id", "user_id"])
+        .returning(Rating.score)
+        .cte("inserted")
+    )
+    previous = (
+        db.select(Rating.id, Rating.score)
+        .where(Rating.recipe_id == recipe_id, Rating.user_id == user_id)
+        .with_for_update()
+        .subquery("previous")
+    )
+    updated = (
+        db.update(Rating)
+        .where(Rating.id == previous.c.id, ~db.exists(inserted.select()))
+        .values(score=score)
+        .returning((score - previous.c.score).label("delta"))
+        .cte("updated")
+    )
+    inserted_score = db.select(db.func.coalesce(db.func.sum(inserted.c.score), 0)).scalar_subquery()
+    inserted_count = db.select(db.func.count()).select_from(inserted).scalar_subquery()
+    updated_delta = db.select(db.func.coalesce(db.func.sum(updated.c.delta), 0)).scalar_subquery()
+    updated_count = db.select(db.func.count()).select_from(updated).scalar_subquery()
+    counted = (
+        db.update(Recipe)
+        .where(Recipe.id == recipe_id)
+        .values(
+            rating_sum=Recipe.rating_sum + inserted_score + updated_delta,
+            rating_count=Recipe.rating_count + inserted_count,
+        )
+        .returning(Recipe.rating_sum, Recipe.rating_count)
+        .cte("counted")
+    )
+    return db.session.execute(
+        db.select(
+            counted.c.rating_sum, counted.c.rating_count, (inserted_count + updated_count).label("changed")
+        )
+    ).first()
+
+
+def apply_like_changes(recipe_id, liked_user_ids, unliked_user_ids):
+    """
+    Apply a batch of buffered like/unlike changes to one recipe and move likes_count by the number of
+    rows actually inserted and deleted, in a single statement.
+
+    Replaying a batch is harmless: likes that already exist and unlikes that are already gone change
+    nothing. Users or recipes that no longer exist are skipped. Returns the new likes_count, or None
+    if the recipe does not exist. Runs in the current transaction; the caller commits.
+    """
+    inserted = (
+        insert(Like)
+        .from_select(
+            ["recipe_id", "user_id", "created_at"],
+            db.select(db.literal(recipe_id), User.id, db.literal(datetime.utcnow()))
+            .where(User.id.in_(liked_user_ids), db.exists().where(Recipe.id == recipe_id)),
+        )
+        .on_conflict_do_nothing(index_elements=["recipe_id", "user_id"])
+        .returning(Like.id)
+        .cte("inserted")
+    )
+    deleted = (
+        db.delete(Like)
+        .where(Like.recipe_id == recipe_id, Like.user_id.in_(unliked_user_ids))
+        .returning(Like.id)
+        .cte("deleted")
+    )
+    added = db.select(db.func.count()).select_from(inserted).scalar_subquery()
+    removed = db.select(db.func.count()).select_from(deleted).scalar_subquery()
+    counted = (
+        db.update(Recipe)
+        .where(Recipe.id == recipe_id)
+        .values(likes_count=Recipe.likes_count + added - removed)
+        .returning(Recipe.likes_count)
+        .cte("counted")
+    )
+    return db.session.execute(db.select(counted.c.likes_count)).scalar()
@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+import time
+import unicodedata
+import uuid
+import redis
+import requests
+from flask import current_app
+from app.utils import http_client
+from app.utils.redis_utils import redis_client
+
+GEMINI_MODEL = "gemini-1.5-flash"
+GEMINI_PATH = f"/v1beta/models/{GEMINI_MODEL}:generateContent"
+GEMINI_STREAM_PATH = f"/v1beta/models/{GEMINI_MODEL}:streamGenerateContent"
+
+# Gemini answers, cached by prompt so that regenerating the same prompt or re-checking an unchanged
+# recipe does not call the API again. Errors are never cached.
+GEMINI_CACHE_TTL = int(os.getenv("GEMINI_CACHE_TTL", 24 * 3600))
+GEMINI_CACHE_KEY = "gemini:{digest}"
+
+# Only one worker calls Gemini for a prompt at a time; concurrent callers of the same prompt wait for
+# its answer for up to LOCK_WAIT seconds. The lock outlives a slow call so it cannot expire mid-call.
+LOCK_TTL_MS = 90 * 1000
+LOCK_WAIT = 60.0
+LOCK_POLL_INTERVAL = 0.1
+
+# Delete the lock only if we still own it
+_RELEASE_LOCK = redis_client.register_script("""
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+""")
+
+
+class GeminiError(Exception):
+    """The Gemini API answered with an error status, or could not be reached (status 503)."""
+
+    def __init__(self, status_code, details):
+        super().__init__(f"Gemini API error {status_code}")
+        self.status_code = status_code
+        self.details = details
+
+
+def call_gemini(prompt, generation_config=None):
+    """
+    Send `prompt` to Gemini and return the text of the first candidate. Raises GeminiError.
+    `generation_config` is passed as the request's generationConfig, e.g. to ask for JSON.
+    """
+    payload = {
+        "model": os.getenv('FINE_TUNED_MODEL_ID'),
+        "contents": [{"parts": [{"text": prompt}]}]
+    }
+    if generation_config:
+        payload["generationConfig"] = generation_config
+    try:
+        response = http_client.gemini.post(GEMINI_PATH, params={"key": os.getenv('API_KEY')}, json=payload)
+    except requests.RequestException as e:  # Unreachable, timed out, or its circuit is open
+        raise GeminiError(503, str(e)) from e
+    if response.status_code != 200:
+        raise GeminiError(response.status_code, response.text)
+    return _candidate_text(response.json())
+
+
+def _candidate_text(data):
+    return data.get("candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("text", "")
+
+
+def stream_gemini(prompt):
+    """
+    Send `prompt` to Gemini's streaming endpoint and yield the text as it is generated. Raises
+    GeminiError before the first chunk if Gemini refuses the request or cannot be reached.
+
+    Nothing is read ahead: the next chunk is only read from Gemini once the caller asks for it, so a slow
+    client slows the upstream read down instead of filling memory. Closing the generator (e.g. when the
+    client disconnects) closes the upstream connection, which cancels the generation.
+    """
+    payload = {
+        "model": os.getenv('FINE_TUNED_MODEL_ID'),
+        "contents": [{"parts": [{"text": prompt}]}]
+    }
+    try:
+        response = http_client.gemini.post(
+            GEMINI_STREAM_PATH, params={"key": os.getenv('API_KEY'), "alt": "sse"}, json=payload, stream=True
+        )
+    except requests.RequestException as e:  # Unreachable, timed out, or its circuit is open
+        raise GeminiError(503, str(e)) from e
+    with response:
+        if response.status_code != 200:
+            raise GeminiError(response.status_code, response.text)
+        # Server-sent events, one `data: <GenerateContentResponse JSON>` line per chunk. chunk_size=None
+        # hands over each chunk as it arrives instead of waiting for a full 512-byte block.
+        for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+            if line and line.startswith("data:"):
+                text = _candidate_text(json.loads(line[len("data:"):]))
+                if text:
+                    yield text
+
+
+def normalize_prompt(prompt):
+    """Canonical form of a prompt for cache keys: NFC, with line endings and runs of spaces collapsed."""
+    lines = unicodedata.normalize("NFC", prompt).splitlines()
+    return "\n".join(" ".join(line.split()) for line in lines).strip()
+
+
+def prompt_cache_key(prompt, template):
+    """
+    Cache key of a prompt. `template` names the prompt template and its version (e.g. "check/1"), so
+    changing a template's wording and bumping its version starts from an empty cache.
+    """
+    parts = (template, GEMINI_MODEL, os.getenv('FINE_TUNED_MODEL_ID') or "", normalize_prompt(prompt))
+    digest = hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+    return GEMINI_CACHE_KEY.format(digest=digest)
+
+
+def generate(prompt, template, fresh=False, generation_config=None):
+    """
+    Return Gemini's answer to `prompt`, from the cache when the same prompt was answered recently.
+    A `generation_config` belongs to its template and is not part of the cache key.
+
+    Concurrent calls with the same prompt share one upstream call: the first takes a short Redis lock
+    and the others wait for its answer. If that call fails, a waiter takes the lock and tries itself.
+    `fresh` skips the cached answer (the new one is still stored). If Redis is unavailable Gemini is
+    called directly.
+    """
+    key = prompt_cache_key(prompt, template)
+    lock_key = f"{key}:lock"
+    text = None
+    try:
+        if not fresh:
+            cached = redis_client.get(key)
+            if cached is not None:
+                return cached.decode("utf-8")
+
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + LOCK_WAIT
+        while not redis_client.set(lock_key, token, nx=True, px=LOCK_TTL_MS):
+            # Someone else is asking Gemini the same thing; wait for their answer instead
+            if time.monotonic() >= deadline:
+                current_app.logger.warning(f"Gave up waiting for the in-flight Gemini call of {key}")
+                return call_gemini(prompt, generation_config)
+            time.sleep(LOCK_POLL_INTERVAL)
+            cached = None if fresh else redis_client.get(key)
+            if cached is not None:
+                return cached.decode("utf-8")
+
+        try:
+            # The previous holder may have stored the answer just before we took the lock
+            cached = None if fresh else redis_client.get(key)
+            if cached is not None:
+                return cached.decode("utf-8")
+            text = call_gemini(prompt, generation_config)
+            redis_client.set(key, text, ex=GEMINI_CACHE_TTL)
+            return text
+        finally:
+            _RELEASE_LOCK(keys=[lock_key], args=[token])
+    except redis.RedisError as e:
+        current_app.logger.warning(f"Gemini cache unavailable, calling Gemini directly: {e}")
+        # Do not pay for a second call if Redis failed only after Gemini answered
+        return text if text is not None else call_gemini(prompt, generation_config)
+
+
+def cached_answer(prompt, template):
+    """Return the cached answer to `prompt`, or None if there is none or Redis is unavailable."""
+    try:
+        cached = redis_client.get(prompt_cache_key(prompt, template))
+    except redis.RedisError:
+        return None
+    return cached.decode("utf-8") if cached is not None else None
+
+
+def cache_answer(prompt, template, text):
+    """
+    Store an answer obtained outside `generate()`, e.g. by streaming, for later calls with the same prompt.
+    An empty answer is not stored.
+    """
+    if not text:
+        return
+    try:
+        redis_client.set(prompt_cache_key(prompt, template), text, ex=GEMINI_CACHE_TTL)
+    except redis.RedisError as e:
+        current_app.logger.warning(f"Could not cache Gemini answer: {e}")
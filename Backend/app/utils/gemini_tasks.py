@@ -0,0 +1,548 @@
+import os
+import json
+from flask import current_app
+from app.models.models import to_lines
+from app.utils.gemini import generate, GeminiError
+from app.utils.recipe_markdown import parse_recipe_markdown, render_recipe_markdown
+from app.utils.recipe_safety import (
+    KeywordMatcher, canonical_content, memoized_verdict, memoize_verdict, screen_recipe, line_verdicts,
+    memoize_line_verdicts, stored_recipe_lines, replaced_lines,
+)
+
+# The Gemini-backed operations behind the /gemini routes, callable from a request or from a job worker
+# (app/utils/job_queue.py). Each takes the JSON body of its route and whether to bypass the answer
+# cache, and returns the route's `(body, status)`.
+
+# Versions of the prompt templates below, part of the answer cache key: bump one when changing its wording
+GENERATE_TEMPLATE = "generate/2"
+GENERATE_JSON_TEMPLATE = "generate-json/1"
+PARSE_TEMPLATE = "parse/2"
+CHECK_TEMPLATE = "check/1"
+CHECK_EDIT_TEMPLATE = "check-edit/1"
+CHECK_LINES_TEMPLATE = "check-lines/1"
+
+
+def generation_prompt(prompt):
+    """The user's request wrapped in the structured Thai recipe template (GENERATE_TEMPLATE)."""
+    return f"""
+{prompt}
+
+กรุณาตอบในรูปแบบโครงสร้างข้อมูลต่อไปนี้:
+
+**ชื่อเมนู:** <ใส่ชื่อเมนูอาหาร>
+
+**หมวดหมู่:** <ประเภทหมวดหมู่ เช่น ผัด, ต้ม, ทอด, นึ่ง>
+
+**แท็ก:** <ใส่แท็กที่เกี่ยวข้อง เช่น อาหารภาคใต้, เมนูเส้น, เมนูไก่, ฯลฯ>
+
+**ส่วนผสม:**
+<รายการส่วนผสมทีละบรรทัด เช่น>
+- กุ้งสด 150 กรัม
+- ใบกะเพรา 1 ถ้วย
+- น้ำมันพืช 2 ช้อนโต๊ะ
+
+**วิธีทำ:**
+<ขั้นตอนการทำทีละบรรทัด เช่น>
+1. ตั้งกระทะ ใส่น้ำมันพืชและตั้งไฟจนร้อน
+2. ใส่กระเทียมและพริกขี้หนูลงไปผัดจนหอม
+3. ใส่กุ้งลงไปผัดจนสุก
+
+**ลักษณะภายนอก:** <บรรยายลักษณะภายนอกของอาหาร เช่น สี ขนาด และลักษณะเด่นอื่น ๆ เหมาะสำหรับคนกลุ่มไหน รวมถึง พยายามวิเคราะห์ความต้องการของผู้ใช้ หากมีการระบุรายละเอียด ให้จดจำรายละเอียดทั้งหมดและนำมาเขียนตรงนี้ เช่น เหมาะสำหรับคนรักสุขภาพ อาหารนี้เป็นเมนูย่อยง่าย รวมถึงเก็บข้อมูลโภชนาการทุกอย่างเช่น ปริมาณคร่าวๆ ของ คาร์โบไฮเดรต โปรตีน วิตามิน แครอรี่ รวมถึงวิเคราะห์โภชนาการเองว่าเหมาะกับคนกลุ่มไหน เช่น เหมาะสำหรับผู้ป่าวโรคต่างๆ หรือมีอาการ ระบบย่อยอาหารที่ สูตรอาหารนี้อาจจะส่งผลดีหรือผลเสียได้>
+
+**รสชาติ:** <บรรยายรสชาติของอาหาร เช่น เผ็ด, เค็ม, มัน, หวาน, เปรี้ยว>
+
+**คำอธิบายเมนู:** <บรรยายข้อมูลทั่วไปเกี่ยวกับเมนู เช่น เหมาะกับใคร เป็นเมนูจากภาคไหน และข้อมูลอื่น ๆ>
+
+**ความปลอดภัย:** <ปลอดภัย หรือ ไม่ปลอดภัย ให้ตอบว่าไม่ปลอดภัยหากมีส่วนประกอบที่อาจจะผิดกฎหมาย หรือมีสารเสพติด เช่น กัญชา ใบกะท่อม หรือมีวิธีทำที่เป็นอันตราย เช่น กินไข่ดิบโดยไม่ปรุงสุก หรือทอดจนสีดำ>
+
+**เหตุผล:** <ถ้าไม่ปลอดภัย ให้ระบุเหตุผล ถ้าปลอดภัยให้ตอบ "-">
+
+**วิธีแก้ไข:** <ถ้าไม่ปลอดภัย ให้แนะนำวิธีแก้ไข เช่น ปรุงไข่ให้สุกก่อนบริโภค ถ้าปลอดภัยให้ตอบ "-">
+
+โปรดตอบเป็นภาษาไทยทั้งหมดในรูปแบบโครงสร้างข้างต้น
+"""
+
+
+# The /gemini/parse body as a Gemini response schema, for answers requested as JSON
+RECIPE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "menuName": {"type": "STRING", "description": "ชื่อเมนู"},
+        "category": {"type": "STRING", "description": "หมวดหมู่ เช่น ผัด, ต้ม, ทอด, นึ่ง"},
+        "tags": {"type": "ARRAY", "items": {"type": "STRING"}, "description": "แท็ก เช่น อาหารภาคใต้, เมนูเส้น"},
+        "ingredients": {"type": "ARRAY", "items": {"type": "STRING"}, "description": "ส่วนผสมพร้อมปริมาณ ทีละรายการ"},
+        "instructions": {"type": "ARRAY", "items": {"type": "STRING"}, "description": "ขั้นตอนการทำ ทีละขั้น"},
+        "characteristics": {"type": "STRING", "description": "ลักษณะภายนอก"},
+        "flavors": {"type": "STRING", "description": "รสชาติ"},
+        "description": {"type": "STRING", "description": "คำอธิบายเมนู"},
+        "danger_check": {
+            "type": "OBJECT",
+            "properties": {
+                "status": {"type": "STRING", "enum": ["safe", "not safe"]},
+                "reason": {"type": "STRING", "description": "ถ้าไม่ปลอดภัย ให้ระบุเหตุผล"},
+                "fix": {"type": "STRING", "description": "ถ้าไม่ปลอดภัย ให้แนะนำวิธีแก้ไข"},
+            },
+            "required": ["status", "reason", "fix"],
+        },
+    },
+    "required": [
+        "menuName", "category", "tags", "ingredients", "instructions", "characteristics", "flavors",
+        "description", "danger_check",
+    ],
+}
+JSON_GENERATION_CONFIG = {"responseMimeType": "application/json", "responseSchema": RECIPE_SCHEMA}
+
+
+def structured_generation_prompt(prompt):
+    """The user's request, asking for the recipe as JSON in RECIPE_SCHEMA (GENERATE_JSON_TEMPLATE)."""
+    return f"""
+{prompt}
+
+กรุณาสร้างสูตรอาหารตามคำขอข้างต้น และตอบเป็น JSON ตาม schema ที่กำหนด:
+- ingredients: ส่วนผสมทีละรายการพร้อมปริมาณ เช่น "กุ้งสด 150 กรัม"
+- instructions: ขั้นตอนการทำทีละขั้น โดยไม่ต้องใส่ลำดับเลข
+- characteristics: บรรยายลักษณะภายนอกของอาหาร เช่น สี ขนาด และลักษณะเด่นอื่น ๆ เหมาะสำหรับคนกลุ่มไหน หากผู้ใช้ระบุรายละเอียดความต้องการ ให้นำมาเขียนตรงนี้ทั้งหมด รวมถึงข้อมูลโภชนาการคร่าว ๆ เช่น คาร์โบไฮเดรต โปรตีน วิตามิน แคลอรี่ และวิเคราะห์ว่าเหมาะหรือไม่เหมาะกับผู้ป่วยโรคใด
+- flavors: บรรยายรสชาติ เช่น เผ็ด, เค็ม, มัน, หวาน, เปรี้ยว
+- description: ข้อมูลทั่วไปเกี่ยวกับเมนู เช่น เหมาะกับใคร เป็นเมนูจากภาคไหน
+- danger_check: ให้ status เป็น "not safe" หากมีส่วนประกอบที่อาจจะผิดกฎหมาย หรือมีสารเสพติด เช่น กัญชา ใบกะท่อม หรือมีวิธีทำที่เป็นอันตราย เช่น กินไข่ดิบโดยไม่ปรุงสุก หรือทอดจนสีดำ พร้อมระบุ reason และ fix ถ้าปลอดภัยให้ reason และ fix เป็นข้อความว่าง
+
+โปรดตอบเป็นภาษาไทยทั้งหมด
+"""
+
+
+def _with_ai_tag(recipe):
+    """Ensure 'AI generate' is included in the tags of a generated recipe."""
+    tags = recipe.setdefault("tags", [])
+    if "AI generate" not in tags:
+        tags.append("AI generate")
+    return recipe
+
+
+def _unsafe_danger_check(reason):
+    return {"status": "not safe", "reason": reason, "fix": "นำส่วนผสมหรือขั้นตอนดังกล่าวออกจากสูตร"}
+
+
+def _screened(recipe):
+    """
+    Run the local safety screen over a recipe structured by Gemini. A blocked term overrides its
+    `danger_check`, which is not trusted on its own.
+    """
+    ingredients = to_lines(recipe.get("ingredients"))
+    lines = [str(recipe.get("menuName", "")), *ingredients, *to_lines(recipe.get("instructions"))]
+    verdict = screen_recipe("|".join(lines), ingredients)
+    if verdict is not None and not verdict["is_safe"]:
+        recipe["danger_check"] = _unsafe_danger_check(verdict["reason"])
+    return recipe
+
+
+def _json_object(text):
+    """The JSON object at the first `{` of `text`, ignoring anything after it. Raises ValueError."""
+    start = text.find("{")
+    if start == -1:
+        raise ValueError("No valid JSON found in response")
+    value, _ = json.JSONDecoder().raw_decode(text, start)
+    if not isinstance(value, dict):
+        raise ValueError("No valid JSON found in response")
+    return value
+
+
+def run_generate(data, fresh=False):
+    """
+    Generate a structured Thai recipe from the prompt in `contents[0].parts[0].text`.
+
+    With `"format": "json"` Gemini is asked for the recipe as JSON, and the answer carries it as `recipe`
+    (the /gemini/parse body) next to the usual text `response`, so no /gemini/parse call is needed.
+    """
+    prompt = data.get("contents", [{}])[0].get("parts", [{}])[0].get("text", "")
+    if not prompt:
+        return {"error": "Prompt is required"}, 400
+
+    if data.get("format") == "json":
+        return _generate_recipe_json(prompt, fresh)
+
+    full_prompt = generation_prompt(prompt)
+
+    try:
+        content = generate(full_prompt, GENERATE_TEMPLATE, fresh=fresh)
+    except GeminiError:
+        return {"error": "Gemini API error"}, 500
+
+    return {"response": content}, 200
+
+
+def _generate_recipe_json(prompt, fresh):
+    full_prompt = structured_generation_prompt(prompt)
+    for retry in (False, True):
+        try:
+            content = generate(
+                full_prompt, GENERATE_JSON_TEMPLATE, fresh=fresh or retry, generation_config=JSON_GENERATION_CONFIG
+            )
+        except GeminiError:
+            return {"error": "Gemini API error"}, 500
+        try:
+            recipe = _json_object(content)
+            break
+        except ValueError as e:
+            # Ask again rather than keep serving the same broken answer from the cache
+            current_app.logger.warning(f"Invalid JSON recipe from Gemini: {e}")
+    else:
+        return {"error": "Failed to parse JSON response"}, 500
+
+    _with_ai_tag(_screened(recipe))
+    return {"response": render_recipe_markdown(recipe), "recipe": recipe}, 200
+
+
+def run_parse(data, fresh=False):
+    """
+    Parse and extract structured data from the raw response, ensuring the default tag 'AI generate' is included.
+    """
+    current_app.logger.info(f"Received payload for /gemini/parse: {data}")
+
+    raw_response = data.get("response", "")
+    if not raw_response:
+        return {"error": "Response text is required"}, 400
+
+    # Text in the generation template is structured without asking Gemini. Its own safety section is
+    # not trusted: the recipe is checked like a submitted one (memoized verdict, local screen, Gemini).
+    recipe = parse_recipe_markdown(raw_response)
+    if recipe is not None:
+        check, status = run_check({
+            "name": recipe["menuName"],
+            "ingredients": recipe["ingredients"],
+            "instructions": recipe["instructions"],
+            "category": recipe["category"],
+            "tags": recipe["tags"],
+            "characteristics": [recipe["characteristics"]],
+            "flavors": [recipe["flavors"]],
+        }, fresh=fresh)
+        if status != 200:
+            return check, status
+        if check["status"] == "Safe":
+            recipe["danger_check"] = {"status": "safe", "reason": "", "fix": ""}
+        else:
+            recipe["danger_check"] = _unsafe_danger_check(check["reason"])
+        return _with_ai_tag(recipe), 200
+
+    # Reprocess the raw response
+    reprocess_prompt = f"""
+    กรุณาวิเคราะห์ข้อมูลต่อไปนี้และตอบกลับในรูปแบบ JSON:
+    {{
+        "menuName": "<ชื่อเมนู>",
+        "ingredients": ["<ส่วนผสม>", ...],
+        "instructions": ["<วิธีทำ>", ...],
+        "category": "<หมวดหมู่>",
+        "tags": ["<แท็ก>", ...],
+        "characteristics": "<ลักษณะภายนอก>",
+        "flavors": "<รสชาติ>"
+        "danger_check":
+            "status": "safe" or "not safe",
+            "reason": "string" (ถ้าไม่ปลอดภัย ให้ระบุเหตุผล เช่น 'มีการใช้ไข่ดิบโดยไม่ปรุงสุก' หรือ 'แนะนำให้ทอดจนสีดำ'),
+            "fix": "string" (ถ้าไม่ปลอดภัย ให้แนะนำวิธีแก้ไข เช่น 'ปรุงไข่ให้สุกก่อนบริโภค' หรือ 'ทอดจนสุกสีเหลืองทองแทน')
+
+    }}
+
+    ให้พิจารณาส่วนประกอบ ที่อาจจะผิดกฎหมาย หรือมีสารเสพติด เช่น กัญชา ใบกะท่อม และวัตถุดิบอื่นๆ ให้ครอบคลุมมากที่สุดเท่าที่เป็นไปได้ และให้เป็น status **ไม่ปลอดภัย เนื่องจากมีความละเอียดอ่อนด้านการคุมปริมาณ
+
+    ข้อมูล:
+    {raw_response}
+    """
+    try:
+        structured_response = generate(
+            reprocess_prompt, PARSE_TEMPLATE, fresh=fresh, generation_config=JSON_GENERATION_CONFIG
+        )
+    except GeminiError as e:
+        current_app.logger.warning(f"Gemini API error: {e.details}")
+        return {"error": "Gemini API error"}, 500
+    current_app.logger.info(f"Reprocessed structured response: {structured_response}")
+
+    # Extract the JSON from the response
+    try:
+        parsed_data = _json_object(structured_response)
+    except json.JSONDecodeError as e:
+        current_app.logger.warning(f"Error parsing JSON response: {e}, received: {structured_response}")
+        return {"error": "Failed to parse JSON response"}, 500
+    except ValueError:
+        current_app.logger.warning(f"No valid JSON found in response: {structured_response}")
+        return {"error": "No valid JSON found in response"}, 500
+
+    return _with_ai_tag(_screened(parsed_data)), 200
+
+
+# An answer to the check prompts containing any of these means the recipe is not safe
+_unsafe_answer = KeywordMatcher(["อันตราย", "ยาพิษ", "ไม่ควร", "ห้าม", "อันตรายถึงชีวิต"])
+
+
+def _check_safety(kind, fields, prompt, template, fresh, check_lines=None):
+    """
+    Decide whether the recipe `fields` are safe: from the verdict memoized for the same content, from the
+    local screen (app/utils/recipe_safety.py), from `check_lines()` if given and it decides, or else by
+    asking Gemini `prompt`. Returns the verdict `{"is_safe", "reason", "ai_response", "checked_by"}`.
+    `fresh` skips the memoized verdict and cached Gemini answer. Raises GeminiError.
+    """
+    content = canonical_content(fields)
+    verdict = None if fresh else memoized_verdict(kind, content)
+    if verdict is not None:
+        return verdict
+
+    # One line per item, so the matcher never joins the end of one to the start of the next
+    text = "|".join(str(line) for value in fields.values() for line in (value if isinstance(value, list) else [value]))
+    verdict = screen_recipe(text, fields["ingredients"])
+    if verdict is not None:
+        verdict["ai_response"] = ""
+    elif check_lines is not None:
+        verdict = check_lines()
+    if verdict is None:
+        ai_response = generate(prompt, template, fresh=fresh)
+        is_safe = not _unsafe_answer.find(ai_response)
+        verdict = {
+            "is_safe": is_safe,
+            # If the AI response contains a reason, we return it
+            "reason": "" if is_safe else ai_response.strip() or "No specific reason provided.",
+            "ai_response": ai_response,
+            "checked_by": "gemini",
+        }
+        if is_safe:
+            # Every line of a safe recipe is safe, which spares later edits from sending them again
+            safe = {"is_safe": True, "reason": ""}
+            for section in ("ingredients", "instructions"):
+                memoize_line_verdicts(section, dict.fromkeys(to_lines(fields[section]), safe))
+    memoize_verdict(kind, content, verdict)
+    return verdict
+
+
+def run_check(recipe_data, fresh=False):
+    """Ask Gemini whether a submitted recipe is safe to cook."""
+    # Extract individual fields from recipe_data
+    menu_name = recipe_data.get("name", "")
+    ingredients = recipe_data.get("ingredients", [])
+    instructions = recipe_data.get("instructions", [])
+    category = recipe_data.get("category", "")
+    tags = recipe_data.get("tags", [])
+    cover_image = recipe_data.get("cover_image", "")  # Not used in prompt, but extracted
+    characteristics = recipe_data.get("characteristics", [])
+    flavors = recipe_data.get("flavors", [])
+    videos = recipe_data.get("videos", [])
+
+    if not menu_name or not ingredients or not instructions:
+        return {"error": "All fields (name, ingredients, instructions) are required"}, 400
+
+    # Prepare the lists for ingredients, instructions, and other fields
+    ingredients_lines = [f"- {ingredient}" for ingredient in ingredients]
+    instructions_lines = [f"{idx+1}. {instruction}" for idx, instruction in enumerate(instructions)]
+    videos_lines = [video['url'] for video in videos] if videos else []
+    tags_lines = tags if tags else []
+    characteristics_lines = characteristics if characteristics else []
+    flavors_lines = flavors if flavors else []
+
+    # Construct the prompt as a list of lines to avoid backslashes
+    prompt_lines = [
+        "ตรวจสอบสูตรอาหารนี้ให้ดี โดยต้องแน่ใจว่าการทำอาหารในสูตรนี้ปลอดภัย และไม่มีคำแนะนำที่ผิดหรืออันตราย เช่น \"ทอดจนสีดำ\" หรือ \"กินดิบ\" หรือคำแนะนำที่ไม่เหมาะสม เช่น \"ใส่ระเบิด\" หรือคำที่ไม่เกี่ยวข้องกับการทำอาหาร",
+        f"ชื่อเมนู: {menu_name}",
+        "ส่วนผสม:",
+        *ingredients_lines,
+        "วิธีทำ:",
+        *instructions_lines,
+        f"หมวดหมู่: {category}",
+        f"แท็ก: {', '.join(tags_lines) if tags_lines else '-'}",
+        f"ลักษณะ: {', '.join(characteristics_lines) if characteristics_lines else '-'}",
+        f"รสชาติ: {', '.join(flavors_lines) if flavors_lines else '-'}",
+        f"วิดีโอ: {', '.join(videos_lines) if videos_lines else '-'}",
+        "",
+        "กรุณาตอบกลับโดยแจ้งเตือนหากพบการทำอาหารที่ผิดพลาดหรือมีอันตราย พร้อมคำแนะนำในการปรับปรุงสูตรนี้",
+        "",
+        "ตอบกลับโดยใช้ format นี้",
+        "",
+        "สูตรอาหาร: ปลอดภัย หรือ อันตราย",
+        "Not safe: (ถ้าไม่มีให้ตอบกลับ \"-\")",
+        "reason: (ให้ตอบกลับถ้าอาหารไม่ปลอดถัย โดยให้เหตุผลว่าทำไมสูตรนี้ถึงไม่ปลอดภัย เช่น การใช้คำแนะนำที่ไม่เหมาะสมหรือมีความเสี่ยง)"
+    ]
+
+    # Join the lines with os.linesep (no backslashes)
+    prompt = os.linesep.join(prompt_lines)
+
+    # Screen locally, or ask Gemini unless this same recipe was checked before
+    fields = {
+        "name": menu_name, "ingredients": ingredients, "instructions": instructions, "category": category,
+        "tags": tags_lines, "characteristics": characteristics_lines, "flavors": flavors_lines,
+    }
+    try:
+        verdict = _check_safety("check", fields, prompt, CHECK_TEMPLATE, fresh)
+    except GeminiError as e:
+        return {"error": "Gemini API error", "details": e.details}, 500
+    is_safe = verdict["is_safe"]
+
+    # Return a simplified response with status, suggestions, and reason if unsafe
+    return {
+        "status": "Safe" if is_safe else "Not safe",
+        "suggestions": "Please revise the recipe as it contains unsafe instructions." if not is_safe else "Recipe seems safe!",
+        "reason": verdict["reason"],  # Include reason if unsafe
+        "ai_response": verdict["ai_response"],
+        "checked_by": verdict["checked_by"],
+    }, 200
+
+
+# Gemini's answer to the line-by-line check, as a response schema
+LINE_VERDICTS_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "line": {"type": "INTEGER", "description": "หมายเลขบรรทัดที่ตรวจ"},
+            "safe": {"type": "BOOLEAN"},
+            "reason": {"type": "STRING", "description": "ถ้าไม่ปลอดภัย ให้ระบุเหตุผลและวิธีแก้ไข"},
+        },
+        "required": ["line", "safe", "reason"],
+    },
+}
+LINE_VERDICTS_CONFIG = {"responseMimeType": "application/json", "responseSchema": LINE_VERDICTS_SCHEMA}
+_SECTION_LABELS = {"ingredients": "ส่วนผสม", "instructions": "วิธีทำ"}
+
+
+def _line_label(section, index):
+    return _SECTION_LABELS[section] if section == "ingredients" else f"วิธีทำ ข้อ {index + 1}"
+
+
+def _changed_lines_prompt(name, lines, pending, replaced):
+    """
+    Ask about the `pending` (section, index) lines of `lines`, with the neighbouring steps and the line an
+    edit replaced (`replaced`, {section: {index: previous line}}) as context.
+    """
+    prompt_lines = [
+        "ตรวจสอบบรรทัดต่อไปนี้ของสูตรอาหารที่ถูกแก้ไข โดยต้องแน่ใจว่าการทำอาหารปลอดภัย และไม่มีคำแนะนำที่ผิดหรืออันตราย เช่น \"ทอดจนสีดำ\" หรือ \"กินดิบ\" หรือคำแนะนำที่ไม่เหมาะสม เช่น \"ใส่ระเบิด\" หรือคำที่ไม่เกี่ยวข้องกับการทำอาหาร",
+        f"ชื่อเมนู: {name or '-'}",
+        "",
+    ]
+    for number, (section, index) in enumerate(pending, start=1):
+        prompt_lines.append(f"[{number}] {_line_label(section, index)}: {lines[section][index]}")
+        if index in replaced[section]:
+            prompt_lines.append(f"    (ก่อนแก้ไข: {replaced[section][index]})")
+        if section == "instructions":
+            steps = lines["instructions"]
+            before = steps[index - 1] if index > 0 else "-"
+            after = steps[index + 1] if index + 1 < len(steps) else "-"
+            prompt_lines.append(f"    (ขั้นก่อนหน้า: {before} / ขั้นถัดไป: {after})")
+    prompt_lines += ["", "ตอบเป็น JSON ผลการตรวจของทุกบรรทัดข้างต้น โดยอ้างอิงหมายเลขบรรทัด"]
+    return os.linesep.join(prompt_lines)
+
+
+def _check_changed_lines(recipe_id, fields, fresh):
+    """
+    Check an edited recipe line by line. Lines with a kept verdict reuse it, and every other line, changed
+    or not, is sent to Gemini with its neighbouring steps and, from the diff against the stored recipe,
+    the line it replaced. Returns the verdict, or None when Gemini's answer does not cover every line
+    sent, for the caller to check the whole recipe instead. Raises GeminiError.
+    """
+    stored = stored_recipe_lines(recipe_id) or {"name": "", "ingredients": [], "instructions": []}
+    lines = {section: to_lines(fields[section]) for section in ("ingredients", "instructions")}
+    verdicts = {}
+    pending = []
+    for section, section_lines in lines.items():
+        cached = [None] * len(section_lines) if fresh else line_verdicts(section, section_lines)
+        for index, verdict in enumerate(cached):
+            if verdict is None:
+                pending.append((section, index))
+            else:
+                verdicts[(section, index)] = verdict
+
+    ai_response = ""
+    if pending:
+        replaced = {section: replaced_lines(stored[section], lines[section]) for section in lines}
+        ai_response = generate(
+            _changed_lines_prompt(stored["name"], lines, pending, replaced), CHECK_LINES_TEMPLATE, fresh=fresh,
+            generation_config=LINE_VERDICTS_CONFIG,
+        )
+        try:
+            answers = {int(answer["line"]): answer for answer in json.loads(ai_response)}
+            for number, (section, index) in enumerate(pending, start=1):
+                answer = answers[number]
+                verdicts[(section, index)] = {
+                    "is_safe": bool(answer["safe"]), "reason": str(answer.get("reason") or ""),
+                }
+        except (ValueError, TypeError, KeyError) as e:
+            current_app.logger.warning(f"Incomplete line check from Gemini, checking the whole recipe: {e}")
+            return None
+        for section in lines:
+            memoize_line_verdicts(section, {
+                lines[section][index]: verdicts[(section, index)] for pending_section, index in pending
+                if pending_section == section
+            })
+
+    unsafe = [
+        f"- {_line_label(section, index)} \"{lines[section][index]}\": {verdict['reason'] or '-'}"
+        for (section, index), verdict in sorted(verdicts.items()) if not verdict["is_safe"]
+    ]
+    return {
+        "is_safe": not unsafe,
+        "reason": "\n".join(unsafe),
+        "ai_response": ai_response,
+        "checked_by": "lines",
+    }
+
+
+def run_check_edit(recipe_data, fresh=False):
+    """Ask Gemini whether an edited recipe is safe to cook."""
+    # Extract fields from recipe_data
+    recipe_id = recipe_data.get("id", "")
+    ingredients = recipe_data.get("ingredients", [])
+    instructions = recipe_data.get("instructions", [])
+    tags = recipe_data.get("tags", [])
+
+    if not recipe_id or not ingredients or not instructions:
+        return {"error": "ID, ingredients, and instructions are required"}, 400
+
+    # Prepare the lists for ingredients and instructions
+    ingredients_lines = [f"- {ingredient}" for ingredient in ingredients]
+    instructions_lines = [f"{idx+1}. {instruction}" for idx, instruction in enumerate(instructions)]
+    tags_lines = tags if tags else []
+
+    # Construct the prompt as a list of lines to avoid backslashes
+    prompt_lines = [
+        "ตรวจสอบสูตรอาหารนี้ให้ดี โดยต้องแน่ใจว่าการทำอาหารในสูตรนี้ปลอดภัย และไม่มีคำแนะนำที่ผิดหรืออันตราย เช่น \"ทอดจนสีดำ\" หรือ \"กินดิบ\" หรือคำแนะนำที่ไม่เหมาะสม เช่น \"ใส่ระเบิด\" หรือคำที่ไม่เกี่ยวข้องกับการทำอาหาร",
+        f"ID: {recipe_id}",
+        "ส่วนผสม:",
+        *ingredients_lines,
+        "วิธีทำ:",
+        *instructions_lines,
+        "",
+        "กรุณาตอบกลับโดยแจ้งเตือนหากพบการทำอาหารที่ผิดพลาดหรือมีอันตราย พร้อมคำแนะนำในการปรับปรุงสูตรนี้",
+        "",
+        "ตอบกลับโดยใช้ format นี้",
+        "",
+        "สูตรอาหาร: ปลอดภัย หรือ อันตราย",
+        "Not safe: (ถ้าไม่มีให้ตอบกลับ \"-\")",
+        "reason: (ให้ตอบกลับถ้าอาหารไม่ปลอดถัย โดยให้เหตุผลว่าทำไมสูตรนี้ถึงไม่ปลอดภัย เช่น การใช้คำแนะนำที่ไม่เหมาะสมหรือมีความเสี่ยง)"
+    ]
+
+    # Join the lines with os.linesep (no backslashes)
+    prompt = os.linesep.join(prompt_lines)
+
+    # Screen locally, or ask Gemini about the changed lines unless the same ingredients and instructions
+    # were checked before
+    fields = {"ingredients": ingredients, "instructions": instructions}
+    try:
+        verdict = _check_safety(
+            "check-edit", fields, prompt, CHECK_EDIT_TEMPLATE, fresh,
+            check_lines=lambda: _check_changed_lines(recipe_id, fields, fresh),
+        )
+    except GeminiError as e:
+        return {"error": "Gemini API error", "details": e.details}, 500
+    is_safe = verdict["is_safe"]
+
+    # Return a simplified response with status and suggestion
+    return {
+        "status": "Safe" if is_safe else "Not safe",
+        "suggestions": "Please revise the recipe as it contains unsafe instructions." if not is_safe else "Recipe seems safe!",
+        "ai_response": verdict["ai_response"],
+        "recipe_id": recipe_id,
+        "reason": verdict["reason"],  # Include reason if unsafe
+        "checked_by": verdict["checked_by"],
+    }, 200
+
+
+# Job kinds accepted by the job queue
+TASKS = {
+    "generate": run_generate,
+    "parse": run_parse,
+    "check": run_check,
+    "check-edit": run_check_edit,
+}
@@ -0,0 +1,138 @@
+import os
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Outbound HTTP for every third-party API the backend calls. Each upstream has its own pooled
+# keep-alive session, connect/read timeouts, retries and circuit breaker, so one slow or failing API
+# cannot tie up every worker.
+#
+# Environment (all optional):
+#   <NAME>_BASE_URL         base URL of an upstream, e.g. GEMINI_BASE_URL=http://127.0.0.1:8081 to
+#                           point the Gemini calls at a local stub server
+#   HTTP_CONNECT_TIMEOUT    seconds to establish a connection (default 3.05)
+#   HTTP_RETRIES            retries of connection errors, and of 502/503/504 answers to idempotent
+#                           requests, with jittered exponential backoff (default 2)
+#   HTTP_POOL_SIZE          keep-alive connections kept per host (default 20)
+#   HTTP_BREAKER_FAILURES   consecutive failures that open a circuit (default 5)
+#   HTTP_BREAKER_RESET      seconds an open circuit fails fast before letting a trial request through (default 30)
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """The upstream failed repeatedly and calls to it fail fast until its circuit resets."""
+
+
+class CircuitBreaker:
+    """
+    Per-process circuit breaker. After `failures` consecutive failures the circuit opens and calls fail
+    immediately for `reset_timeout` seconds; then one trial call is let through, and its outcome closes
+    the circuit again or keeps it open for another period.
+    """
+
+    def __init__(self, name, failures, reset_timeout):
+        self.name = name
+        self.failures = failures
+        self.reset_timeout = reset_timeout
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self._opened_at is not None
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through now."""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at >= self.reset_timeout and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+        raise CircuitOpenError(f"{self.name} is unavailable, retry later")
+
+    def record_success(self):
+        with self._lock:
+            self._consecutive_failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._trial_in_flight or self._consecutive_failures >= self.failures:
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+def _env_float(name, default):
+    return float(os.getenv(name, default))
+
+
+class Upstream:
+    """One third-party API: a base URL, a pooled session and a circuit breaker."""
+
+    def __init__(self, name, base_url, read_timeout):
+        self.name = name
+        self.base_url = os.getenv(f"{name.upper()}_BASE_URL", base_url).rstrip("/")
+        self.timeout = (_env_float("HTTP_CONNECT_TIMEOUT", 3.05), read_timeout)
+        self.breaker = CircuitBreaker(
+            name, int(os.getenv("HTTP_BREAKER_FAILURES", 5)), _env_float("HTTP_BREAKER_RESET", 30)
+        )
+
+        retries = int(os.getenv("HTTP_RETRIES", 2))
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,  # A request that timed out reading may have been processed; never send it twice
+            status=retries,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,  # Idempotent methods only, so no POST
+            backoff_factor=0.2,
+            backoff_jitter=0.2,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        pool_size = int(os.getenv("HTTP_POOL_SIZE", 20))
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def request(self, method, path, **kwargs):
+        """
+        Send a request to `base_url + path`. Raises CircuitOpenError while the circuit is open, and the
+        usual requests exceptions on connection errors and timeouts. Connection errors, timeouts and
+        5xx answers count as failures of the upstream.
+        """
+        self.breaker.before_call()
+        kwargs.setdefault("timeout", self.timeout)
+        try:
+            response = self.session.request(method, f"{self.base_url}{path}", **kwargs)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+
+# Text generation can take tens of seconds; the other APIs answer quickly
+gemini = Upstream(
+    "gemini", "https://generativelanguage.googleapis.com", read_timeout=_env_float("GEMINI_READ_TIMEOUT", 60)
+)
+youtube = Upstream("youtube", "https://www.googleapis.com/youtube", read_timeout=_env_float("HTTP_READ_TIMEOUT", 10))
+google_userinfo = Upstream(
+    "google_userinfo", "https://www.googleapis.com/oauth2", read_timeout=_env_float("HTTP_READ_TIMEOUT", 10)
+)
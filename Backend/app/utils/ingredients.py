@@ -0,0 +1,50 @@
+import re
+from app.extensions import db
+from app.models.models import RecipeIngredient, to_lines
+
+# A quantity such as "300", "1/2", "1.5" or a range such as "1-2", in Arabic or Thai digits
+_NUMBER = r"(?:[0-9๐-๙]+(?:[.,/][0-9๐-๙]+)?[½¼¾⅓⅔]?|[½¼¾⅓⅔])"
+_QUANTITY = rf"{_NUMBER}(?:\s*[-–~]\s*{_NUMBER})?"
+
+# Units that follow a quantity in our recipes, longest first so e.g. "กิโลกรัม" wins over "กรัม"
+_UNITS = sorted([
+    "กิโลกรัม", "กรัม", "ขีด", "มิลลิลิตร", "ลิตร", "ช้อนโต๊ะ", "ช้อนชา", "ช้อนกินข้าว", "ถ้วยตวง", "ถ้วย",
+    "แก้ว", "ลูก", "ผล", "ฟอง", "ต้น", "ใบ", "กลีบ", "หัว", "เม็ด", "ชิ้น", "แผ่น", "ก้อน", "ซอง", "กระป๋อง",
+    "ขวด", "ถุง", "กำ", "ราก", "แง่ง", "ตัว", "เส้น", "ส่วน", "kg", "g", "ml", "l", "tbsp", "tsp", "cup", "cups",
+], key=len, reverse=True)
+
+_QUANTITY_RE = re.compile(rf"{_QUANTITY}\s*(?:(?:{'|'.join(_UNITS)})(?![a-z]))?", re.IGNORECASE)
+# Amounts written as words, e.g. "เกลือ เล็กน้อย" (a pinch of salt)
+_AMOUNT_WORDS_RE = re.compile(r"เล็กน้อย|พอประมาณ|ตามชอบ|ตามใจชอบ|ตามต้องการ")
+_PARENTHESES_RE = re.compile(r"\([^)]*\)")
+_BULLET_RE = re.compile(r"^\s*(?:[-*•]|[0-9๐-๙]+[.)])\s*")
+_SEPARATORS_RE = re.compile(r"[\s,:;]+")
+
+
+def normalize_ingredient(line):
+    """
+    Reduce an ingredient line to its name, e.g. "ปลาร้า 300 กรัม" -> "ปลาร้า" and "- มะนาว 1-2 ลูก" -> "มะนาว".
+    Returns an empty string when nothing but a quantity is left.
+    """
+    name = _BULLET_RE.sub("", line)
+    name = _PARENTHESES_RE.sub(" ", name)
+    name = _QUANTITY_RE.sub(" ", name)
+    name = _AMOUNT_WORDS_RE.sub(" ", name)
+    return _SEPARATORS_RE.sub(" ", name).strip().lower()[:200]
+
+
+def ingredient_names(ingredients):
+    """Return the set of normalized ingredient names of a recipe's stored ingredients."""
+    return {name for name in (normalize_ingredient(line) for line in to_lines(ingredients)) if name}
+
+
+def index_recipe_ingredients(recipe):
+    """
+    Replace the inverted-index rows of `recipe` with its current ingredient names.
+    Runs in the current transaction; the caller commits.
+    """
+    RecipeIngredient.query.filter_by(recipe_id=recipe.id).delete(synchronize_session=False)
+    db.session.add_all(
+        RecipeIngredient(recipe_id=recipe.id, ingredient=name)
+        for name in ingredient_names(recipe.ingredients)
+    )
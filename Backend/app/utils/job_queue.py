@@ -0,0 +1,205 @@
+import json
+import os
+import threading
+import time
+import uuid
+from flask import current_app
+from app.extensions import db
+from app.utils.gemini_tasks import TASKS
+from app.utils.redis_utils import redis_client, pipelined
+
+# Redis-backed queue for the Gemini operations, so web workers never wait on the LLM.
+#
+# `POST /gemini/jobs` stores the job in the `job:<id>` hash and pushes its id onto `jobs:gemini:queue`.
+# Workers started with `flask recipes gemini-worker` move ids onto `jobs:gemini:running` (BLMOVE), run
+# the task, store its result in the hash and publish on `job:<id>:done`, where clients can subscribe;
+# others poll `GET /gemini/jobs/<id>`. A job whose worker died stays in the running list until its
+# lease (JOB_LEASE seconds since it started, or since requeue_stale_jobs first saw it there if its
+# worker died before marking it running) runs out, then it is queued again.
+QUEUE_KEY = "jobs:gemini:queue"
+RUNNING_KEY = "jobs:gemini:running"
+JOB_KEY = "job:{job_id}"
+DONE_CHANNEL = "job:{job_id}:done"
+STATS_KEY = "stats:gemini_jobs"
+
+# Finished jobs are kept this long for clients to collect
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", 3600))
+# Submissions are refused with 503 once this many jobs are waiting
+JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", 1000))
+# Longer than any Gemini call can take (see GEMINI_READ_TIMEOUT)
+JOB_LEASE = int(os.getenv("JOB_LEASE", 300))
+
+
+class QueueFullError(Exception):
+    """Too many jobs are already waiting."""
+
+
+def _job_key(job_id):
+    return JOB_KEY.format(job_id=job_id)
+
+
+def submit_job(kind, data, user_id, fresh=False):
+    """Queue a `kind` job (a key of TASKS) for `data`, the JSON body of its route. Returns the job id."""
+    if kind not in TASKS:
+        raise ValueError(f"Unknown job kind {kind!r}, expected one of {', '.join(TASKS)}")
+    if redis_client.llen(QUEUE_KEY) >= JOB_MAX_QUEUED:
+        raise QueueFullError(f"{JOB_MAX_QUEUED} jobs are already waiting")
+    job_id = uuid.uuid4().hex
+    with pipelined(transaction=True) as pipe:
+        pipe.hset(_job_key(job_id), mapping={
+            "kind": kind,
+            "data": json.dumps(data, ensure_ascii=False),
+            "fresh": int(fresh),
+            "user_id": user_id,
+            "status": "queued",
+            "submitted_at": time.time(),
+        })
+        # A job nobody works on is not kept forever either
+        pipe.expire(_job_key(job_id), JOB_LEASE + JOB_RESULT_TTL)
+        pipe.lpush(QUEUE_KEY, job_id)
+    return job_id
+
+
+def get_job(job_id):
+    """
+    Return a job as `{"job_id", "kind", "status", "user_id", ...}`, or None if it does not exist (or expired).
+    Finished jobs also carry `result` and `status_code`, which is what the synchronous route would have
+    answered, and failed jobs an `error`.
+    """
+    job = {key.decode("utf-8"): value.decode("utf-8") for key, value in redis_client.hgetall(_job_key(job_id)).items()}
+    if not job:
+        return None
+    response = {"job_id": job_id, "kind": job["kind"], "status": job["status"], "user_id": int(job["user_id"])}
+    if "result" in job:
+        response["result"] = json.loads(job["result"])
+        response["status_code"] = int(job["status_code"])
+    if "error" in job:
+        response["error"] = job["error"]
+    return response
+
+
+def _finish(job_id, job, fields):
+    """Store the outcome of a job, record its timings and tell subscribers it is done."""
+    started_at = float(job["started_at"])
+    finished_at = time.time()
+    with pipelined(transaction=True) as pipe:
+        pipe.hset(_job_key(job_id), mapping={**fields, "finished_at": finished_at})
+        pipe.expire(_job_key(job_id), JOB_RESULT_TTL)
+        pipe.lrem(RUNNING_KEY, 1, job_id)
+        kind = job["kind"]
+        pipe.hincrby(STATS_KEY, f"{kind}:{fields['status']}", 1)
+        pipe.hincrbyfloat(STATS_KEY, f"{kind}:wait_seconds", started_at - float(job["submitted_at"]))
+        pipe.hincrbyfloat(STATS_KEY, f"{kind}:run_seconds", finished_at - started_at)
+        pipe.publish(DONE_CHANNEL.format(job_id=job_id), fields["status"])
+
+
+def run_one_job(timeout=1):
+    """
+    Wait up to `timeout` seconds for a job and run it. Returns the job id, or None if none came.
+    `timeout` must stay below REDIS_SOCKET_TIMEOUT, or the blocking read is cut off as a timeout.
+    """
+    raw_id = redis_client.blmove(QUEUE_KEY, RUNNING_KEY, timeout, "RIGHT", "LEFT")
+    if raw_id is None:
+        return None
+    job_id = raw_id.decode("utf-8")
+    redis_client.hset(_job_key(job_id), mapping={"status": "running", "started_at": time.time()})
+    job = {key.decode("utf-8"): value.decode("utf-8") for key, value in redis_client.hgetall(_job_key(job_id)).items()}
+    if "kind" not in job:
+        # Expired before anyone got to it
+        redis_client.lrem(RUNNING_KEY, 1, job_id)
+        redis_client.delete(_job_key(job_id))
+        return job_id
+
+    try:
+        body, status = TASKS[job["kind"]](json.loads(job["data"]), fresh=job["fresh"] == "1")
+    except Exception as e:
+        current_app.logger.exception(f"Job {job_id} ({job['kind']}) failed")
+        _finish(job_id, job, {"status": "failed", "error": str(e)})
+    else:
+        _finish(job_id, job, {
+            "status": "done", "result": json.dumps(body, ensure_ascii=False), "status_code": status,
+        })
+    finally:
+        # A worker keeps its app context for life: end the task's transaction and return its connection,
+        # or it stays idle in transaction, holding locks that block migrations and vacuum
+        db.session.remove()
+    return job_id
+
+
+def requeue_stale_jobs():
+    """Queue again the running jobs whose lease ran out, i.e. whose worker died. Returns how many."""
+    requeued = 0
+    now = time.time()
+    for raw_id in redis_client.lrange(RUNNING_KEY, 0, -1):
+        job_id = raw_id.decode("utf-8")
+        exists = redis_client.exists(_job_key(job_id))
+        started_at = redis_client.hget(_job_key(job_id), "started_at")
+        if exists and started_at is None:
+            # Taken, but not marked running yet, or its worker died in between: the lease starts now
+            redis_client.hsetnx(_job_key(job_id), "started_at", now)
+            continue
+        if exists and now - float(started_at) < JOB_LEASE:
+            continue
+        # Only the process that removes it from the running list queues it again
+        if redis_client.lrem(RUNNING_KEY, 1, job_id) and exists:
+            with pipelined(transaction=True) as pipe:
+                pipe.hset(_job_key(job_id), "status", "queued")
+                pipe.hdel(_job_key(job_id), "started_at")
+                pipe.rpush(QUEUE_KEY, job_id)
+            requeued += 1
+    return requeued
+
+
+def run_job_workers(concurrency):
+    """Run `concurrency` worker threads until interrupted, requeueing stale jobs every half minute."""
+    app = current_app._get_current_object()
+
+    def work():
+        with app.app_context():
+            while True:
+                try:
+                    run_one_job()
+                except Exception:
+                    app.logger.exception("Job worker error")
+                    time.sleep(1)
+
+    for _ in range(concurrency):
+        threading.Thread(target=work, daemon=True).start()
+    while True:
+        requeued = requeue_stale_jobs()
+        if requeued:
+            current_app.logger.warning(f"Requeued {requeued} job(s) whose worker stopped")
+        time.sleep(30)
+
+
+def job_metrics():
+    """
+    Queue depth, jobs running, the wait of the oldest queued job, and per kind the number of finished
+    and failed jobs with their average wait (submitted to started) and run time, in seconds.
+    """
+    with pipelined() as pipe:
+        pipe.llen(QUEUE_KEY)
+        pipe.llen(RUNNING_KEY)
+        pipe.lindex(QUEUE_KEY, -1)  # Jobs are taken from the right, so this is the oldest
+        pipe.hgetall(STATS_KEY)
+    queued, running, oldest_id, raw_stats = pipe.results
+
+    oldest_wait = 0.0
+    if oldest_id is not None:
+        submitted_at = redis_client.hget(_job_key(oldest_id.decode("utf-8")), "submitted_at")
+        if submitted_at is not None:
+            oldest_wait = max(0.0, time.time() - float(submitted_at))
+
+    stats = {key.decode("utf-8"): float(value) for key, value in raw_stats.items()}
+    kinds = {}
+    for kind in TASKS:
+        done = int(stats.get(f"{kind}:done", 0))
+        failed = int(stats.get(f"{kind}:failed", 0))
+        finished = done + failed
+        kinds[kind] = {
+            "done": done,
+            "failed": failed,
+            "avg_wait_seconds": stats.get(f"{kind}:wait_seconds", 0.0) / finished if finished else 0.0,
+            "avg_run_seconds": stats.get(f"{kind}:run_seconds", 0.0) / finished if finished else 0.0,
+        }
+    return {"queued": queued, "running": running, "oldest_wait_seconds": oldest_wait, "kinds": kinds}
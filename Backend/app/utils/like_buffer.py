@@ -0,0 +1,199 @@
+import time
+from flask import current_app
+from app.extensions import db, redis_client
+from app.models.models import Recipe, Like
+from app.utils.engagement import apply_like_changes
+from app.utils.recipe_cache import invalidate_recipe_details
+from app.utils.redis_utils import pipelined
+
+# Write-behind likes, enabled with LIKES_WRITE_BEHIND.
+#
+# `recipe:<id>:likers` is the set of users who currently like a recipe. It is loaded from Postgres on
+# first use and answers toggles, counts and "did I like this" checks on its own. Every toggle also
+# records the user's latest state in the `recipe:<id>:likes:pending` hash and marks the recipe dirty.
+# `flush_likes` renames the pending hash to `recipe:<id>:likes:flushing`, applies it to Postgres and
+# only then deletes it, so changes claimed by a flusher that crashed are replayed by the next run.
+LIKERS_KEY = "recipe:{recipe_id}:likers"
+PENDING_KEY = "recipe:{recipe_id}:likes:pending"
+FLUSHING_KEY = "recipe:{recipe_id}:likes:flushing"
+DIRTY_KEY = "likes:dirty"
+
+# Liker sets are dropped after a week without likes and reloaded from Postgres when needed again
+LIKERS_TTL = 7 * 24 * 3600
+
+# Member stored in every liker set so that a loaded recipe without likes still has a key; user ids start at 1
+_SENTINEL = "0"
+
+_LOAD = redis_client.register_script("""
+if redis.call('exists', KEYS[1]) == 1 then
+    return 0
+end
+redis.call('sadd', KEYS[1], ARGV[2])
+for i = 3, #ARGV do
+    redis.call('sadd', KEYS[1], ARGV[i])
+end
+-- Changes not yet in Postgres, oldest first
+for _, key in ipairs({KEYS[3], KEYS[2]}) do
+    local changes = redis.call('hgetall', key)
+    for i = 1, #changes, 2 do
+        if changes[i + 1] == '1' then
+            redis.call('sadd', KEYS[1], changes[i])
+        else
+            redis.call('srem', KEYS[1], changes[i])
+        end
+    end
+end
+redis.call('expire', KEYS[1], ARGV[1])
+return 1
+""")
+
+_TOGGLE = redis_client.register_script("""
+if redis.call('exists', KEYS[1]) == 0 then
+    return false
+end
+local liked = 1
+if redis.call('sismember', KEYS[1], ARGV[1]) == 1 then
+    redis.call('srem', KEYS[1], ARGV[1])
+    liked = 0
+else
+    redis.call('sadd', KEYS[1], ARGV[1])
+end
+redis.call('hset', KEYS[2], ARGV[1], liked)
+redis.call('sadd', KEYS[3], ARGV[2])
+redis.call('expire', KEYS[1], ARGV[3])
+return {liked, redis.call('scard', KEYS[1]) - 1}
+""")
+
+# Hand out the changes to flush: leftovers of an interrupted flush first, otherwise the pending hash
+_CLAIM = redis_client.register_script("""
+if redis.call('exists', KEYS[2]) == 0 then
+    if redis.call('exists', KEYS[1]) == 0 then
+        return {}
+    end
+    redis.call('rename', KEYS[1], KEYS[2])
+end
+return redis.call('hgetall', KEYS[2])
+""")
+
+_FINISH = redis_client.register_script("""
+redis.call('del', KEYS[1])
+if redis.call('exists', KEYS[2]) == 0 then
+    redis.call('srem', KEYS[3], ARGV[1])
+end
+return 1
+""")
+
+
+def _keys(recipe_id):
+    return (
+        LIKERS_KEY.format(recipe_id=recipe_id),
+        PENDING_KEY.format(recipe_id=recipe_id),
+        FLUSHING_KEY.format(recipe_id=recipe_id),
+    )
+
+
+def _load_likers(recipe_id):
+    """Load the liker set of a recipe from Postgres. Returns False if the recipe does not exist."""
+    if not db.session.query(Recipe.query.filter_by(id=recipe_id).exists()).scalar():
+        return False
+    user_ids = [user_id for user_id, in db.session.query(Like.user_id).filter_by(recipe_id=recipe_id)]
+    likers, pending, flushing = _keys(recipe_id)
+    _LOAD(keys=[likers, pending, flushing], args=[LIKERS_TTL, _SENTINEL, *user_ids])
+    return True
+
+
+def toggle_buffered_like(recipe_id, user_id):
+    """
+    Like or unlike a recipe in Redis only. Returns `(liked, likes)`, or None if the recipe does not exist.
+    Postgres catches up on the next `flush_likes`.
+    """
+    likers, pending, _ = _keys(recipe_id)
+    for _attempt in range(2):
+        result = _TOGGLE(keys=[likers, pending, DIRTY_KEY], args=[user_id, recipe_id, LIKERS_TTL])
+        if result is not None:
+            liked, likes = result
+            return bool(liked), likes
+        if not _load_likers(recipe_id):
+            return None
+    raise RuntimeError(f"Could not load the likers of recipe {recipe_id}")
+
+
+def buffered_like_state(recipe_id, user_id):
+    """Return `(liked, likes)` for a user and recipe from the liker set, or None if the recipe does not exist."""
+    likers, _, _ = _keys(recipe_id)
+    if not redis_client.exists(likers) and not _load_likers(recipe_id):
+        return None
+    with pipelined() as pipe:
+        pipe.sismember(likers, user_id)
+        pipe.scard(likers)
+    liked, size = pipe.results
+    return bool(liked), max(size - 1, 0)
+
+
+def buffered_like_count(recipe_id):
+    """The like count of a recipe from its liker set, or None if the set is not loaded."""
+    likers, _, _ = _keys(recipe_id)
+    with pipelined() as pipe:
+        pipe.exists(likers)
+        pipe.scard(likers)
+    loaded, size = pipe.results
+    return max(size - 1, 0) if loaded else None
+
+
+def flush_likes():
+    """
+    Apply the buffered likes of every dirty recipe to Postgres, one transaction per recipe.
+    Returns the number of recipes flushed.
+    """
+    flushed = 0
+    for raw_id in redis_client.smembers(DIRTY_KEY):
+        recipe_id = int(raw_id)
+        likers, pending, flushing = _keys(recipe_id)
+        changes = _CLAIM(keys=[pending, flushing])
+        states = {int(changes[i]): changes[i + 1] == b"1" for i in range(0, len(changes), 2)}
+        if states:
+            liked = [user_id for user_id, state in states.items() if state]
+            unliked = [user_id for user_id, state in states.items() if not state]
+            try:
+                apply_like_changes(recipe_id, liked, unliked)
+                db.session.commit()
+            except Exception:
+                # The changes stay in the flushing hash and are retried on the next run
+                db.session.rollback()
+                current_app.logger.exception(f"Failed to flush likes of recipe {recipe_id}")
+                continue
+            invalidate_recipe_details(recipe_id)
+            flushed += 1
+        _FINISH(keys=[flushing, pending, DIRTY_KEY], args=[recipe_id])
+    return flushed
+
+
+def run_like_flusher(interval):
+    """Flush buffered likes every `interval` seconds until interrupted."""
+    while True:
+        started = time.monotonic()
+        flushed = flush_likes()
+        if flushed:
+            current_app.logger.info(f"Flushed buffered likes of {flushed} recipe(s)")
+        time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+
+def check_buffered_likes(repair=False):
+    """
+    Compare every loaded liker set with the likes table. Recipes with changes still waiting to be
+    flushed are skipped. Returns `{recipe_id: (only_in_redis, only_in_postgres)}` for the sets that
+    disagree; with `repair`, those sets are dropped so they are reloaded from Postgres.
+    """
+    mismatches = {}
+    dirty = {int(raw_id) for raw_id in redis_client.smembers(DIRTY_KEY)}
+    for key in redis_client.scan_iter(match=LIKERS_KEY.format(recipe_id="*"), count=500):
+        recipe_id = int(key.decode("utf-8").split(":")[1])
+        if recipe_id in dirty:
+            continue
+        in_redis = {int(member) for member in redis_client.smembers(key)} - {int(_SENTINEL)}
+        in_postgres = {user_id for user_id, in db.session.query(Like.user_id).filter_by(recipe_id=recipe_id)}
+        if in_redis != in_postgres:
+            mismatches[recipe_id] = (sorted(in_redis - in_postgres), sorted(in_postgres - in_redis))
+            if repair:
+                redis_client.delete(key)
+    return mismatches
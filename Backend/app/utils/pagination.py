@@ -0,0 +1,32 @@
+import base64
+import json
+
+
+def encode_cursor(*values):
+    """Encode the sort key of the last row of a page into an opaque, URL-safe cursor."""
+    raw = json.dumps(list(values), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by `encode_cursor`. Raises ValueError if it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def parse_limit(value, default=20, maximum=100):
+    """Parse a `limit` query parameter, clamping it to [1, maximum]."""
+    if value is None or value == "":
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError) as e:
+        raise ValueError("limit must be an integer") from e
+    return max(1, min(limit, maximum))
@@ -0,0 +1,114 @@
+import os
+import time
+import uuid
+import redis
+from flask import current_app
+from app.utils.redis_utils import redis_client, pipelined
+
+# Serialized GET /recipes/<id> responses, invalidated by every write that changes them.
+# Each recipe has one hash holding a field per response variant (e.g. per `?include=`), so a
+# single DEL drops them all.
+RECIPE_DETAIL_TTL = int(os.getenv("RECIPE_CACHE_TTL", 300))
+RECIPE_DETAIL_KEY = "recipe:{recipe_id}:details"
+
+# Only one worker rebuilds a missing entry; the others wait for it up to LOCK_WAIT seconds
+LOCK_TTL_MS = 5000
+LOCK_WAIT = 2.0
+LOCK_POLL_INTERVAL = 0.05
+
+HITS_KEY = "stats:recipe_cache:hits"
+MISSES_KEY = "stats:recipe_cache:misses"
+
+# Store a rebuilt variant only if no write invalidated the recipe while it was being built.
+# The TTL is set when the hash is created, so variants added later do not extend it.
+_SET_IF_CURRENT = redis_client.register_script("""
+if (redis.call('get', KEYS[2]) or '0') == ARGV[3] then
+    redis.call('hset', KEYS[1], ARGV[1], ARGV[2])
+    if redis.call('ttl', KEYS[1]) < 0 then
+        redis.call('expire', KEYS[1], ARGV[4])
+    end
+    return 1
+end
+return 0
+""")
+
+# Delete the lock only if we still own it
+_RELEASE_LOCK = redis_client.register_script("""
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+""")
+
+
+def _detail_key(recipe_id):
+    return RECIPE_DETAIL_KEY.format(recipe_id=recipe_id)
+
+
+def _generation_key(recipe_id):
+    return f"{_detail_key(recipe_id)}:gen"
+
+
+def get_recipe_detail(recipe_id, build, variant="full"):
+    """
+    Return the serialized detail of a recipe from the cache, calling `build()` on a miss.
+
+    `build` returns the JSON body (str) or None if the recipe does not exist; None is never cached.
+    `variant` names the shape of the body, so differently shaped responses are cached side by side.
+    When the entry is missing, a short Redis lock makes sure a single caller rebuilds it while
+    concurrent callers wait for the result instead of all hitting the database at once.
+    If Redis is unavailable the detail is built directly.
+    """
+    key = _detail_key(recipe_id)
+    try:
+        cached = redis_client.hget(key, variant)
+        if cached is not None:
+            redis_client.incr(HITS_KEY)
+            return cached.decode("utf-8")
+        redis_client.incr(MISSES_KEY)
+
+        token = uuid.uuid4().hex
+        lock_key = f"{key}:lock:{variant}"
+        if not redis_client.set(lock_key, token, nx=True, px=LOCK_TTL_MS):
+            # Someone else is rebuilding this entry; wait for it rather than stampeding the database
+            deadline = time.monotonic() + LOCK_WAIT
+            while time.monotonic() < deadline:
+                time.sleep(LOCK_POLL_INTERVAL)
+                cached = redis_client.hget(key, variant)
+                if cached is not None:
+                    return cached.decode("utf-8")
+            return build()
+
+        try:
+            generation = (redis_client.get(_generation_key(recipe_id)) or b"0").decode("utf-8")
+            body = build()
+            if body is not None:
+                _SET_IF_CURRENT(keys=[key, _generation_key(recipe_id)], args=[variant, body, generation, RECIPE_DETAIL_TTL])
+            return body
+        finally:
+            _RELEASE_LOCK(keys=[lock_key], args=[token])
+    except redis.RedisError as e:
+        current_app.logger.warning(f"Recipe cache unavailable, building recipe {recipe_id} directly: {e}")
+        return build()
+
+
+def invalidate_recipe_details(*recipe_ids):
+    """Drop every cached detail variant of the given recipes. Call after the write has been committed."""
+    if not recipe_ids:
+        return
+    try:
+        with pipelined(transaction=True) as pipe:
+            for recipe_id in recipe_ids:
+                # Bumping the generation stops an in-flight rebuild from storing what it read before the write
+                pipe.incr(_generation_key(recipe_id))
+                pipe.expire(_generation_key(recipe_id), RECIPE_DETAIL_TTL)
+                pipe.delete(_detail_key(recipe_id))
+    except redis.RedisError as e:
+        current_app.logger.warning(f"Failed to invalidate cached recipes {recipe_ids}: {e}")
+
+
+def recipe_cache_stats():
+    """Return the hit and miss counters shared by all workers, and the resulting hit rate."""
+    hits, misses = (int(value or 0) for value in redis_client.mget(HITS_KEY, MISSES_KEY))
+    total = hits + misses
+    return {"hits": hits, "misses": misses, "hit_rate": hits / total if total else 0.0}
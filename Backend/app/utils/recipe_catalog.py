@@ -0,0 +1,266 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import unicodedata
+from collections.abc import Sequence
+from functools import cached_property
+from types import MappingProxyType
+from flask import current_app
+
+
+def normalize_name(name):
+    """Key for case- and whitespace-insensitive name lookups, e.g. "  Tom  Yum " -> "tom yum"."""
+    return " ".join(unicodedata.normalize("NFC", name).casefold().split())
+
+
+class CatalogSnapshot:
+    """
+    One parsed version of a recipe catalog file. Never modified after it is built; a changed file
+    produces a new snapshot instead.
+    """
+
+    def __init__(self, data, key):
+        self.key = key  # (mtime_ns, size) of the file this snapshot was read from
+        self.recipes = tuple(data.get("recipes", []))
+        by_name, by_normalized_name = {}, {}
+        for recipe in self.recipes:
+            name = recipe.get("recipeName")
+            if isinstance(name, str):
+                # The first recipe with a name wins, as with the previous linear scan
+                by_name.setdefault(name, recipe)
+                by_normalized_name.setdefault(normalize_name(name), recipe)
+        self.by_name = MappingProxyType(by_name)
+        self.by_normalized_name = MappingProxyType(by_normalized_name)
+
+    def find(self, name):
+        """Return the recipe named `name`, falling back to a case/whitespace-insensitive match."""
+        recipe = self.by_name.get(name)
+        if recipe is None:
+            recipe = self.by_normalized_name.get(normalize_name(name))
+        return recipe
+
+    @cached_property
+    def recipes_json(self):
+        """The response body listing every recipe, built on first use and reused by every request."""
+        return current_app.json.response(list(self.recipes)).get_data()
+
+
+# Compiled recipe catalog, written by `flask recipes compile-catalog` and memory-mapped by every worker.
+#
+#   header    MAGIC, record count, slots per hash table, source mtime_ns and size
+#   offsets   count + 1 little-endian u64: record i is blobs[offsets[i]:offsets[i + 1]]
+#   by name   `slots` entries of (u64 name hash, u32 record index + 1, 0 when empty), linear probing
+#   by normalized name   same, keyed by `normalize_name(name)`
+#   blobs     UTF-8 JSON of each recipe
+#
+# Pages are shared between workers through the page cache and a record is only decoded when a request
+# needs it.
+MAGIC = b"RCATv001"
+_HEADER = struct.Struct("<8sIIqQ")
+_OFFSET = struct.Struct("<Q")
+_SLOT = struct.Struct("<QI")
+
+
+def _name_hash(name):
+    # Stable across processes, unlike hash()
+    return int.from_bytes(hashlib.blake2b(name.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _build_table(keys, slots):
+    table = bytearray(_SLOT.size * slots)
+    for index, key in keys:
+        if key is None:
+            continue
+        key_hash = _name_hash(key)
+        slot = key_hash & (slots - 1)
+        while True:
+            _, existing = _SLOT.unpack_from(table, slot * _SLOT.size)
+            if not existing:
+                _SLOT.pack_into(table, slot * _SLOT.size, key_hash, index + 1)
+                break
+            slot = (slot + 1) & (slots - 1)
+    return table
+
+
+def compile_catalog(source_path, output_path):
+    """
+    Compile a catalog JSON file (an object with a "recipes" array) into the binary format above.
+    The file is written next to `output_path` and renamed into place, so readers never see it half
+    written. Returns the number of recipes.
+    """
+    stat = os.stat(source_path)
+    with open(source_path, "r", encoding="utf-8-sig") as file:
+        recipes = json.load(file).get("recipes", [])
+
+    blobs = [json.dumps(recipe, ensure_ascii=False, separators=(",", ":")).encode("utf-8") for recipe in recipes]
+    slots = 1
+    while slots < 2 * max(len(recipes), 1):
+        slots *= 2
+
+    names = []
+    for recipe in recipes:
+        name = recipe.get("recipeName")
+        names.append(name if isinstance(name, str) else None)
+    # Inserting in order puts the first recipe with a name earliest on its probe path, so it wins lookups
+    by_name = _build_table(enumerate(names), slots)
+    by_normalized_name = _build_table(
+        ((index, normalize_name(name) if name is not None else None) for index, name in enumerate(names)), slots
+    )
+
+    temporary_path = f"{output_path}.tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(_HEADER.pack(MAGIC, len(recipes), slots, stat.st_mtime_ns, stat.st_size))
+        position = 0
+        for blob in blobs:
+            file.write(_OFFSET.pack(position))
+            position += len(blob)
+        file.write(_OFFSET.pack(position))
+        file.write(by_name)
+        file.write(by_normalized_name)
+        for blob in blobs:
+            file.write(blob)
+    os.replace(temporary_path, output_path)
+    return len(recipes)
+
+
+class _Records(Sequence):
+    """Read-only sequence view of the recipes of a compiled catalog, decoding each record on access."""
+
+    def __init__(self, catalog):
+        self._catalog = catalog
+
+    def __len__(self):
+        return self._catalog.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._catalog.record(i) for i in range(*index.indices(self._catalog.count))]
+        if index < 0:
+            index += self._catalog.count
+        if not 0 <= index < self._catalog.count:
+            raise IndexError(index)
+        return self._catalog.record(index)
+
+
+class CompiledCatalogSnapshot:
+    """
+    A memory-mapped compiled catalog, with the same interface as `CatalogSnapshot`.
+    The whole catalog is never materialized, so `recipes_json` is None and callers stream instead.
+    """
+
+    recipes_json = None
+
+    def __init__(self, path, key):
+        self.key = key
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, self._slots, self.source_mtime_ns, self.source_size = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a compiled recipe catalog")
+        self._offsets = _HEADER.size
+        self._by_name = self._offsets + _OFFSET.size * (self.count + 1)
+        self._by_normalized_name = self._by_name + _SLOT.size * self._slots
+        self._blobs = self._by_normalized_name + _SLOT.size * self._slots
+        self.recipes = _Records(self)
+
+    def record(self, index):
+        start, = _OFFSET.unpack_from(self._map, self._offsets + _OFFSET.size * index)
+        end, = _OFFSET.unpack_from(self._map, self._offsets + _OFFSET.size * (index + 1))
+        return json.loads(self._map[self._blobs + start:self._blobs + end])
+
+    def _lookup(self, table, key, matches):
+        key_hash = _name_hash(key)
+        slot = key_hash & (self._slots - 1)
+        while True:
+            slot_hash, entry = _SLOT.unpack_from(self._map, table + _SLOT.size * slot)
+            if not entry:
+                return None
+            if slot_hash == key_hash:
+                recipe = self.record(entry - 1)
+                if matches(recipe):
+                    return recipe
+            slot = (slot + 1) & (self._slots - 1)
+
+    def find(self, name):
+        """Return the recipe named `name`, falling back to a case/whitespace-insensitive match."""
+        recipe = self._lookup(self._by_name, name, lambda recipe: recipe.get("recipeName") == name)
+        if recipe is None:
+            normalized = normalize_name(name)
+            recipe = self._lookup(
+                self._by_normalized_name, normalized,
+                lambda recipe: isinstance(recipe.get("recipeName"), str)
+                and normalize_name(recipe["recipeName"]) == normalized,
+            )
+        return recipe
+
+
+def _file_key(path):
+    """(mtime_ns, size) of a file, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def compiled_catalog_path(path):
+    """Where `flask recipes compile-catalog` writes the compiled form of the catalog at `path`."""
+    return os.path.splitext(path)[0] + ".rcat"
+
+
+class RecipeCatalog:
+    """
+    Per-worker cache of a recipe catalog JSON file.
+
+    If a compiled catalog built from the current version of the file exists (see `compile_catalog`),
+    it is memory-mapped instead of parsing the JSON. `snapshot()` costs two stat() calls while neither
+    file changes. When one does, the catalog is loaded again and the new snapshot replaces the old one
+    in a single assignment, so requests in flight keep the snapshot they started with.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.compiled_path = compiled_catalog_path(path)
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def snapshot(self):
+        """Return the current snapshot, or None if the file is missing or has never loaded."""
+        source_key = _file_key(self.path)
+        if source_key is None:
+            current_app.logger.error(f"Recipe catalog not found: {self.path}")
+            return None
+        key = (source_key, _file_key(self.compiled_path))
+
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.key == key:
+            return snapshot
+
+        with self._lock:
+            # Another request may have reloaded it while we waited
+            if self._snapshot is not None and self._snapshot.key == key:
+                return self._snapshot
+            if key[1] is not None:
+                try:
+                    compiled = CompiledCatalogSnapshot(self.compiled_path, key)
+                except (OSError, ValueError, struct.error) as e:
+                    current_app.logger.error(f"Could not map compiled recipe catalog {self.compiled_path}: {e}")
+                else:
+                    if (compiled.source_mtime_ns, compiled.source_size) == source_key:
+                        self._snapshot = compiled
+                        current_app.logger.info(f"Mapped {compiled.count} recipes from {self.compiled_path}")
+                        return self._snapshot
+                    current_app.logger.warning(f"Ignoring {self.compiled_path}: it was built from an older {self.path}")
+            try:
+                with open(self.path, "r", encoding="utf-8-sig") as file:
+                    data = json.load(file)
+            except (OSError, json.JSONDecodeError) as e:
+                # Keep serving the last good version, e.g. while the file is being rewritten
+                current_app.logger.error(f"Could not load recipe catalog {self.path}: {e}")
+                return self._snapshot
+            self._snapshot = CatalogSnapshot(data, key)
+            current_app.logger.info(f"Loaded {len(self._snapshot.recipes)} recipes from {self.path}")
+            return self._snapshot
@@ -0,0 +1,42 @@
+from app.extensions import db
+from app.models.models import Recipe
+from app.models.user import User
+
+
+def load_recipe_summaries(recipe_ids):
+    """
+    Load the list-view summary of many recipes in a single query, regardless of how many ids are passed.
+
+    Returns a dict keyed by recipe id with the name, cover image, engagement counts, average rating
+    and creator name of each recipe. Ids that do not exist are left out.
+    """
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return {}
+
+    rows = db.session.query(
+        Recipe.id,
+        Recipe.name,
+        Recipe.cover_image,
+        Recipe.created_at,
+        Recipe.likes_count,
+        Recipe.comments_count,
+        Recipe.favorites_count,
+        Recipe.average_rating.label("average_rating"),
+        User.name.label("creator_name"),
+    ).outerjoin(User, User.id == Recipe.created_by).filter(Recipe.id.in_(recipe_ids)).all()
+
+    return {
+        row.id: {
+            "id": row.id,
+            "name": row.name,
+            "cover_image": row.cover_image,
+            "created_at": row.created_at,
+            "likes": row.likes_count,
+            "comments": row.comments_count,
+            "favorites": row.favorites_count,
+            "average_rating": row.average_rating,
+            "creator_name": row.creator_name or "Anonymous",
+        }
+        for row in rows
+    }
@@ -0,0 +1,122 @@
+import re
+
+# The markdown recipe template that /gemini/generate asks Gemini to answer in (see generation_prompt),
+# and its JSON form, the body /gemini/parse answers with. parse_recipe_markdown() reads the content of
+# the template locally, so text that already follows it needs no Gemini call to be structured; its
+# safety section is not read, since the text is submitted by the client. render_recipe_markdown() writes
+# the template from a recipe Gemini returned as JSON.
+
+# Section headings of the template and the JSON field each fills; the safety sections are only written
+_SECTIONS = {
+    "ชื่อเมนู": "menuName",
+    "หมวดหมู่": "category",
+    "แท็ก": "tags",
+    "ส่วนผสม": "ingredients",
+    "วิธีทำ": "instructions",
+    "ลักษณะภายนอก": "characteristics",
+    "รสชาติ": "flavors",
+    "คำอธิบายเมนู": "description",
+    "ความปลอดภัย": "safety",
+    "เหตุผล": "reason",
+    "วิธีแก้ไข": "fix",
+}
+_LIST_FIELDS = ("tags", "ingredients", "instructions")
+# Without these the text is not a complete recipe, and /gemini/parse asks Gemini instead
+_REQUIRED_FIELDS = ("menuName", "category", "ingredients", "instructions", "characteristics", "flavors")
+_SAFETY_FIELDS = ("safety", "reason", "fix")
+
+_LABELS = "|".join(sorted(map(re.escape, _SECTIONS), key=len, reverse=True))
+# "**ชื่อเมนู:** ต้มยำกุ้ง", "**ชื่อเมนู**: ต้มยำกุ้ง" or "## ชื่อเมนู: ต้มยำกุ้ง"
+_HEADING_RE = re.compile(
+    rf"^\s*(?:#+\s*)?\*\*\s*({_LABELS})\s*[:：]?\s*\*\*\s*[:：]?\s*(.*)$"
+    rf"|^\s*#+\s*({_LABELS})\s*[:：]?\s*(.*)$"
+)
+# Any other heading, e.g. "**หมายเหตุ:**", ends the current section
+_OTHER_HEADING_RE = re.compile(r"^\s*(?:#+\s|\*\*[^*]+[:：]\s*\*\*)")
+_BULLET_RE = re.compile(r"^\s*(?:[-*•]|[0-9๐-๙]+[.)])\s+")
+_TAG_SEPARATORS_RE = re.compile(r"\s*[,，、]\s*")
+_EMPTY_VALUES = ("", "-", "–", "ไม่มี")
+
+_SAFE, _NOT_SAFE = "ปลอดภัย", "ไม่ปลอดภัย"
+
+
+def _sections(text):
+    """Split `text` into {field: [lines]} by template heading. Lines before the first heading are dropped."""
+    sections = {}
+    lines = None
+    for line in text.splitlines():
+        match = _HEADING_RE.match(line)
+        if match:
+            label = match.group(1) or match.group(3)
+            lines = sections.setdefault(_SECTIONS[label], [])
+            line = match.group(2) if match.group(1) else match.group(4)
+        elif _OTHER_HEADING_RE.match(line):
+            lines = None
+        if lines is not None:
+            line = line.replace("**", "").strip()
+            if line:
+                lines.append(line)
+    return sections
+
+
+def parse_recipe_markdown(text):
+    """
+    Parse a recipe in the generation template into the content of the /gemini/parse body: menuName,
+    category, tags, ingredients, instructions, characteristics, flavors and description. Its safety
+    section is ignored; the caller decides danger_check. Returns None if `text` does not follow the
+    template closely enough, e.g. a section is missing.
+    """
+    sections = _sections(text)
+    recipe = {}
+    for field, lines in sections.items():
+        if field in _SAFETY_FIELDS:
+            continue
+        if field in _LIST_FIELDS:
+            if field == "tags":
+                items = [tag for line in lines for tag in _TAG_SEPARATORS_RE.split(_BULLET_RE.sub("", line))]
+            else:
+                items = [_BULLET_RE.sub("", line) for line in lines]
+            recipe[field] = [item for item in items if item not in _EMPTY_VALUES]
+        else:
+            value = " ".join(lines)
+            recipe[field] = "" if value in _EMPTY_VALUES else value
+
+    if not all(recipe.get(field) for field in _REQUIRED_FIELDS):
+        return None
+
+    recipe.setdefault("tags", [])
+    recipe.setdefault("description", "")
+    return recipe
+
+
+def render_recipe_markdown(recipe):
+    """Write a recipe in the /gemini/parse shape as text in the generation template."""
+    danger_check = recipe.get("danger_check") or {}
+    not_safe = str(danger_check.get("status", "")).lower() == "not safe"
+    lines = [
+        f"**ชื่อเมนู:** {recipe.get('menuName', '')}",
+        "",
+        f"**หมวดหมู่:** {recipe.get('category', '')}",
+        "",
+        f"**แท็ก:** {', '.join(recipe.get('tags') or [])}",
+        "",
+        "**ส่วนผสม:**",
+        *(f"- {ingredient}" for ingredient in recipe.get("ingredients") or []),
+        "",
+        "**วิธีทำ:**",
+        *(f"{number}. {step}" for number, step in enumerate(recipe.get("instructions") or [], start=1)),
+        "",
+        f"**ลักษณะภายนอก:** {recipe.get('characteristics', '')}",
+        "",
+        f"**รสชาติ:** {recipe.get('flavors', '')}",
+        "",
+        f"**คำอธิบายเมนู:** {recipe.get('description', '')}",
+        "",
+        f"**ความปลอดภัย:** {_NOT_SAFE if not_safe else _SAFE}",
+    ]
+    if not_safe:
+        lines += [
+            f"**เหตุผล:** {danger_check.get('reason') or '-'}",
+            f"**วิธีแก้ไข:** {danger_check.get('fix') or '-'}",
+        ]
+    return "\n".join(lines)
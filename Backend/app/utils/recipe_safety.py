@@ -0,0 +1,250 @@
+import difflib
+import hashlib
+import json
+import re
+import unicodedata
+import redis
+from flask import current_app
+from app.extensions import db
+from app.models.models import Recipe, RecipeIngredient, to_lines
+from app.utils.ingredients import normalize_ingredient
+from app.utils.redis_utils import redis_client, pipelined
+
+# Local stages of the /gemini/check safety checks, run before Gemini is asked:
+#
+# 1. Verdicts are memoized in Redis by a hash of the canonical recipe content, so an unchanged recipe
+#    is never checked twice (for GEMINI_CHECK_VERDICT_TTL seconds).
+# 2. The recipe text is scanned once for every entry of BLOCKED_TERMS and CAUTION_TERMS (Aho-Corasick),
+#    and for cooking "until black/burnt" (BURNT_RE). A blocked term rejects the recipe without asking Gemini.
+# 3. With GEMINI_CHECK_FAST_PATH on, a recipe with no caution term whose ingredients all already occur in
+#    our recipes (the ingredient index) is passed without asking Gemini. Everything else goes to Gemini.
+#
+# Edited recipes are checked line by line: every ingredient and instruction line Gemini judged is kept
+# under the hash of its text, and only lines without a kept verdict are sent again (see run_check_edit
+# in app/utils/gemini_tasks.py). Stored recipes are not trusted as checked, since they can be saved or
+# imported without a check.
+VERDICT_KEY = "check:verdict:{kind}:{digest}"
+LINE_VERDICT_KEY = "check:line:{section}:{digest}"
+
+# Illegal, poisonous or inedible ingredients and dangerous instructions: a recipe mentioning one is unsafe
+BLOCKED_TERMS = (
+    # Narcotics. Kratom is written both ways; plain "กระท่อม" is also a hut, as in "ข้าวผัดกระท่อม"
+    "กัญชา", "กะท่อม", "ใบกระท่อม", "น้ำกระท่อม", "น้ำต้มกระท่อม", "ยาบ้า", "ยาไอซ์", "เฮโรอีน", "โคเคน", "ฝิ่น", "เห็ดขี้ควาย", "ยาเสพติด",
+    "cannabis", "marijuana", "kratom", "cocaine", "heroin", "opium", "methamphetamine",
+    # Poisons and chemicals
+    "ยาพิษ", "ยาฆ่า", "ยาเบื่อ", "สารหนู", "ไซยาไนด์", "ฟอร์มาลีน", "ฟอร์มาลิน", "บอแรกซ์", "บอแร็กซ์",
+    "น้ำยาล้างจาน", "น้ำยาฟอกขาว", "สารฟอกขาว", "ผงซักฟอก", "น้ำมันเครื่อง", "ปลาปักเป้า", "คางคก", "แมงดาถ้วย", "เห็ดพิษ", "เห็ดระโงกหิน",
+    "poison", "pesticide", "insecticide", "bleach", "arsenic", "cyanide", "formalin", "detergent",
+    # Not food
+    "ใส่ระเบิด", "ดินระเบิด", "ดินปืน", "เศษแก้ว", "explosive", "gunpowder",
+)
+
+# Cooked until black or burnt, however it is worded: "ทอดจนดำ", "ทอดหมูจนสีดำ", "ย่างจนไหม้เกรียม". Matched
+# on folded text, within a line; the gap is kept short so that e.g. "ทอดจนเหลืองแล้วโรยงาดำ" is not a match.
+BURNT_RE = re.compile(r"(?:ทอด|ย่าง|เผา|ปิ้ง|คั่ว|ผัด|อบ|ต้ม|เคี่ยว)[^|]{0,12}?จน[^|]{0,6}?(?:ดำ|ไหม้|เกรียม)")
+
+# Not unsafe in themselves, but a recipe mentioning one is always checked by Gemini
+CAUTION_TERMS = (
+    "ดิบ", "ไม่ต้องปรุงสุก", "ไม่ต้องล้าง", "ไหม้", "เหล้า", "แอลกอฮอล์", "ไวน์", "เบียร์", "ยาดอง", "ยานอนหลับ",
+    "สมุนไพรจีน", "เห็ดป่า", "หอยดิบ", "ก้อย", "ปลาร้า", "หมักค้างคืน", "สารกันบูด", "raw", "alcohol", "wine",
+    "beer", "vodka", "rum", "whisky",
+)
+
+_IGNORED_CHARACTERS = dict.fromkeys(map(ord, " \t\r\n\u200b\u200c\u200d\ufeff"))  # Whitespace and zero-width
+_BULLET_RE = re.compile(r"^(?:[-*•]|[0-9๐-๙]+[.)])\s*")
+
+
+def _fold(text):
+    """NFC, lowercase, without whitespace: Thai is written without spaces, so "ใบ กระท่อม" still matches."""
+    return unicodedata.normalize("NFC", text).lower().translate(_IGNORED_CHARACTERS)
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton: finds which of many keywords occur in a text in one pass over it."""
+
+    def __init__(self, keywords):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+        for keyword in keywords:
+            self._add(_fold(keyword), keyword)
+        self._link()
+
+    def _add(self, folded, keyword):
+        state = 0
+        for char in folded:
+            if char not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+                self._goto[state][char] = len(self._goto) - 1
+            state = self._goto[state][char]
+        self._output[state] += (keyword,)
+
+    def _link(self):
+        """Set the failure links breadth-first, merging each state's outputs with its failure state's."""
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, child in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] += self._output[self._fail[child]]
+                queue.append(child)
+
+    def find(self, text):
+        """Return the set of keywords occurring in `text`."""
+        found = set()
+        state = 0
+        for char in _fold(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            found.update(self._output[state])
+        return found
+
+
+_blocked = KeywordMatcher(BLOCKED_TERMS)
+_caution = KeywordMatcher(CAUTION_TERMS)
+
+
+def canonical_line(line):
+    """A recipe line without bullet or numbering, whitespace collapsed."""
+    return _BULLET_RE.sub("", " ".join(unicodedata.normalize("NFC", str(line)).split()))
+
+
+def canonical_content(fields):
+    """
+    Canonical JSON of the safety-relevant `fields` of a recipe ({name: str or list of str}): whitespace
+    collapsed, list bullets and numbering dropped, tags sorted. Recipes that differ only in formatting
+    have the same canonical content.
+    """
+    canonical = {}
+    for name, value in sorted(fields.items()):
+        if isinstance(value, (list, tuple)):
+            items = [item for item in map(canonical_line, value) if item]
+            canonical[name] = sorted(items) if name == "tags" else items
+        else:
+            canonical[name] = canonical_line(value)
+    return json.dumps(canonical, ensure_ascii=False, separators=(",", ":"))
+
+
+def _verdict_key(kind, content):
+    return VERDICT_KEY.format(kind=kind, digest=hashlib.sha256(content.encode("utf-8")).hexdigest())
+
+
+def memoized_verdict(kind, content):
+    """The verdict stored for `content` by a previous `kind` check, or None."""
+    try:
+        cached = redis_client.get(_verdict_key(kind, content))
+    except redis.RedisError as e:
+        current_app.logger.warning(f"Safety verdict cache unavailable: {e}")
+        return None
+    return json.loads(cached) if cached is not None else None
+
+
+def memoize_verdict(kind, content, verdict):
+    try:
+        redis_client.set(
+            _verdict_key(kind, content), json.dumps(verdict, ensure_ascii=False),
+            ex=current_app.config["GEMINI_CHECK_VERDICT_TTL"],
+        )
+    except redis.RedisError as e:
+        current_app.logger.warning(f"Could not store safety verdict: {e}")
+
+
+def _line_verdict_key(section, line):
+    digest = hashlib.sha256(canonical_line(line).encode("utf-8")).hexdigest()
+    return LINE_VERDICT_KEY.format(section=section, digest=digest)
+
+
+def line_verdicts(section, lines):
+    """
+    The verdicts `{"is_safe", "reason"}` stored for `lines` of `section` ("ingredients" or
+    "instructions"), in one round trip. Returns a list aligned with `lines`, None where there is none.
+    """
+    if not lines:
+        return []
+    try:
+        values = redis_client.mget([_line_verdict_key(section, line) for line in lines])
+    except redis.RedisError as e:
+        current_app.logger.warning(f"Safety verdict cache unavailable: {e}")
+        return [None] * len(lines)
+    return [json.loads(value) if value is not None else None for value in values]
+
+
+def memoize_line_verdicts(section, verdicts):
+    """Store `{line: verdict}` of `section` for later edits."""
+    if not verdicts:
+        return
+    try:
+        with pipelined() as pipe:
+            for line, verdict in verdicts.items():
+                pipe.set(
+                    _line_verdict_key(section, line), json.dumps(verdict, ensure_ascii=False),
+                    ex=current_app.config["GEMINI_CHECK_VERDICT_TTL"],
+                )
+    except redis.RedisError as e:
+        current_app.logger.warning(f"Could not store safety verdicts: {e}")
+
+
+def stored_recipe_lines(recipe_id):
+    """`{"name", "ingredients", "instructions"}` of the stored recipe `recipe_id`, or None if there is none."""
+    try:
+        recipe_id = int(recipe_id)
+    except (TypeError, ValueError):
+        return None
+    recipe = db.session.query(Recipe.name, Recipe.ingredients, Recipe.instructions).filter(
+        Recipe.id == recipe_id
+    ).first()
+    if recipe is None:
+        return None
+    return {
+        "name": recipe.name,
+        "ingredients": to_lines(recipe.ingredients),
+        "instructions": to_lines(recipe.instructions),
+    }
+
+
+def replaced_lines(old_lines, new_lines):
+    """`{index in new_lines: line of old_lines it replaces}` for the lines the diff from `old_lines` rewrote."""
+    matcher = difflib.SequenceMatcher(
+        a=[canonical_line(line) for line in old_lines], b=[canonical_line(line) for line in new_lines], autojunk=False
+    )
+    return {
+        new_index: old_lines[old_index]
+        for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes() if tag == "replace"
+        for old_index, new_index in zip(range(old_start, old_end), range(new_start, new_end))
+    }
+
+
+def _all_ingredients_known(ingredients):
+    names = {normalize_ingredient(line) for line in ingredients} - {""}
+    if not names:
+        return False
+    known = db.session.query(RecipeIngredient.ingredient).filter(
+        RecipeIngredient.ingredient.in_(names)
+    ).distinct().count()
+    return known == len(names)
+
+
+def screen_recipe(text, ingredients):
+    """
+    Screen a recipe locally. `text` is all of its text, `ingredients` its ingredient lines. Returns a
+    verdict `{"is_safe", "reason", "checked_by"}`, or None if Gemini has to decide.
+    """
+    blocked = _blocked.find(text) | {match.group(0) for match in BURNT_RE.finditer(_fold(text))}
+    if blocked:
+        return {
+            "is_safe": False,
+            "reason": f"พบส่วนผสมหรือคำแนะนำที่ไม่ปลอดภัย: {', '.join(sorted(blocked))}",
+            "checked_by": "blocklist",
+        }
+    if (
+        current_app.config["GEMINI_CHECK_FAST_PATH"]
+        and not _caution.find(text)
+        and _all_ingredients_known(ingredients)
+    ):
+        return {"is_safe": True, "reason": "", "checked_by": "fast-path"}
+    return None
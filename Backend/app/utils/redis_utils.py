@@ -1,12 +1,97 @@
-from app import redis_client
 import json
+import os
+from contextlib import contextmanager
+import redis
+from redis.backoff import ExponentialBackoff
+from redis.retry import Retry
+
+# The one Redis client of the backend. Every module, Flask-Session included, goes through
+# `redis_client`, so the whole process shares a single connection pool.
+#
+# REDIS_BACKEND selects the implementation before anything imports the client:
+#   redis      a real server at REDIS_HOST:REDIS_PORT/REDIS_DB (default)
+#   fakeredis  an in-process stand-in for tests and benchmarks; needs the fakeredis and lupa packages,
+#              which are not in requirements.txt
+REDIS_BACKENDS = ("redis", "fakeredis")
+
+
+def _env_float(name, default):
+    return float(os.getenv(name, default))
+
+
+def create_connection_pool():
+    """
+    A blocking pool: when all REDIS_MAX_CONNECTIONS connections are busy, callers wait up to
+    REDIS_POOL_TIMEOUT seconds for one instead of opening more. Commands that fail on a dropped
+    connection are retried REDIS_RETRIES times with exponential backoff. Timeouts are not retried: the
+    server may have run the command already, and running a write such as a like toggle, a job submission
+    or a counter increment twice would change its outcome.
+    """
+    return redis.BlockingConnectionPool(
+        host=os.getenv("REDIS_HOST", "localhost"),
+        port=int(os.getenv("REDIS_PORT", 6379)),
+        db=int(os.getenv("REDIS_DB", 0)),
+        max_connections=int(os.getenv("REDIS_MAX_CONNECTIONS", 50)),
+        timeout=_env_float("REDIS_POOL_TIMEOUT", 5),
+        socket_timeout=_env_float("REDIS_SOCKET_TIMEOUT", 2),
+        socket_connect_timeout=_env_float("REDIS_CONNECT_TIMEOUT", 2),
+        socket_keepalive=True,
+        health_check_interval=int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", 30)),
+        retry=Retry(
+            ExponentialBackoff(cap=1.0, base=0.05), int(os.getenv("REDIS_RETRIES", 3)),
+            supported_errors=(redis.ConnectionError,),
+        ),
+        retry_on_error=[redis.ConnectionError],
+    )
+
+
+def create_redis_client(backend=None):
+    """Build a client for `backend` (default: REDIS_BACKEND)."""
+    backend = backend or os.getenv("REDIS_BACKEND", "redis")
+    if backend == "redis":
+        return redis.StrictRedis(connection_pool=create_connection_pool())
+    if backend == "fakeredis":
+        try:
+            import fakeredis
+        except ImportError:
+            raise RuntimeError("REDIS_BACKEND=fakeredis requires the fakeredis package") from None
+        return fakeredis.FakeStrictRedis()
+    raise ValueError(f"Unknown REDIS_BACKEND {backend!r}, expected one of {', '.join(REDIS_BACKENDS)}")
+
+
+redis_client = create_redis_client()
+
+
+@contextmanager
+def pipelined(transaction=False):
+    """
+    Queue commands on a pipeline and send them in a single round trip when the block exits:
+
+        with pipelined() as pipe:
+            pipe.sismember(likers, user_id)
+            pipe.scard(likers)
+        liked, size = pipe.results
+
+    Nothing is sent if the block raises. Pass `transaction=True` to wrap the commands in MULTI/EXEC.
+    """
+    with redis_client.pipeline(transaction=transaction) as pipe:
+        yield pipe
+        pipe.results = pipe.execute()
+
+
+def get_json(key):
+    """Return the JSON value stored at `key`, or None if the key does not exist."""
+    data = redis_client.get(key)
+    if data is None:
+        return None
+    return json.loads(data)
+
 
 def store_session_in_redis(user_id, session_data, ttl=3600):
     session_key = f"user:{user_id}"
     redis_client.setex(session_key, ttl, json.dumps(session_data))
+    return session_key
+
 
 def get_session_from_redis(session_id):
-    data = redis_client.get(session_id)
-    if data:
-        return json.loads(data)
-    return None
+    return get_json(session_id)
@@ -0,0 +1,131 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import secrets
+import threading
+import time
+from functools import lru_cache
+from flask import current_app
+from app.utils.redis_utils import redis_client, pipelined
+
+# Signed sessions, enabled with AUTH_SESSION_MODE=signed.
+#
+# The session cookie holds `<payload>.<signature>`: the base64url JSON of the user (id, name, email,
+# picture), a random token id and the expiry time, and its base64url HMAC-SHA256 under a key derived
+# from SECRET_KEY. A request is authenticated by checking the signature locally.
+# Logging out adds the token id to the `sessions:revoked` sorted set, scored by the time the token
+# would have expired anyway. Every worker keeps a copy of that set in memory and refreshes it at most
+# every AUTH_REVOCATION_REFRESH seconds, so Redis is not on the request path.
+REVOKED_KEY = "sessions:revoked"
+
+_KEY_CONTEXT = b"session-token:"
+# The SECRET_KEY default of config.py: anyone who knows it can sign a session for any user
+_DEFAULT_SECRET_KEY = "your-secret-key"
+
+
+def check_session_mode(config):
+    """Refuse to start with signed sessions unless SECRET_KEY (FLASK_SECRET_KEY) is set to a real secret."""
+    if config["AUTH_SESSION_MODE"] != "signed":
+        return
+    if not config.get("SECRET_KEY") or config["SECRET_KEY"] == _DEFAULT_SECRET_KEY:
+        raise RuntimeError("AUTH_SESSION_MODE=signed requires FLASK_SECRET_KEY to be set to a secret value")
+
+
+@lru_cache(maxsize=4)
+def _signing_key(secret_key):
+    return hashlib.sha256(_KEY_CONTEXT + str(secret_key).encode("utf-8")).digest()
+
+
+def _sign(body):
+    key = _signing_key(current_app.config["SECRET_KEY"])
+    return base64.urlsafe_b64encode(hmac.new(key, body, hashlib.sha256).digest()).rstrip(b"=")
+
+
+def issue_session_token(user):
+    """Return a signed session token for `user` (a User or SessionUser)."""
+    payload = {
+        "id": user.id,
+        "name": user.name,
+        "email": user.email,
+        "picture": user.picture,
+        "jti": secrets.token_urlsafe(12),
+        "exp": int(time.time()) + current_app.config["AUTH_SESSION_MAX_AGE"],
+    }
+    body = base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8")).rstrip(b"=")
+    return (body + b"." + _sign(body)).decode("ascii")
+
+
+def _verify(token):
+    """Return the payload of a validly signed, unexpired token, or None."""
+    try:
+        body, signature = token.encode("ascii").split(b".")
+        if not hmac.compare_digest(signature, _sign(body)):
+            return None
+        payload = json.loads(base64.urlsafe_b64decode(body + b"=" * (-len(body) % 4)))
+    except (ValueError, binascii.Error):  # Not ASCII, not two parts or not base64 JSON
+        return None
+    if not isinstance(payload, dict):
+        return None
+    expires_at = payload.get("exp")
+    # Anything but a number (a bool is an int too) is as invalid as a past time
+    if not isinstance(expires_at, (int, float)) or isinstance(expires_at, bool) or expires_at < time.time():
+        return None
+    return payload
+
+
+class _Revocations:
+    """This worker's copy of the revoked token ids, reloaded from Redis every AUTH_REVOCATION_REFRESH seconds."""
+
+    def __init__(self):
+        self._revoked = frozenset()
+        self._refresh_at = 0.0
+        self._lock = threading.Lock()
+
+    def contains(self, jti):
+        if time.monotonic() >= self._refresh_at and self._lock.acquire(blocking=False):
+            # One request per worker refreshes; the others keep using the current copy meanwhile
+            try:
+                self._refresh()
+            finally:
+                self._lock.release()
+        return jti in self._revoked
+
+    def _refresh(self):
+        now = time.time()
+        try:
+            with pipelined(transaction=True) as pipe:
+                pipe.zremrangebyscore(REVOKED_KEY, "-inf", now)  # Those tokens have expired by now
+                pipe.zrange(REVOKED_KEY, 0, -1)
+            self._revoked = frozenset(member.decode("utf-8") for member in pipe.results[1])
+        except Exception as e:
+            # Keep the last known set and try again after the next interval
+            current_app.logger.warning(f"Could not refresh revoked sessions: {e}")
+        self._refresh_at = time.monotonic() + current_app.config["AUTH_REVOCATION_REFRESH"]
+
+    def add(self, jti):
+        self._revoked = self._revoked | {jti}
+
+
+_revocations = _Revocations()
+
+
+def read_session_token(token):
+    """Return the user payload of a valid, unrevoked session token, or None."""
+    payload = _verify(token)
+    if payload is None or _revocations.contains(payload.get("jti")):
+        return None
+    return payload
+
+
+def revoke_session_token(token):
+    """
+    Revoke a session token. This worker rejects it immediately, other workers after their next refresh.
+    Tokens that are invalid or expired already need no revocation.
+    """
+    payload = _verify(token)
+    if payload is None:
+        return
+    redis_client.zadd(REVOKED_KEY, {payload["jti"]: payload["exp"]})
+    _revocations.add(payload["jti"])
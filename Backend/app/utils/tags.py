@@ -0,0 +1,46 @@
+import json
+from app.extensions import db
+from app.models.models import RecipeTag
+
+# Length of recipe_tags.tag; longer tags are indexed cut to it
+MAX_TAG_LENGTH = 100
+
+
+def split_tags(value):
+    """
+    Turn a stored `Recipe.tags` value into a list of tags.
+
+    Tags are stored comma-separated by the recipe routes; older rows may hold a JSON array.
+    Only values that look like a JSON array are decoded, so plain text never raises.
+    """
+    if not value:
+        return []
+    if isinstance(value, list):
+        return [tag.strip() for tag in value if isinstance(tag, str) and tag.strip()]
+    value = value.strip()
+    if value.startswith("["):
+        try:
+            return split_tags(json.loads(value))
+        except json.JSONDecodeError:
+            pass
+    return [tag.strip() for tag in value.split(",") if tag.strip()]
+
+
+def indexed_tags(value):
+    """
+    The distinct tags of a stored `Recipe.tags` value as recipe_tags holds them: cut to MAX_TAG_LENGTH
+    first, so long tags sharing a prefix become one row rather than a duplicate key.
+    """
+    return list(dict.fromkeys(tag[:MAX_TAG_LENGTH] for tag in split_tags(value)))
+
+
+def index_recipe_tags(recipe):
+    """
+    Replace the recipe_tags rows of `recipe` with the tags currently stored on it.
+    Runs in the current transaction; the caller commits.
+    """
+    RecipeTag.query.filter_by(recipe_id=recipe.id).delete(synchronize_session=False)
+    db.session.add_all(
+        RecipeTag(recipe_id=recipe.id, tag=tag)
+        for tag in indexed_tags(recipe.tags)
+    )
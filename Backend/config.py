@@ -1,5 +1,5 @@
 import os
-import redis
+from app.utils.redis_utils import redis_client
 
 class Config:
     SECRET_KEY = os.getenv('FLASK_SECRET_KEY', 'your-secret-key')
@@ -8,8 +8,28 @@ class Config:
     SESSION_TYPE = 'redis'
     SESSION_PERMANENT = False
     SESSION_USE_SIGNER = True
-    SESSION_REDIS = redis.StrictRedis(
-        host=os.getenv('REDIS_HOST', 'localhost'),
-        port=int(os.getenv('REDIS_PORT', 6379)),
-        db=int(os.getenv('REDIS_DB', 0))
-    )
+    # Same client and connection pool as the rest of the app; pool size, timeouts and retries are
+    # configured through the REDIS_* environment variables read in app/utils/redis_utils.py
+    SESSION_REDIS = redis_client
+
+    # Opt-in write-behind likes: toggles go to Redis and `flask recipes flush-likes` applies them
+    # to Postgres every LIKES_FLUSH_INTERVAL seconds (see app/utils/like_buffer.py)
+    LIKES_WRITE_BEHIND = os.getenv('LIKES_WRITE_BEHIND', 'false').lower() in ('1', 'true', 'yes')
+    LIKES_FLUSH_INTERVAL = float(os.getenv('LIKES_FLUSH_INTERVAL', 5))
+
+    # Decoded login sessions are cached per worker for this many seconds (0 disables the cache), so an
+    # authenticated request usually needs no Redis round trip (see app/utils/current_user.py)
+    AUTH_SESSION_CACHE_TTL = float(os.getenv('AUTH_SESSION_CACHE_TTL', 5))
+    AUTH_SESSION_CACHE_SIZE = int(os.getenv('AUTH_SESSION_CACHE_SIZE', 4096))
+
+    # "redis" keeps sessions in Redis under the session_id cookie; "signed" puts an HMAC-signed token in
+    # the cookie instead, verified without Redis (see app/utils/session_tokens.py)
+    AUTH_SESSION_MODE = os.getenv('AUTH_SESSION_MODE', 'redis')
+    AUTH_SESSION_MAX_AGE = int(os.getenv('AUTH_SESSION_MAX_AGE', 3600))
+    # How often each worker reloads the revoked signed sessions from Redis
+    AUTH_REVOCATION_REFRESH = float(os.getenv('AUTH_REVOCATION_REFRESH', 5))
+
+    # /gemini/check verdicts are kept this long per recipe content (see app/utils/recipe_safety.py).
+    # With the fast path on, recipes with only known ingredients and no caution terms skip Gemini.
+    GEMINI_CHECK_VERDICT_TTL = int(os.getenv('GEMINI_CHECK_VERDICT_TTL', 7 * 24 * 3600))
+    GEMINI_CHECK_FAST_PATH = os.getenv('GEMINI_CHECK_FAST_PATH', 'false').lower() in ('1', 'true', 'yes')
@@ -10,5 +10,8 @@ done
 flask db migrate
 flask db upgrade
 
+# Compile the /based recipes catalog so workers memory-map it instead of parsing the JSON
+flask recipes compile-catalog
+
 # Start the Flask application
 exec flask run --host=0.0.0.0
\ No newline at end of file
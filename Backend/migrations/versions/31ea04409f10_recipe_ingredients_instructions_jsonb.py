@@ -0,0 +1,105 @@
+"""recipe ingredients and instructions as jsonb
+
+Revision ID: 31ea04409f10
+Revises: 3548e42d6d39
+Create Date: 2026-10-18 15:20:41.512307
+
+"""
+import json
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '31ea04409f10'
+down_revision = '3548e42d6d39'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+
+SEARCH_DOCUMENT_TEXT = "lower(coalesce(name, '') || ' ' || coalesce(category, '') || ' ' || coalesce(tags, '') || ' ' || coalesce(characteristics, '') || ' ' || coalesce(flavors, '') || ' ' || coalesce(ingredients, '') || ' ' || coalesce(instructions, ''))"
+SEARCH_DOCUMENT_JSONB = "lower(coalesce(name, '') || ' ' || coalesce(category, '') || ' ' || coalesce(tags, '') || ' ' || coalesce(characteristics, '') || ' ' || coalesce(flavors, '') || ' ' || coalesce(ingredients::text, '') || ' ' || coalesce(instructions::text, ''))"
+
+
+def _to_lines(value):
+    # Rows were written as newline-separated text; a few older ones hold a JSON array
+    if not value:
+        return []
+    if value.lstrip().startswith('['):
+        try:
+            return [str(line).strip() for line in json.loads(value) if str(line).strip()]
+        except ValueError:
+            pass
+    return [line.strip() for line in value.split('\n') if line.strip()]
+
+
+def _drop_search_document():
+    # Dropping the column drops its trigram index with it
+    with op.batch_alter_table('recipes', schema=None) as batch_op:
+        batch_op.drop_column('search_document')
+
+
+def _add_search_document(expression):
+    with op.batch_alter_table('recipes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('search_document', sa.Text(), sa.Computed(expression, persisted=True), nullable=True))
+        batch_op.create_index('ix_recipes_search_document_trgm', ['search_document'], unique=False, postgresql_using='gin', postgresql_ops={'search_document': 'gin_trgm_ops'})
+
+
+def _convert(from_type, to_type, convert):
+    """Copy ingredients/instructions into columns of `to_type` batch by batch, then swap them in."""
+    with op.batch_alter_table('recipes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('ingredients_new', to_type, nullable=True))
+        batch_op.add_column(sa.Column('instructions_new', to_type, nullable=True))
+
+    recipes = sa.table(
+        'recipes',
+        sa.column('id', sa.Integer),
+        sa.column('ingredients', from_type),
+        sa.column('instructions', from_type),
+        sa.column('ingredients_new', to_type),
+        sa.column('instructions_new', to_type),
+    )
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(recipes.c.id, recipes.c.ingredients, recipes.c.instructions)
+            .where(recipes.c.id > last_id).order_by(recipes.c.id).limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        bind.execute(
+            recipes.update().where(recipes.c.id == sa.bindparam('row_id')).values(
+                ingredients_new=sa.bindparam('ingredients_value'),
+                instructions_new=sa.bindparam('instructions_value'),
+            ),
+            [
+                {
+                    'row_id': row.id,
+                    'ingredients_value': convert(row.ingredients),
+                    'instructions_value': convert(row.instructions),
+                }
+                for row in rows
+            ],
+        )
+        last_id = rows[-1].id
+
+    with op.batch_alter_table('recipes', schema=None) as batch_op:
+        batch_op.drop_column('ingredients')
+        batch_op.drop_column('instructions')
+        batch_op.alter_column('ingredients_new', new_column_name='ingredients', existing_type=to_type, nullable=False)
+        batch_op.alter_column('instructions_new', new_column_name='instructions', existing_type=to_type, nullable=False)
+
+
+def upgrade():
+    _drop_search_document()
+    _convert(sa.Text(), postgresql.JSONB(astext_type=sa.Text()), _to_lines)
+    _add_search_document(SEARCH_DOCUMENT_JSONB)
+
+
+def downgrade():
+    _drop_search_document()
+    _convert(postgresql.JSONB(astext_type=sa.Text()), sa.Text(), lambda lines: '\n'.join(lines or []))
+    _add_search_document(SEARCH_DOCUMENT_TEXT)
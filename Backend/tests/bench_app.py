@@ -0,0 +1,42 @@
+"""
+Shared setup of the benchmark scripts in this directory (bench_*.py, not collected by pytest).
+
+The app is created in-process and requests go through the Flask test client, so the numbers measure
+the app code without a web server. Redis defaults to the in-process fakeredis backend; set
+REDIS_BACKEND=redis (and REDIS_HOST/REDIS_PORT) to benchmark against a real server.
+"""
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class _OfflineImgurClient:
+    """app/routes/imgur.py builds its client at import, which calls the Imgur API."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+
+def create_bench_app():
+    """Create the app for a benchmark. No database is needed by the routes benchmarked."""
+    os.environ.setdefault("REDIS_BACKEND", "fakeredis")
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    import imgurpython
+    imgurpython.ImgurClient = _OfflineImgurClient
+    from app import create_app
+    app = create_app()
+    app.config["TESTING"] = True
+    return app
+
+
+def memory_mb():
+    """This process's (RSS, private anonymous, file-backed) resident memory in MB, from /proc (Linux only)."""
+    fields = {}
+    with open("/proc/self/status") as status:
+        for line in status:
+            name, _, value = line.partition(":")
+            if name in ("VmRSS", "RssAnon", "RssFile"):
+                fields[name] = int(value.split()[0]) // 1024
+    return fields["VmRSS"], fields["RssAnon"], fields["RssFile"]
@@ -0,0 +1,71 @@
+"""
+Benchmark GET /auth/check in each session mode:
+
+    redis, no cache   every check reads the session from Redis (AUTH_SESSION_CACHE_TTL=0)
+    redis, LRU        sessions are kept in the per-worker cache between checks
+    signed            the signed token in the cookie is verified locally (AUTH_SESSION_MODE=signed)
+
+and the authentication step alone: verifying a signed token against reading a Redis session. With the
+default fakeredis backend Redis costs no network round trip; run with REDIS_BACKEND=redis to include it.
+
+    cd Backend && python tests/bench_auth_check.py --requests 5000
+"""
+import argparse
+import sys
+import time
+from bench_app import BACKEND_DIR, create_bench_app
+
+USER = {"id": 1, "name": "cook", "email": "cook@example.com", "picture": None}
+
+
+def checks_per_second(client, session_id, requests):
+    client.set_cookie("session_id", session_id)
+    assert client.get("/auth/check").status_code == 200
+    started = time.perf_counter()
+    for _ in range(requests):
+        client.get("/auth/check")
+    return requests / (time.perf_counter() - started)
+
+
+def microseconds(function, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000, help="checks per mode (default 5000)")
+    args = parser.parse_args()
+
+    app = create_bench_app()
+    from app.utils.current_user import SessionUser
+    from app.utils.redis_utils import get_json, store_session_in_redis
+    from app.utils.session_tokens import issue_session_token, read_session_token
+
+    app.config["SECRET_KEY"] = "benchmark-secret"
+    client = app.test_client()
+    with app.app_context():
+        redis_session = store_session_in_redis(USER["id"], USER)
+        signed_session = issue_session_token(SessionUser(**USER))
+
+    modes = (
+        ("redis, no cache", {"AUTH_SESSION_MODE": "redis", "AUTH_SESSION_CACHE_TTL": 0}, redis_session),
+        ("redis, LRU", {"AUTH_SESSION_MODE": "redis", "AUTH_SESSION_CACHE_TTL": 5}, redis_session),
+        ("signed", {"AUTH_SESSION_MODE": "signed"}, signed_session),
+    )
+    print(f"{args.requests} GET /auth/check per mode")
+    for mode, config, session_id in modes:
+        app.config.update(config)
+        print(f"  {mode:16} {checks_per_second(client, session_id, args.requests):7.0f} req/s")
+
+    with app.app_context():
+        verify = microseconds(lambda: read_session_token(signed_session), args.requests)
+        read = microseconds(lambda: get_json(redis_session), args.requests)
+    print(f"Auth step alone: token verify {verify:.1f} us, Redis GET + JSON {read:.1f} us")
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, BACKEND_DIR)
+    main()
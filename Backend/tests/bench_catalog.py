@@ -0,0 +1,101 @@
+"""
+Benchmark the /based recipes catalog served from JSON against the compiled, memory-mapped catalog.
+
+Builds a synthetic catalog of --recipes recipes (the bundled thaifood_recipes.json repeated under
+distinct names), compiles it with `compile_catalog`, then starts one fresh process per mode and
+reports the time of its first request (loading the catalog), the average lookup by name and the
+process memory afterwards (Linux only).
+
+    cd Backend && python tests/bench_catalog.py --recipes 100000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from bench_app import BACKEND_DIR, create_bench_app, memory_mb
+
+SOURCE = os.path.join(BACKEND_DIR, "app", "routes", "thaifood_recipes.json")
+NAME = "{name} {number}"
+
+
+def write_catalog(path, count):
+    with open(SOURCE, "r", encoding="utf-8-sig") as file:
+        recipes = json.load(file)["recipes"]
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"source": "benchmark", "recipes": [
+            {**recipes[number % len(recipes)], "recipeName": NAME.format(
+                name=recipes[number % len(recipes)]["recipeName"], number=number,
+            )}
+            for number in range(count)
+        ]}, file, ensure_ascii=False)
+
+
+def run_worker(path, count, lookups):
+    """Measure one mode in this process: the compiled catalog is used if `path` has one."""
+    app = create_bench_app()
+    from app.routes import based_recipes
+    from app.utils.recipe_catalog import RecipeCatalog
+    based_recipes.catalog = RecipeCatalog(path)
+    with open(SOURCE, "r", encoding="utf-8-sig") as file:
+        names = [recipe["recipeName"] for recipe in json.load(file)["recipes"]]
+    client = app.test_client()
+    baseline = memory_mb()
+
+    started = time.perf_counter()
+    assert client.get(f"/based/recipes/{NAME.format(name=names[0], number=0)}").status_code == 200
+    first_request = time.perf_counter() - started
+
+    numbers = range(0, count, max(count // lookups, 1))
+    started = time.perf_counter()
+    for number in numbers:
+        response = client.get(f"/based/recipes/{NAME.format(name=names[number % len(names)], number=number)}")
+        assert response.status_code == 200
+    lookup = (time.perf_counter() - started) / len(numbers)
+    assert client.get(f"/based/recipes?limit=100&offset={count // 2}").status_code == 200
+
+    rss, anonymous, file_backed = memory_mb()
+    print(json.dumps({
+        "first_request_ms": first_request * 1000, "lookup_ms": lookup * 1000, "rss_mb": rss,
+        "anonymous_mb": anonymous, "file_backed_mb": file_backed, "app_rss_mb": baseline[0],
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=100000, help="catalog size (default 100000)")
+    parser.add_argument("--lookups", type=int, default=1000, help="lookups by name per mode (default 1000)")
+    parser.add_argument("--worker", metavar="PATH", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        return run_worker(args.worker, args.recipes, args.lookups)
+
+    from app.utils.recipe_catalog import compile_catalog
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = os.path.join(directory, "json", "catalog.json")
+        compiled_path = os.path.join(directory, "compiled", "catalog.json")
+        for path in (json_path, compiled_path):
+            os.makedirs(os.path.dirname(path))
+            write_catalog(path, args.recipes)
+        compile_catalog(compiled_path, os.path.splitext(compiled_path)[0] + ".rcat")
+        print(f"{args.recipes} recipes: {os.path.getsize(json_path) / 2**20:.0f} MB JSON, "
+              f"{os.path.getsize(os.path.splitext(compiled_path)[0] + '.rcat') / 2**20:.0f} MB compiled")
+        print(f"{'mode':10} {'first request':>14} {'lookup':>9} {'RSS':>8} {'private':>8} {'file-backed':>12}")
+        for mode, path in (("JSON", json_path), ("compiled", compiled_path)):
+            output = subprocess.run(
+                [sys.executable, __file__, "--worker", path, "--recipes", str(args.recipes), "--lookups", str(args.lookups)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(
+                f"{mode:10} {result['first_request_ms']:11.0f} ms {result['lookup_ms']:6.2f} ms "
+                f"{result['rss_mb']:5d} MB {result['anonymous_mb']:5d} MB {result['file_backed_mb']:9d} MB"
+            )
+        print(f"The app alone: {result['app_rss_mb']} MB RSS")
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, BACKEND_DIR)
+    main()
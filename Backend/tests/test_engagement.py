@@ -0,0 +1,148 @@
+import threading
+import time
+import pytest
+from app import db
+from app.models.models import Favorite, Like, Rating, Recipe
+from app.utils.engagement import toggle_recipe_engagement, upsert_recipe_rating
+
+TOGGLES = [(Like, "likes_count"), (Favorite, "favorites_count")]
+
+
+def _rating_state(app, recipe_id):
+    with app.app_context():
+        recipe = db.session.get(Recipe, recipe_id)
+        scores = [rating.score for rating in Rating.query.filter_by(recipe_id=recipe_id)]
+        return recipe.rating_sum, recipe.rating_count, scores
+
+
+def test_rating_insert_then_update_moves_counters(app, make_user, make_recipes):
+    user_id = make_user()
+    recipe_id, = make_recipes(user_id, 1)
+    with app.app_context():
+        assert upsert_recipe_rating(recipe_id, user_id, 4) == (4, 1)
+        assert upsert_recipe_rating(recipe_id, user_id, 2) == (2, 1)
+        db.session.commit()
+        assert upsert_recipe_rating(recipe_id + 1, user_id, 5) is None
+    assert _rating_state(app, recipe_id) == (2, 1, [2])
+
+
+def test_concurrent_first_ratings_by_the_same_user_keep_the_last_score(app, make_user, make_recipes):
+    user_id = make_user()
+    recipe_id, = make_recipes(user_id, 1)
+    second_done = threading.Event()
+    errors = []
+
+    def rate_second():
+        try:
+            with app.app_context():
+                upsert_recipe_rating(recipe_id, user_id, 5)
+                db.session.commit()
+        except Exception as e:  # Surfaced by the assertion below
+            errors.append(e)
+        finally:
+            second_done.set()
+
+    with app.app_context():
+        # The first rating is inserted but not committed yet
+        upsert_recipe_rating(recipe_id, user_id, 1)
+        second = threading.Thread(target=rate_second)
+        second.start()
+        # The second one blocks on the conflicting insert until the first commits
+        assert not second_done.wait(0.5)
+        db.session.commit()
+    second.join(10)
+
+    assert not errors
+    assert _rating_state(app, recipe_id) == (5, 1, [5])
+
+
+def test_concurrent_ratings_by_different_users_are_all_counted(app, make_user, make_recipes):
+    user_ids = [make_user(f"cook{number}") for number in range(8)]
+    recipe_id, = make_recipes(user_ids[0], 1)
+    start = threading.Barrier(len(user_ids))
+
+    def rate(user_id):
+        with app.app_context():
+            start.wait()
+            upsert_recipe_rating(recipe_id, user_id, 3)
+            time.sleep(0.01)
+            db.session.commit()
+
+    threads = [threading.Thread(target=rate, args=(user_id,)) for user_id in user_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert _rating_state(app, recipe_id) == (3 * len(user_ids), len(user_ids), [3] * len(user_ids))
+
+
+def _engagement_state(app, model, counter, recipe_id):
+    with app.app_context():
+        recipe = db.session.get(Recipe, recipe_id)
+        return getattr(recipe, counter), sorted(row.user_id for row in model.query.filter_by(recipe_id=recipe_id))
+
+
+@pytest.mark.parametrize("model, counter", TOGGLES)
+def test_toggle_adds_then_removes(app, make_user, make_recipes, model, counter):
+    user_id = make_user()
+    recipe_id, = make_recipes(user_id, 1)
+    with app.app_context():
+        assert toggle_recipe_engagement(model, getattr(Recipe, counter), recipe_id, user_id) == (True, 1)
+        assert toggle_recipe_engagement(model, getattr(Recipe, counter), recipe_id, user_id) == (False, 0)
+        assert toggle_recipe_engagement(model, getattr(Recipe, counter), recipe_id + 1, user_id) is None
+        db.session.commit()
+    assert _engagement_state(app, model, counter, recipe_id) == (0, [])
+
+
+@pytest.mark.parametrize("model, counter", TOGGLES)
+def test_double_click_toggle_undoes_the_first(app, make_user, make_recipes, model, counter):
+    user_id = make_user()
+    recipe_id, = make_recipes(user_id, 1)
+    results = []
+    second_done = threading.Event()
+
+    def toggle_second():
+        try:
+            with app.app_context():
+                results.append(toggle_recipe_engagement(model, getattr(Recipe, counter), recipe_id, user_id))
+                db.session.commit()
+        except Exception as e:  # Surfaced by the assertion below
+            results.append(e)
+        finally:
+            second_done.set()
+
+    with app.app_context():
+        # The first toggle adds the row but does not commit yet
+        assert toggle_recipe_engagement(model, getattr(Recipe, counter), recipe_id, user_id) == (True, 1)
+        second = threading.Thread(target=toggle_second)
+        second.start()
+        # The second one blocks on the conflicting insert until the first commits
+        assert not second_done.wait(0.5)
+        db.session.commit()
+    second.join(10)
+
+    assert results == [(False, 0)]
+    assert _engagement_state(app, model, counter, recipe_id) == (0, [])
+
+
+@pytest.mark.parametrize("model, counter", TOGGLES)
+def test_parallel_toggles_by_different_users_are_all_counted(app, make_user, make_recipes, model, counter):
+    user_ids = [make_user(f"cook{number}") for number in range(8)]
+    recipe_id, = make_recipes(user_ids[0], 1)
+    start = threading.Barrier(len(user_ids))
+
+    def toggle(user_id):
+        with app.app_context():
+            start.wait()
+            toggle_recipe_engagement(model, getattr(Recipe, counter), recipe_id, user_id)
+            time.sleep(0.01)
+            db.session.commit()
+
+    threads = [threading.Thread(target=toggle, args=(user_id,)) for user_id in user_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert _engagement_state(app, model, counter, recipe_id) == (len(user_ids), user_ids)
@@ -0,0 +1,30 @@
+import pytest
+from app.extensions import redis_client
+from app.utils.job_queue import QUEUE_KEY
+
+
+@pytest.mark.parametrize("body, content_type", [
+    ("", "application/json"),
+    ("not json", "application/json"),
+    ('["check"]', "application/json"),
+    ('"check"', "application/json"),
+    ('{"kind": "check", "data": ["ไข่เจียว"]}', "application/json"),
+    ('{"kind": "check"}', "text/plain"),
+])
+def test_job_submission_without_a_json_object_is_rejected(client, log_in, make_user, body, content_type):
+    log_in(make_user())
+
+    response = client.post("/gemini/jobs", data=body, content_type=content_type)
+
+    assert response.status_code == 400
+    assert redis_client.llen(QUEUE_KEY) == 0
+
+
+def test_job_submission_is_queued(client, log_in, make_user):
+    log_in(make_user())
+
+    response = client.post("/gemini/jobs", json={"kind": "check", "data": {"name": "ไข่เจียว"}})
+
+    assert response.status_code == 202
+    assert redis_client.llen(QUEUE_KEY) == 1
+    assert client.get(f"/gemini/jobs/{response.get_json()['job_id']}").get_json()["status"] == "queued"
@@ -0,0 +1,69 @@
+from app.utils import gemini_tasks
+
+TEMPLATE_RECIPE = """**ชื่อเมนู:** หมูทอด
+
+**หมวดหมู่:** ทอด
+
+**แท็ก:** หมู, ทอด
+
+**ส่วนผสม:**
+- {ingredient}
+- น้ำปลา 1 ช้อนโต๊ะ
+
+**วิธีทำ:**
+1. หมักหมูกับน้ำปลา
+2. {step}
+
+**ลักษณะภายนอก:** สีเหลืองทอง
+
+**รสชาติ:** เค็ม
+
+**ความปลอดภัย:** ปลอดภัย
+"""
+
+
+def _fake_gemini(monkeypatch, answer):
+    prompts = []
+
+    def generate(prompt, template, fresh=False, generation_config=None):
+        prompts.append(template)
+        return answer
+
+    monkeypatch.setattr(gemini_tasks, "generate", generate)
+    return prompts
+
+
+def test_template_text_does_not_declare_itself_safe(client, monkeypatch):
+    prompts = _fake_gemini(monkeypatch, "สูตรอาหาร: อันตราย\nreason: หมูที่ไม่ได้ปรุงสุกอาจมีพยาธิ")
+    text = TEMPLATE_RECIPE.format(ingredient="หมูสามชั้น 300 กรัม", step="เสิร์ฟหมูทันทีโดยไม่ต้องปรุงสุก")
+
+    response = client.post("/gemini/parse", json={"response": text})
+
+    assert response.status_code == 200
+    recipe = response.get_json()
+    assert recipe["menuName"] == "หมูทอด"
+    assert recipe["ingredients"] == ["หมูสามชั้น 300 กรัม", "น้ำปลา 1 ช้อนโต๊ะ"]
+    assert recipe["danger_check"]["status"] == "not safe"
+    assert prompts == [gemini_tasks.CHECK_TEMPLATE]  # Only the safety check, no parse call
+
+
+def test_template_text_with_a_blocked_ingredient_is_not_safe_without_gemini(client, monkeypatch):
+    prompts = _fake_gemini(monkeypatch, "สูตรอาหาร: ปลอดภัย")
+    text = TEMPLATE_RECIPE.format(ingredient="ใบกะท่อม 10 ใบ", step="ทอดหมูให้สุก")
+
+    recipe = client.post("/gemini/parse", json={"response": text}).get_json()
+
+    assert recipe["danger_check"]["status"] == "not safe"
+    assert "กะท่อม" in recipe["danger_check"]["reason"]
+    assert prompts == []
+
+
+def test_safe_template_text_is_checked_once(client, monkeypatch):
+    prompts = _fake_gemini(monkeypatch, "สูตรอาหาร: ปลอดภัย\nNot safe: -")
+    text = TEMPLATE_RECIPE.format(ingredient="หมูสามชั้น 300 กรัม", step="ทอดหมูจนสุกเหลืองทอง")
+
+    for _ in range(2):
+        recipe = client.post("/gemini/parse", json={"response": text}).get_json()
+        assert recipe["danger_check"] == {"status": "safe", "reason": "", "fix": ""}
+        assert "AI generate" in recipe["tags"]
+    assert prompts == [gemini_tasks.CHECK_TEMPLATE]  # The second answer is the memoized verdict
@@ -0,0 +1,35 @@
+from app.routes import gemini as gemini_routes
+from app.utils.gemini import cached_answer
+from app.utils.gemini_tasks import GENERATE_TEMPLATE, generation_prompt
+
+PROMPT = {"contents": [{"parts": [{"text": "ไข่เจียว"}]}]}
+
+
+def _events(response):
+    return [block.split("\n")[0] for block in response.get_data(as_text=True).strip().split("\n\n")]
+
+
+def _stream(monkeypatch, chunks):
+    monkeypatch.setattr(gemini_routes, "stream_gemini", lambda prompt: (chunk for chunk in chunks))
+
+
+def test_streamed_answer_is_sent_and_cached(app, client, log_in, make_user, monkeypatch):
+    log_in(make_user())
+    _stream(monkeypatch, ["ไข่", "เจียว"])
+
+    response = client.post("/gemini/generate/stream", json=PROMPT)
+
+    assert _events(response) == ['data: {"text": "ไข่"}', 'data: {"text": "เจียว"}', "event: done"]
+    with app.app_context():
+        assert cached_answer(generation_prompt("ไข่เจียว"), GENERATE_TEMPLATE) == "ไข่เจียว"
+
+
+def test_empty_stream_is_an_error_and_not_cached(app, client, log_in, make_user, monkeypatch):
+    log_in(make_user())
+    _stream(monkeypatch, [])
+
+    response = client.post("/gemini/generate/stream", json=PROMPT)
+
+    assert _events(response) == ["event: error"]
+    with app.app_context():
+        assert cached_answer(generation_prompt("ไข่เจียว"), GENERATE_TEMPLATE) is None
@@ -0,0 +1,54 @@
+from app.extensions import db, redis_client
+from app.models.models import Recipe
+from app.utils import job_queue
+
+
+def _taken_job(app, started=True):
+    """Submit a job and move it to the running list the way a worker does, marking it running or not."""
+    with app.app_context():
+        job_id = job_queue.submit_job("check", {"name": "ไข่เจียว"}, user_id=1)
+    redis_client.lmove(job_queue.QUEUE_KEY, job_queue.RUNNING_KEY, "RIGHT", "LEFT")
+    if started:
+        redis_client.hset(job_queue._job_key(job_id), mapping={"status": "running", "started_at": 0})
+    return job_id
+
+
+def _running_ids():
+    return [raw_id.decode("utf-8") for raw_id in redis_client.lrange(job_queue.RUNNING_KEY, 0, -1)]
+
+
+def test_job_past_its_lease_is_queued_again(app):
+    job_id = _taken_job(app)
+
+    assert job_queue.requeue_stale_jobs() == 1
+    assert _running_ids() == []
+    assert redis_client.lindex(job_queue.QUEUE_KEY, -1).decode("utf-8") == job_id
+    assert redis_client.hget(job_queue._job_key(job_id), "status") == b"queued"
+    assert redis_client.hget(job_queue._job_key(job_id), "started_at") is None
+
+
+def test_job_whose_worker_died_before_marking_it_running_is_queued_after_its_lease(app, monkeypatch):
+    job_id = _taken_job(app, started=False)
+
+    # The lease starts when the job is first seen without a start time
+    assert job_queue.requeue_stale_jobs() == 0
+    assert _running_ids() == [job_id]
+    assert redis_client.hget(job_queue._job_key(job_id), "started_at") is not None
+    assert job_queue.requeue_stale_jobs() == 0
+
+    monkeypatch.setattr(job_queue, "JOB_LEASE", 0)
+    assert job_queue.requeue_stale_jobs() == 1
+    assert _running_ids() == []
+    assert redis_client.llen(job_queue.QUEUE_KEY) == 1
+
+
+def test_job_does_not_leave_its_transaction_open(app, monkeypatch):
+    def task(data, fresh=False):
+        return {"recipes": db.session.query(Recipe.id).count()}, 200
+
+    monkeypatch.setitem(job_queue.TASKS, "check", task)
+    with app.app_context():
+        job_id = job_queue.submit_job("check", {}, user_id=1)
+        assert job_queue.run_one_job() == job_id
+        assert job_queue.get_job(job_id)["result"] == {"recipes": 0}
+        assert not db.session().in_transaction()
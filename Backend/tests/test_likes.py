@@ -0,0 +1,26 @@
+import json
+from app.utils.like_buffer import flush_likes
+
+
+def _detail_likes(client, recipe_id):
+    response = client.get(f"/api/recipes/{recipe_id}?include=")
+    assert response.status_code == 200
+    return json.loads(response.data)["likes"]
+
+
+def test_buffered_like_shows_in_cached_recipe_detail(app, client, log_in, monkeypatch, make_user, make_recipes):
+    monkeypatch.setitem(app.config, "LIKES_WRITE_BEHIND", True)
+    user_id = make_user()
+    recipe_id, = make_recipes(user_id, 1)
+    log_in(user_id)
+    assert _detail_likes(client, recipe_id) == 0  # Now cached
+
+    assert client.post(f"/api/{recipe_id}/like").get_json()["likes"] == 1
+    assert _detail_likes(client, recipe_id) == 1
+
+    with app.app_context():
+        assert flush_likes() == 1
+    assert _detail_likes(client, recipe_id) == 1
+
+    assert client.post(f"/api/{recipe_id}/like").get_json()["likes"] == 0
+    assert _detail_likes(client, recipe_id) == 0
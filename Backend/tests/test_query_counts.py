@@ -0,0 +1,73 @@
+import contextlib
+import pytest
+from sqlalchemy import event
+from app import db
+from app.models.models import Favorite
+
+
+@pytest.fixture
+def count_queries(app):
+    """Count the SQL statements run inside the returned context manager: `with count_queries() as queries:`."""
+
+    @contextlib.contextmanager
+    def count_queries():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    return count_queries
+
+
+def _favorite(app, user_id, recipe_ids):
+    with app.app_context():
+        db.session.add_all(Favorite(recipe_id=recipe_id, user_id=user_id) for recipe_id in recipe_ids)
+        db.session.commit()
+
+
+def _queries_for(client, count_queries, url):
+    with count_queries() as statements:
+        response = client.get(url)
+    assert response.status_code == 200, response.get_json()
+    return len(statements)
+
+
+def test_user_recipes_query_count_does_not_grow_with_recipes(app, client, count_queries, make_user, make_recipes):
+    one, many = make_user("one"), make_user("many")
+    make_recipes(one, 1)
+    make_recipes(many, 30)
+
+    assert _queries_for(client, count_queries, f"/api/users/{one}/recipes") == _queries_for(
+        client, count_queries, f"/api/users/{many}/recipes"
+    )
+
+
+def test_user_favorites_query_count_does_not_grow_with_favorites(app, client, count_queries, make_user, make_recipes):
+    one, many = make_user("one"), make_user("many")
+    recipe_ids = make_recipes(one, 30)
+    _favorite(app, one, recipe_ids[:1])
+    _favorite(app, many, recipe_ids)
+
+    assert _queries_for(client, count_queries, f"/api/users/{one}/favorites") == _queries_for(
+        client, count_queries, f"/api/users/{many}/favorites"
+    )
+
+
+@pytest.mark.parametrize("fields", [None, "id,name,creator_name"])
+def test_recipe_list_query_count_does_not_grow_with_page_size(app, client, count_queries, make_user, make_recipes, fields):
+    for name in ("first", "second", "third"):
+        make_recipes(make_user(name), 20)
+    fields_arg = f"&fields={fields}" if fields else ""
+
+    small_page = _queries_for(client, count_queries, f"/api/recipes?limit=5{fields_arg}")
+    large_page = _queries_for(client, count_queries, f"/api/recipes?limit=50{fields_arg}")
+    assert small_page == large_page
+    assert _queries_for(client, count_queries, f"/api/recipes?limit=50&sort=most_liked{fields_arg}") == small_page
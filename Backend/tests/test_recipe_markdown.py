@@ -0,0 +1,56 @@
+from app.utils.recipe_markdown import parse_recipe_markdown, render_recipe_markdown
+
+RECIPE = {
+    "menuName": "ไข่เจียว",
+    "category": "ทอด",
+    "tags": ["ไข่", "ง่าย"],
+    "ingredients": ["ไข่ไก่ 2 ฟอง", "น้ำปลา 1 ช้อนชา"],
+    "instructions": ["ตีไข่กับน้ำปลา", "ทอดในน้ำมันร้อนจนเหลืองทอง"],
+    "characteristics": "ฟูกรอบ สีเหลืองทอง",
+    "flavors": "เค็มมัน",
+    "description": "เมนูง่ายๆ",
+}
+
+
+def test_rendered_recipe_parses_back_to_its_content():
+    text = render_recipe_markdown({**RECIPE, "danger_check": {"status": "safe", "reason": "", "fix": ""}})
+
+    assert parse_recipe_markdown(text) == RECIPE
+
+
+def test_safety_sections_of_the_text_are_ignored():
+    danger_check = {"status": "not safe", "reason": "ทดสอบ", "fix": "ทดสอบ"}
+    recipe = parse_recipe_markdown(render_recipe_markdown({**RECIPE, "danger_check": danger_check}))
+
+    assert "danger_check" not in recipe
+    assert recipe == RECIPE
+
+
+def test_free_form_headings_and_bullets_are_read():
+    text = "\n".join([
+        "นี่คือสูตรของคุณ",
+        "## ชื่อเมนู: ไข่เจียว",
+        "**หมวดหมู่**: ทอด",
+        "**แท็ก:** ไข่、ง่าย",
+        "**ส่วนผสม:**",
+        "* ไข่ไก่ 2 ฟอง",
+        "• น้ำปลา 1 ช้อนชา",
+        "**วิธีทำ:**",
+        "๑. ตีไข่กับน้ำปลา",
+        "2) ทอดในน้ำมันร้อนจนเหลืองทอง",
+        "**ลักษณะภายนอก:** ฟูกรอบ",
+        "สีเหลืองทอง",
+        "**รสชาติ:** เค็มมัน",
+        "**หมายเหตุ:** ไม่ใช่ส่วนของสูตร",
+    ])
+
+    recipe = parse_recipe_markdown(text)
+
+    assert recipe == {**RECIPE, "characteristics": "ฟูกรอบ สีเหลืองทอง", "description": ""}
+
+
+def test_text_missing_a_required_section_is_not_parsed():
+    text = render_recipe_markdown({**RECIPE, "instructions": []})
+
+    assert parse_recipe_markdown(text) is None
+    assert parse_recipe_markdown("ไข่เจียวทำง่ายมาก ตีไข่แล้วทอด") is None
@@ -0,0 +1,71 @@
+import pytest
+from flask import Flask
+from app.utils import recipe_safety
+from app.utils.recipe_safety import KeywordMatcher, canonical_content, screen_recipe
+
+
+def test_keyword_matcher_finds_overlapping_keywords_in_one_pass():
+    matcher = KeywordMatcher(["he", "she", "his", "hers"])
+
+    assert matcher.find("ushers") == {"she", "he", "hers"}
+    assert matcher.find("this") == {"his"}
+    assert matcher.find("nothing") == set()
+
+
+def test_keyword_matcher_ignores_case_spacing_and_zero_width_characters():
+    matcher = KeywordMatcher(["ใบกะท่อม", "Kratom"])
+
+    assert matcher.find("ใบ กะ​ท่อม 10 ใบ") == {"ใบกะท่อม"}
+    assert matcher.find("KRA TOM tea") == {"Kratom"}
+
+
+def test_canonical_content_ignores_formatting():
+    assert canonical_content({"ingredients": ["- ไข่  2 ฟอง", "1. น้ำปลา"], "tags": ["ข", "ก"]}) == canonical_content(
+        {"ingredients": ["ไข่ 2 ฟอง", "น้ำปลา"], "tags": ["ก", "ข"]}
+    )
+
+
+@pytest.fixture
+def screening(monkeypatch):
+    """An app context for screen_recipe, with the fast path on and every ingredient known."""
+    app = Flask(__name__)
+    app.config["GEMINI_CHECK_FAST_PATH"] = True
+    monkeypatch.setattr(recipe_safety, "_all_ingredients_known", lambda ingredients: True)
+    with app.app_context():
+        yield app
+
+
+@pytest.mark.parametrize("text, term", [
+    ("ใบกะท่อม 10 ใบ|ต้มน้ำ", "กะท่อม"),
+    ("ใบกระท่อม 10 ใบ|ต้มน้ำ", "ใบกระท่อม"),
+    ("ใบกัญชา 5 ใบ|ผัดให้หอม", "กัญชา"),
+    ("หมู 300 กรัม|ทอดหมูจนสีดำ", "ทอดหมูจนสีดำ"),
+    ("หมู 300 กรัม|ทอดหมูสามชั้นจนเป็นสีดำ", "ทอดหมูสามชั้นจนเป็นสีดำ"),
+    ("ไก่ 1 ตัว|ย่างจนไหม้เกรียม", "ย่างจนไหม้"),
+    ("ผัก|ล้างด้วยน้ำยาล้างจาน", "น้ำยาล้างจาน"),
+])
+def test_screen_blocks_unsafe_recipes(screening, text, term):
+    verdict = screen_recipe(text, text.split("|")[:1])
+
+    assert verdict["is_safe"] is False
+    assert verdict["checked_by"] == "blocklist"
+    assert term in verdict["reason"]
+
+
+@pytest.mark.parametrize("text", [
+    "ข้าวผัดกระท่อม|ข้าวสวย 1 จาน|ผัดข้าวกับไข่",  # The hut, not the leaf
+    "หมู 300 กรัม|ทอดหมูจนเหลืองแล้วโรยงาดำ",
+    "ไข่ 2 ฟอง|ทอดไข่จนสุก|ราดซีอิ๊วดำ",
+])
+def test_screen_passes_safe_recipes_on_the_fast_path(screening, text):
+    assert screen_recipe(text, ["ข้าวสวย 1 จาน"]) == {"is_safe": True, "reason": "", "checked_by": "fast-path"}
+
+
+def test_screen_leaves_caution_terms_to_gemini(screening):
+    assert screen_recipe("หอยนางรม|กินหอยดิบกับน้ำจิ้ม", ["หอยนางรม"]) is None
+
+
+def test_screen_leaves_everything_else_to_gemini_without_the_fast_path(screening):
+    screening.config["GEMINI_CHECK_FAST_PATH"] = False
+
+    assert screen_recipe("ไข่เจียว|ไข่ 2 ฟอง|ทอดไข่", ["ไข่ 2 ฟอง"]) is None
@@ -0,0 +1,43 @@
+import base64
+import json
+import time
+import pytest
+from config import Config
+from app import create_app
+from app.utils import session_tokens
+
+
+def _signed(payload):
+    body = base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).rstrip(b"=")
+    return (body + b"." + session_tokens._sign(body)).decode("ascii")
+
+
+def test_valid_token_is_read(app):
+    with app.app_context():
+        payload = {"id": 1, "jti": "a", "exp": time.time() + 60}
+        assert session_tokens.read_session_token(_signed(payload)) == payload
+
+
+@pytest.mark.parametrize("exp", [None, "9999999999", [9999999999], {"at": 9999999999}, True, time.time() - 1])
+def test_token_without_a_future_numeric_expiry_is_invalid(app, exp):
+    with app.app_context():
+        payload = {"id": 1, "jti": "a"}
+        if exp is not None:
+            payload["exp"] = exp
+        assert session_tokens.read_session_token(_signed(payload)) is None
+
+
+@pytest.mark.parametrize("secret_key", [None, "", "your-secret-key"])
+def test_signed_sessions_refuse_to_start_without_a_secret_key(monkeypatch, secret_key):
+    monkeypatch.setattr(Config, "AUTH_SESSION_MODE", "signed")
+    monkeypatch.setattr(Config, "SECRET_KEY", secret_key)
+
+    with pytest.raises(RuntimeError, match="FLASK_SECRET_KEY"):
+        create_app()
+
+
+def test_signed_sessions_start_with_a_secret_key(monkeypatch):
+    monkeypatch.setattr(Config, "AUTH_SESSION_MODE", "signed")
+    monkeypatch.setattr(Config, "SECRET_KEY", "a-real-secret")
+
+    assert create_app().config["AUTH_SESSION_MODE"] == "signed"
@@ -0,0 +1,39 @@
+from app.models.models import RecipeTag
+from app.utils.catalog_import import import_catalog
+from app.utils.tags import MAX_TAG_LENGTH, indexed_tags
+
+LONG_PREFIX = "ก" * MAX_TAG_LENGTH
+LONG_TAGS = [LONG_PREFIX + "หนึ่ง", LONG_PREFIX + "สอง", "ไข่", "ไข่"]
+
+
+def _indexed(app):
+    with app.app_context():
+        return sorted((row.recipe_id, row.tag) for row in RecipeTag.query)
+
+
+def test_indexed_tags_are_cut_before_they_are_deduplicated():
+    assert indexed_tags(",".join(LONG_TAGS)) == [LONG_PREFIX, "ไข่"]
+    assert indexed_tags('[" a ", "b", "a"]') == ["a", "b"]
+    assert indexed_tags(None) == []
+
+
+def test_submitted_recipe_with_long_tags_sharing_a_prefix_is_saved(app, client, log_in, make_user):
+    log_in(make_user())
+
+    response = client.post("/api/recipes/submit", json={
+        "name": "ไข่เจียว", "ingredients": ["ไข่ 2 ฟอง"], "instructions": ["ทอด"], "videos": [], "tags": LONG_TAGS,
+    })
+
+    assert response.status_code == 201
+    recipe_id = response.get_json()["recipe_id"]
+    assert _indexed(app) == [(recipe_id, LONG_PREFIX), (recipe_id, "ไข่")]
+
+
+def test_imported_recipe_with_long_tags_sharing_a_prefix_is_saved(app, make_user):
+    owner_id = make_user()
+    records = [{"recipeName": "ไข่เจียว", "ingredients": ["ไข่ 2 ฟอง"], "instructions": ["ทอด"], "tags": LONG_TAGS}]
+
+    with app.app_context():
+        assert import_catalog(records, owner_id) == (1, 1)
+
+    assert [tag for _, tag in _indexed(app)] == [LONG_PREFIX, "ไข่"]
@@ -73,6 +73,7 @@ const GeneratePage = () => {
             credentials: "include",
             body: JSON.stringify({
               contents: [{ parts: [{ text: prompt }] }],
+              format: "json", // The structured recipe comes back as `recipe`, no /parse call needed
             }),
           });
   
@@ -90,6 +91,7 @@ const GeneratePage = () => {
           const generateData = await generateRes.json();
           console.log("Raw Response from /generate API:", generateData);
           rawResponse = generateData.response; // Assuming response contains the raw text
+          recipeData = generateData.recipe || {};
   
           // Check safety status from /generate API
           const { is_safe, reason, fix } = generateData;
@@ -107,23 +109,25 @@ const GeneratePage = () => {
         }
       }
   
-      // Step 2: Parse the generated response
-      console.log("Raw Response before parsing:", rawResponse);
-      console.log("Payload to /gemini/parse:", { response: rawResponse });
-  
-      console.log("Parsing the raw response using /parse API...");
-      const parseRes = await fetch(`${process.env.NEXT_PUBLIC_BACK_END_URL}/gemini/parse`, {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ response: rawResponse }), // Use rawResponse as input for /parse
-      });
-  
-      if (!parseRes.ok) {
-        const errorData = await parseRes.json();
-        throw new Error(errorData.error || "Failed to parse recipe");
+      // Step 2: Parse the generated response, unless /generate already returned it structured
+      if (!recipeData.danger_check) {
+        console.log("Raw Response before parsing:", rawResponse);
+        console.log("Payload to /gemini/parse:", { response: rawResponse });
+    
+        console.log("Parsing the raw response using /parse API...");
+        const parseRes = await fetch(`${process.env.NEXT_PUBLIC_BACK_END_URL}/gemini/parse`, {
+          method: "POST",
+          headers: { "Content-Type": "application/json" },
+          body: JSON.stringify({ response: rawResponse }), // Use rawResponse as input for /parse
+        });
+    
+        if (!parseRes.ok) {
+          const errorData = await parseRes.json();
+          throw new Error(errorData.error || "Failed to parse recipe");
+        }
+    
+        recipeData = await parseRes.json();
       }
-  
-      recipeData = await parseRes.json();
       console.log("Parsed Recipe Data:", recipeData);
   
       // Check the 'status' field in the parsed response